@@ -4,7 +4,37 @@ from flask_jwt_extended import JWTManager
 import config
 
 
-def create_app():
+def start_background_tasks():
+    """
+    Sensor ingestion (scheduler or change stream) and SHAP explanation
+    workers. Must run in exactly one process per deployment.
+    """
+    if config.SENSOR_INGEST_MODE == "change_stream":
+        from services.sensor_change_stream import start_sensor_change_stream
+        start_sensor_change_stream(
+            fallback_interval_seconds=config.SENSOR_POLL_INTERVAL_SECONDS
+        )
+    else:
+        from services.sensor_scheduler import start_sensor_scheduler
+        start_sensor_scheduler(
+            interval_seconds=config.SENSOR_POLL_INTERVAL_SECONDS
+        )
+
+    if config.SENSOR_EXPLAIN_MODE == "background":
+        from services.explanation_worker import start_explanation_workers
+        start_explanation_workers()
+
+
+def create_app(prefork: bool = False, start_background: bool = True):
+    """
+    prefork=True is for a master process that forks workers (wsgi.py):
+    models, explainers and lookup tables are built synchronously, no
+    background thread is started, and the Mongo clients are closed so
+    every worker opens its own after the fork.
+
+    start_background=False leaves the background tasks to the caller,
+    for servers that run several worker processes (asgi_app.py).
+    """
     app = Flask(__name__)
 
     # =========================
@@ -40,35 +70,42 @@ def create_app():
     # =========================
     # INITIALIZE SENSOR DATABASE
     # =========================
-    sensor_db = get_database(config.SENSOR_DATABASE_NAME)
+    get_database(config.SENSOR_DATABASE_NAME)  # sensor DB
 
-    # Create unique indexes (prevent duplicates)
-    sensor_db["pre_lime_auto_predictions"].create_index(
-        "sensor_record_id",
-        unique=True
-    )
+    # Create registered indexes (unique dedup keys + history sort paths)
+    if config.INDEX_BOOTSTRAP_ON_STARTUP:
+        from database.indexes import (
+            ensure_indexes,
+            query_plan_report,
+            print_query_plan_report
+        )
+        ensure_indexes()
 
-    sensor_db["post_lime_auto_predictions"].create_index(
-        "sensor_record_id",
-        unique=True
-    )
-
-    sensor_db["classification_auto_predictions"].create_index(
-        "sensor_record_id",
-        unique=True
-    )
-
-    sensor_db["normal_regression_auto_predictions"].create_index(
-        "sensor_record_id",
-        unique=True
-    )
-
-    print("✅ Sensor prediction indexes ensured")
+        if config.INDEX_REPORT_ON_STARTUP:
+            print_query_plan_report(query_plan_report())
 
     # =========================
-    # LOAD ML MODELS (FAIL FAST)
+    # LOAD ML MODELS
     # =========================
-    import services.model_loader
+    from services import model_loader
+
+    if prefork or config.MODEL_LOADING_MODE == "eager":
+        # In prefork mode workers share these pages copy-on-write
+        model_loader.load_all_assets(
+            include_explainers=config.MODEL_WARMUP_EXPLAINERS
+        )
+    elif config.MODEL_LOADING_MODE == "warmup":
+        model_loader.start_model_warmup(
+            include_explainers=config.MODEL_WARMUP_EXPLAINERS
+        )
+
+    if config.DOSE_LOOKUP_ENABLED and config.DOSE_LOOKUP_BUILD_ON_STARTUP:
+        if prefork:
+            from services.lookup_table_builder import ensure_lookup_tables
+            ensure_lookup_tables()
+        else:
+            from services.lookup_table_builder import start_lookup_table_build
+            start_lookup_table_build()
 
     # =========================
     # REGISTER API ROUTES
@@ -81,6 +118,7 @@ def create_app():
     from routes.normal_regression_routes import normal_regression_bp
     from routes.auth_routes import auth_bp
     from routes.sensor_auto_routes import sensor_auto_bp
+    from routes.metrics_routes import metrics_bp
 
     app.register_blueprint(pre_lime_bp, url_prefix="/api/v1/pre-lime")
     app.register_blueprint(post_lime_bp, url_prefix="/api/v1/post-lime")
@@ -90,12 +128,15 @@ def create_app():
     app.register_blueprint(normal_regression_bp, url_prefix="/api/v1/normal-regression")
     app.register_blueprint(auth_bp, url_prefix="/api/v1/auth")
     app.register_blueprint(sensor_auto_bp, url_prefix="/api/v1/sensor")
+    app.register_blueprint(metrics_bp, url_prefix="/api/v1/metrics")
 
     # =========================
     # START SENSOR AUTO-SCHEDULER
     # =========================
-    from services.sensor_scheduler import start_sensor_scheduler
-    start_sensor_scheduler(interval_seconds=10)
+    # Under gunicorn / hypercorn one worker starts these
+    # (see gunicorn.conf.py, asgi_app.py)
+    if start_background and not prefork:
+        start_background_tasks()
 
     # =========================
     # HEALTH CHECK
@@ -106,7 +147,8 @@ def create_app():
             "status": "OK",
             "app": app.config["APP_NAME"],
             "environment": app.config["ENV"],
-            "version": app.config["API_VERSION"]
+            "version": app.config["API_VERSION"],
+            "models": model_loader.asset_readiness()
         }), 200
 
     # =========================
@@ -126,6 +168,10 @@ def create_app():
             "message": "Internal server error"
         }), 500
 
+    if prefork:
+        from database.mongo import close_mongo_clients
+        close_mongo_clients()
+
     return app
 
 
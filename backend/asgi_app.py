@@ -0,0 +1,97 @@
+from quart import Quart, request
+
+import config
+from app import create_app, start_background_tasks
+from database.async_mongo import close_async_client
+from services.background_leader import start_background_leader
+from services.async_executor import ml_executor, io_executor
+from utils.asgi_bridge import dispatch_to_flask, to_quart_response
+
+# Async serving mode:
+#   hypercorn asgi_app:app --bind 0.0.0.0:5001
+#
+# Dashboard history / rollup reads are served natively with Motor (one
+# event loop, no thread per connection). Every other route runs the
+# unchanged Flask view in a bounded executor: prediction endpoints in
+# the ML pool, the rest in the I/O pool.
+
+ML_ROUTE_PREFIXES = (
+    "/api/v1/pre-lime",
+    "/api/v1/post-lime",
+    "/api/v1/classify",
+    "/api/v1/advance-regression",
+    "/api/v1/normal-regression"
+)
+
+ALL_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+
+def create_asgi_app():
+    # Every hypercorn worker imports this module; the background tasks
+    # are started once, by the worker that wins the leader lock.
+    flask_app = create_app(start_background=False)
+
+    app = Quart(__name__)
+    app.config["APP_NAME"] = config.APP_NAME
+    app.extensions["flask_app"] = flask_app
+
+    # =========================
+    # NATIVE ASYNC ROUTES
+    # =========================
+    from routes.async_history_routes import async_history_bp
+    app.register_blueprint(async_history_bp)
+
+    # =========================
+    # FLASK FALLBACK
+    # =========================
+    @app.route("/", defaults={"path": ""}, methods=ALL_METHODS, provide_automatic_options=False)
+    @app.route("/<path:path>", methods=ALL_METHODS, provide_automatic_options=False)
+    async def flask_fallback(path):
+        executor = ml_executor if request.path.startswith(ML_ROUTE_PREFIXES) else io_executor
+
+        flask_response = await executor.run(
+            dispatch_to_flask,
+            flask_app,
+            request.method,
+            request.path,
+            request.query_string,
+            list(request.headers.items()),
+            await request.get_data(),
+            f"{request.scheme}://{request.host}",
+            request.remote_addr
+        )
+
+        return to_quart_response(flask_response, io_executor)
+
+    # Same CORS headers flask_cors adds to Flask responses
+    @app.after_request
+    async def add_cors_headers(response):
+        origin = request.headers.get("Origin")
+
+        if origin and "Access-Control-Allow-Origin" not in response.headers:
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.vary.add("Origin")
+
+        return response
+
+    @app.errorhandler(500)
+    async def internal_error(error):
+        return {
+            "status": "error",
+            "message": "Internal server error"
+        }, 500
+
+    @app.before_serving
+    async def start_background():
+        start_background_leader(start_background_tasks)
+
+    @app.after_serving
+    async def shutdown():
+        close_async_client()
+        ml_executor.shutdown()
+        io_executor.shutdown()
+
+    return app
+
+
+app = create_asgi_app()
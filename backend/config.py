@@ -38,6 +38,32 @@ MONGODB_URI = (
     f"?retryWrites=true&w=majority"
 )
 
+# -------- Connection pool (shared by request threads + scheduler) --------
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+# Close connections idle longer than this (0 = never)
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "0"))
+# Fail a checkout after waiting this long for a free connection (0 = wait forever)
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Comma-separated, in preference order, e.g. "zstd,snappy,zlib"
+# (zstd needs the zstandard package, snappy needs python-snappy)
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "")
+# primary | primaryPreferred | secondary | secondaryPreferred | nearest
+MONGODB_READ_PREFERENCE = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+
+# -------- History / export reads (separate client) --------
+# Dashboards and exports read through their own pool, off the primary
+# where possible and with wire compression for the bulky SHAP documents.
+MONGODB_HISTORY_READ_PREFERENCE = os.getenv("MONGODB_HISTORY_READ_PREFERENCE", "secondaryPreferred")
+# zlib needs no extra package; set "zstd,snappy,zlib" after installing
+# zstandard / python-snappy (see requirements.txt)
+MONGODB_HISTORY_COMPRESSORS = os.getenv("MONGODB_HISTORY_COMPRESSORS", "zlib")
+MONGODB_HISTORY_MAX_POOL_SIZE = int(os.getenv("MONGODB_HISTORY_MAX_POOL_SIZE", "20"))
+
+# Checkout wait samples kept per server for the p50/p95 in /api/v1/metrics/mongo-pool
+MONGODB_POOL_STATS_WINDOW = int(os.getenv("MONGODB_POOL_STATS_WINDOW", "1000"))
+
 # =========================
 # SENSOR DATABASE (NEW)
 # =========================
@@ -56,6 +82,95 @@ SENSOR_PREDICTION_COLLECTION = os.getenv(
     "SENSOR_PREDICTION_COLLECTION",
     "sensor_auto_predictions"
 )
+
+# Per-model "last processed reading" for incremental ingestion
+SENSOR_WATERMARK_COLLECTION = os.getenv(
+    "SENSOR_WATERMARK_COLLECTION",
+    "sensor_prediction_watermarks"
+)
+
+# Background catch-up jobs (POST /sensor/catch-up) and their widest range
+SENSOR_CATCH_UP_JOB_COLLECTION = os.getenv(
+    "SENSOR_CATCH_UP_JOB_COLLECTION",
+    "sensor_catch_up_jobs"
+)
+SENSOR_CATCH_UP_MAX_DAYS = int(os.getenv("SENSOR_CATCH_UP_MAX_DAYS", "7"))
+# A running job with no progress for this long (crashed worker) no
+# longer blocks new catch-ups
+SENSOR_CATCH_UP_STALE_MINUTES = int(os.getenv("SENSOR_CATCH_UP_STALE_MINUTES", "15"))
+
+# Readings fetched per pipeline batch, and max batches per scheduler tick
+SENSOR_BATCH_SIZE = int(os.getenv("SENSOR_BATCH_SIZE", "2000"))
+SENSOR_MAX_BATCHES_PER_TICK = int(os.getenv("SENSOR_MAX_BATCHES_PER_TICK", "10"))
+
+# Recent readings scanned on first run, before any watermark exists
+SENSOR_BOOTSTRAP_WINDOW = int(os.getenv("SENSOR_BOOTSTRAP_WINDOW", "8000"))
+
+# "inline"     = SHAP computed with every auto-prediction
+# "background" = results saved first, SHAP written back by explanation workers
+# "off"        = dose/class only
+SENSOR_EXPLAIN_MODE = os.getenv("SENSOR_EXPLAIN_MODE", "inline")
+
+# Process pool for the backfill pipeline (0 = run in the scheduler thread).
+# Batches smaller than SENSOR_PIPELINE_PARALLEL_MIN_RECORDS stay in-process.
+SENSOR_PIPELINE_WORKERS = int(os.getenv("SENSOR_PIPELINE_WORKERS", "0"))
+SENSOR_PIPELINE_PARALLEL_MIN_RECORDS = int(os.getenv("SENSOR_PIPELINE_PARALLEL_MIN_RECORDS", "500"))
+SENSOR_PIPELINE_START_METHOD = os.getenv("SENSOR_PIPELINE_START_METHOD", "spawn")
+
+# Background explanation workers
+EXPLANATION_WORKER_BATCH_SIZE = int(os.getenv("EXPLANATION_WORKER_BATCH_SIZE", "500"))
+EXPLANATION_WORKER_IDLE_SECONDS = int(os.getenv("EXPLANATION_WORKER_IDLE_SECONDS", "5"))
+
+# "poll" = sensor_scheduler every SENSOR_POLL_INTERVAL_SECONDS,
+# "change_stream" = event-driven (falls back to polling if unsupported)
+SENSOR_INGEST_MODE = os.getenv("SENSOR_INGEST_MODE", "poll")
+SENSOR_POLL_INTERVAL_SECONDS = int(os.getenv("SENSOR_POLL_INTERVAL_SECONDS", "10"))
+
+# Change-stream micro-batching. AWAIT_MS is how long each getMore waits
+# on the server for new inserts: one round trip per AWAIT_MS while idle,
+# and a window can close up to one AWAIT_MS late when inserts stop.
+SENSOR_MICRO_BATCH_WINDOW_MS = int(os.getenv("SENSOR_MICRO_BATCH_WINDOW_MS", "250"))
+SENSOR_CHANGE_STREAM_AWAIT_MS = int(os.getenv("SENSOR_CHANGE_STREAM_AWAIT_MS", "1000"))
+SENSOR_CHANGE_STREAM_RETRY_SECONDS = int(os.getenv("SENSOR_CHANGE_STREAM_RETRY_SECONDS", "5"))
+
+# Auto-history pages (/api/v1/sensor/*), keyset-paginated by sensor_created_at
+SENSOR_HISTORY_PAGE_SIZE = int(os.getenv("SENSOR_HISTORY_PAGE_SIZE", "500"))
+SENSOR_HISTORY_MAX_PAGE_SIZE = int(os.getenv("SENSOR_HISTORY_MAX_PAGE_SIZE", "5000"))
+
+# Minute / hour / day buckets per model, updated by the backfill
+SENSOR_ROLLUPS_ENABLED = os.getenv("SENSOR_ROLLUPS_ENABLED", "true").lower() == "true"
+SENSOR_ROLLUP_COLLECTIONS = {
+    "minute": "sensor_rollups_minute",
+    "hour": "sensor_rollups_hour",
+    "day": "sensor_rollups_day"
+}
+# Buckets per /sensor/rollups response: default and maximum ?limit=
+# (a month of hourly buckets is ~720, a week of minutes ~10080)
+SENSOR_ROLLUP_MAX_BUCKETS = int(os.getenv("SENSOR_ROLLUP_MAX_BUCKETS", "5000"))
+
+# Mongo cursor batch size for streamed history exports (/export)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Apply database/indexes.py at startup (also: python -m database.indexes)
+INDEX_BOOTSTRAP_ON_STARTUP = os.getenv("INDEX_BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+# Log COLLSCAN / in-memory SORT query plans after bootstrapping
+INDEX_REPORT_ON_STARTUP = os.getenv("INDEX_REPORT_ON_STARTUP", "false").lower() == "true"
+
+# =========================
+# PREDICTION CACHE
+# =========================
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_MAX_SIZE = int(os.getenv("PREDICTION_CACHE_MAX_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = int(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+
+# Decimal places the sensor pipeline rounds readings to (cache key and
+# model input); API calls are keyed and evaluated on their exact inputs
+PREDICTION_CACHE_PRECISION = {
+    "ph": int(os.getenv("PREDICTION_CACHE_PH_DECIMALS", "2")),
+    "turbidity": int(os.getenv("PREDICTION_CACHE_TURBIDITY_DECIMALS", "2")),
+    "conductivity": int(os.getenv("PREDICTION_CACHE_CONDUCTIVITY_DECIMALS", "1"))
+}
+
 # =========================
 # JWT CONFIG
 # =========================
@@ -108,6 +223,9 @@ CLASSIFICATION_FEATURE_ORDER_PATH = os.path.join(
     MODELS_DIR, "Classification", "rf_feature_order.pkl"
 )
 
+# Largest list accepted by POST /classify/batch (one model call + one insert_many)
+CLASSIFY_BATCH_MAX_SIZE = int(os.getenv("CLASSIFY_BATCH_MAX_SIZE", "1000"))
+
 # -------- Advance-Regression-Models --------
 Advance_Regression_MODEL_PATH = os.path.join(
     MODELS_DIR, "AdvaceRegression", "alum_dosage_model.pkl"
@@ -132,3 +250,78 @@ NORMAL_Regression_FEATURE_PATH = os.path.join(
 # NORMAL_Regression_Explainer_PATH = os.path.join(
 #     MODELS_DIR, "Regression", "shap_explainer.pkl"
 # )
+
+# -------- Loading strategy --------
+# "warmup" = load in a background thread at startup (default)
+# "lazy"   = load each group on first use only
+# "eager"  = load everything before serving (fail fast)
+MODEL_LOADING_MODE = os.getenv("MODEL_LOADING_MODE", "warmup")
+
+# Also build the SHAP explainers during warm-up / eager load
+MODEL_WARMUP_EXPLAINERS = os.getenv("MODEL_WARMUP_EXPLAINERS", "true").lower() == "true"
+
+# -------- Dose lookup tables --------
+# Precomputed (dose x pH x turbidity x conductivity) grids used for
+# dose-only (explain=false) predictions; readings outside the grid,
+# stale tables and tables over the error budget fall back to the model.
+DOSE_LOOKUP_ENABLED = os.getenv("DOSE_LOOKUP_ENABLED", "false").lower() == "true"
+DOSE_LOOKUP_DIR = os.getenv("DOSE_LOOKUP_DIR", os.path.join(MODELS_DIR, "lookup"))
+
+# (lower, upper, step) per axis
+DOSE_LOOKUP_GRID = {
+    "ph": (4.0, 10.0, 0.05),
+    "turbidity": (0.0, 300.0, 2.0),
+    "conductivity": (0.0, 600.0, 10.0)
+}
+
+# Largest accepted |table - model| on random validation readings
+# (pH units for pre/post lime, NTU for normal regression)
+DOSE_LOOKUP_MAX_ERROR = {
+    "pre_lime": float(os.getenv("DOSE_LOOKUP_MAX_ERROR_PRE_LIME", "0.02")),
+    "post_lime": float(os.getenv("DOSE_LOOKUP_MAX_ERROR_POST_LIME", "0.02")),
+    "normal_regression": float(os.getenv("DOSE_LOOKUP_MAX_ERROR_NORMAL_REGRESSION", "0.5"))
+}
+DOSE_LOOKUP_VALIDATION_SAMPLES = int(os.getenv("DOSE_LOOKUP_VALIDATION_SAMPLES", "20000"))
+
+# Build missing / stale tables in a background thread at startup
+DOSE_LOOKUP_BUILD_ON_STARTUP = os.getenv("DOSE_LOOKUP_BUILD_ON_STARTUP", "false").lower() == "true"
+
+# -------- Tree inference backend --------
+# Per model: "sklearn" = the pickled model's own predict (default),
+# "numpy" / "numba" = flattened tree arrays with a vectorized NumPy or
+# numba-compiled traversal (numba falls back to NumPy if not installed).
+# A converted model is only used if it matches the original within
+# TREE_INFERENCE_TOLERANCE on validation rows; SHAP always uses the original.
+TREE_INFERENCE_BACKEND = {
+    "pre_lime": os.getenv("TREE_BACKEND_PRE_LIME", "sklearn"),
+    "post_lime": os.getenv("TREE_BACKEND_POST_LIME", "sklearn"),
+    "classification": os.getenv("TREE_BACKEND_CLASSIFICATION", "sklearn"),
+    "advance_regression": os.getenv("TREE_BACKEND_ADVANCE_REGRESSION", "sklearn"),
+    "normal_regression": os.getenv("TREE_BACKEND_NORMAL_REGRESSION", "sklearn")
+}
+TREE_INFERENCE_TOLERANCE = float(os.getenv("TREE_INFERENCE_TOLERANCE", "1e-6"))
+TREE_INFERENCE_VALIDATION_ROWS = int(os.getenv("TREE_INFERENCE_VALIDATION_ROWS", "1000"))
+
+# -------- Async (ASGI) serving --------
+# hypercorn asgi_app:app --bind 0.0.0.0:5001
+# Prediction endpoints run in the "ml" executor, every other Flask view
+# in the "io" executor; MAX_PENDING caps queued + running jobs per executor.
+ASYNC_ML_WORKERS = int(os.getenv("ASYNC_ML_WORKERS", str(os.cpu_count() or 2)))
+ASYNC_ML_MAX_PENDING = int(os.getenv("ASYNC_ML_MAX_PENDING", "64"))
+ASYNC_IO_WORKERS = int(os.getenv("ASYNC_IO_WORKERS", "32"))
+ASYNC_IO_MAX_PENDING = int(os.getenv("ASYNC_IO_MAX_PENDING", "512"))
+
+# -------- Production server (gunicorn.conf.py) --------
+# gunicorn wsgi:app — models are preloaded in the master and shared
+# copy-on-write by the forked workers.
+GUNICORN_BIND = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", str(os.cpu_count() or 2)))
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "4"))
+GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# 0 = never recycle workers
+GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+
+# Exactly one server worker runs the sensor scheduler / explanation
+# workers: the one holding an exclusive lock on this file.
+BACKGROUND_LOCK_PATH = os.getenv("BACKGROUND_LOCK_PATH", "/tmp/water-quality-background.lock")
+BACKGROUND_LEADER_RETRY_SECONDS = int(os.getenv("BACKGROUND_LEADER_RETRY_SECONDS", "10"))
@@ -0,0 +1,122 @@
+from pymongo import ASCENDING
+
+from database.async_mongo import get_async_database
+from database.keyset_pagination import find_page_async
+from database.field_profiles import build_projection
+from database.sensor_auto_history_repository import (
+    AUTO_HISTORY_SOURCES,
+    serialize_mongo_document
+)
+import config
+
+# Async twins of the history reads used by the dashboards; same queries,
+# projections and serialization as the sync repositories.
+
+
+# =========================
+# MANUAL PREDICTION HISTORY
+# =========================
+
+async def fetch_history_async(collection_name: str, start_date=None, end_date=None, limit: int = 100, fields=None):
+    """
+    Async _fetch_history (database/repositories.py).
+    """
+    collection = get_async_database()[collection_name]
+
+    query = {}
+
+    if start_date and end_date:
+        query["created_at"] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    return await (
+        collection
+        .find(query, build_projection(collection_name, fields, exclude_id=True))
+        .sort("created_at", -1)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+
+
+# =========================
+# SENSOR AUTO HISTORY
+# =========================
+
+def _serialize_ids(doc):
+    # classification / normal-regression history only stringify ids
+    doc["_id"] = str(doc["_id"])
+    if "sensor_record_id" in doc:
+        doc["sensor_record_id"] = str(doc["sensor_record_id"])
+    return doc
+
+
+_AUTO_HISTORY_SERIALIZERS = {
+    "pre-lime": serialize_mongo_document,
+    "post-lime": serialize_mongo_document,
+    "classification": _serialize_ids,
+    "normal-regression": _serialize_ids
+}
+
+
+async def fetch_auto_history_async(source: str, start_date=None, end_date=None, limit=None, cursor=None, fields=None):
+    """
+    Async fetch_*_auto_history: one page, newest sensor reading first.
+    Returns (records, next_cursor).
+    """
+    collection_name, date_field = AUTO_HISTORY_SOURCES[source]
+    collection = get_async_database(config.SENSOR_DATABASE_NAME)[collection_name]
+
+    query = {}
+
+    if start_date and end_date:
+        query[date_field] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    records, next_cursor = await find_page_async(
+        collection,
+        query,
+        "sensor_created_at",
+        limit or config.SENSOR_HISTORY_PAGE_SIZE,
+        cursor,
+        projection=build_projection(
+            collection_name, fields, required=["sensor_created_at"]
+        )
+    )
+
+    serialize = _AUTO_HISTORY_SERIALIZERS[source]
+    return [serialize(r) for r in records], next_cursor
+
+
+# =========================
+# ROLLUPS
+# =========================
+
+async def fetch_rollups_async(granularity: str, model: str, start_date=None, end_date=None, limit=None):
+    """
+    Async fetch_rollups (database/sensor_rollup_repository.py).
+    """
+    collection = get_async_database(config.SENSOR_DATABASE_NAME)[
+        config.SENSOR_ROLLUP_COLLECTIONS[granularity]
+    ]
+
+    query = {"model": model}
+
+    if start_date and end_date:
+        query["bucket"] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    limit = limit or config.SENSOR_ROLLUP_MAX_BUCKETS
+
+    return await (
+        collection
+        .find(query, {"_id": 0})
+        .sort("bucket", ASCENDING)
+        .limit(limit)
+        .to_list(length=limit)
+    )
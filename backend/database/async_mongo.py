@@ -0,0 +1,46 @@
+import config
+from database.mongo import _history_client_options
+
+_async_client = None
+_async_db_cache = {}
+
+
+def get_async_client():
+    """
+    Motor client for the async (ASGI) read paths. Same options as the
+    history client: own pool, history read preference and compression.
+    Created on first use, inside the serving event loop.
+    """
+    global _async_client
+
+    if _async_client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        _async_client = AsyncIOMotorClient(
+            config.MONGODB_URI, **_history_client_options()
+        )
+        print("✅ Async MongoDB client created")
+
+    return _async_client
+
+
+def get_async_database(db_name=None):
+    """
+    Async read handle. Default = water_quality_db
+    """
+    if db_name is None:
+        db_name = config.MONGODB_DATABASE_NAME
+
+    if db_name not in _async_db_cache:
+        _async_db_cache[db_name] = get_async_client()[db_name]
+
+    return _async_db_cache[db_name]
+
+
+def close_async_client():
+    global _async_client
+
+    if _async_client is not None:
+        _async_client.close()
+        _async_client = None
+        _async_db_cache.clear()
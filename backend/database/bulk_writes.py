@@ -0,0 +1,39 @@
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def insert_many_unordered(collection, docs: list) -> dict:
+    """
+    One unordered insert_many round-trip. Duplicate-key errors (already
+    predicted sensor records) are counted instead of raised.
+
+    Returns {"inserted": n, "duplicates": n, "failed": n,
+    "error_indexes": [positions in docs that were not inserted]}.
+    """
+    if not docs:
+        return {"inserted": 0, "duplicates": 0, "failed": 0, "error_indexes": []}
+
+    try:
+        result = collection.insert_many(docs, ordered=False)
+        return {
+            "inserted": len(result.inserted_ids),
+            "duplicates": 0,
+            "failed": 0,
+            "error_indexes": []
+        }
+
+    except BulkWriteError as e:
+        details = e.details
+        write_errors = details.get("writeErrors", [])
+
+        duplicates = sum(
+            1 for err in write_errors if err.get("code") == DUPLICATE_KEY_ERROR
+        )
+
+        return {
+            "inserted": details.get("nInserted", 0),
+            "duplicates": duplicates,
+            "failed": len(write_errors) - duplicates,
+            "error_indexes": [err["index"] for err in write_errors]
+        }
@@ -0,0 +1,53 @@
+from typing import Optional
+
+
+# =========================
+# CSV EXPORT COLUMNS
+# =========================
+# Top-level fields of each history collection, in a fixed order, so a
+# CSV export has the same header whatever the first document contains.
+# Nested objects (inputs, prediction, result) are written as JSON text.
+
+_SENSOR_FIELDS = ["_id", "sensor_record_id", "sensor_created_at"]
+
+_EXPLANATION_FIELDS = ["explanation_status", "explanation_error", "explained_at"]
+
+EXPORT_COLUMNS = {
+    # ---- Manual predictions (MAIN DB) ----
+    "pre_lime_predictions": ["created_at", "raw_inputs", "prediction"],
+    "post_lime_predictions": ["created_at", "raw_inputs", "prediction"],
+    "classification_predictions": ["created_at", "inputs", "result"],
+    "advance_regression_predictions": ["created_at", "inputs", "result"],
+    "normal_regression_predictions": ["created_at", "inputs", "result"],
+
+    # ---- Sensor auto predictions (SENSOR DB) ----
+    "pre_lime_auto_predictions": _SENSOR_FIELDS + [
+        "predicted_at",
+        "raw_inputs",
+        "prediction"
+    ] + _EXPLANATION_FIELDS,
+    "post_lime_auto_predictions": _SENSOR_FIELDS + [
+        "predicted_at",
+        "input_from_pre_lime",
+        "raw_inputs",
+        "prediction"
+    ] + _EXPLANATION_FIELDS,
+    "classification_auto_predictions": _SENSOR_FIELDS + [
+        "classified_at",
+        "raw_inputs",
+        "prediction"
+    ],
+    "normal_regression_auto_predictions": _SENSOR_FIELDS + [
+        "predicted_at",
+        "raw_inputs",
+        "prediction"
+    ]
+}
+
+
+def export_columns(collection_name: str, paths: Optional[list] = None) -> list:
+    """
+    CSV header for an export: the requested field paths when given,
+    otherwise the collection's fixed top-level columns.
+    """
+    return list(paths) if paths else list(EXPORT_COLUMNS[collection_name])
@@ -0,0 +1,138 @@
+import re
+
+from typing import Iterable, Optional
+
+
+# =========================
+# SUMMARY PROFILES
+# =========================
+# Chart-sized documents: timestamps, inputs, doses and predicted
+# pH / turbidity, without SHAP arrays or explanation text.
+
+_PRE_LIME_SUMMARY = [
+    "raw_inputs",
+    "prediction.recommended_dose_ppm",
+    "prediction.predicted_settled_pH",
+    "prediction.conformal_interval"
+]
+
+_POST_LIME_SUMMARY = [
+    "raw_inputs",
+    "prediction.recommended_post_lime_dose_ppm",
+    "prediction.predicted_delta_pH",
+    "prediction.predicted_final_pH_sph2",
+    "prediction.conformal_interval"
+]
+
+_SENSOR_FIELDS = ["sensor_record_id", "sensor_created_at"]
+
+SUMMARY_FIELDS = {
+    # ---- Manual predictions (MAIN DB) ----
+    "pre_lime_predictions": ["created_at"] + _PRE_LIME_SUMMARY,
+    "post_lime_predictions": ["created_at"] + _POST_LIME_SUMMARY,
+    "classification_predictions": [
+        "created_at",
+        "inputs",
+        "result.classification",
+        "result.abnormal_probability"
+    ],
+    "advance_regression_predictions": [
+        "created_at",
+        "inputs",
+        "result.predicted_alum_dosage_ppm",
+        "result.dose_range_ppm"
+    ],
+    "normal_regression_predictions": [
+        "created_at",
+        "inputs",
+        "result.recommended_dose_ppm",
+        "result.predicted_settled_turbidity",
+        "result.confidence_interval"
+    ],
+
+    # ---- Sensor auto predictions (SENSOR DB) ----
+    "pre_lime_auto_predictions": _SENSOR_FIELDS + ["predicted_at"] + _PRE_LIME_SUMMARY,
+    "post_lime_auto_predictions": _SENSOR_FIELDS + [
+        "predicted_at",
+        "input_from_pre_lime"
+    ] + _POST_LIME_SUMMARY,
+    "classification_auto_predictions": _SENSOR_FIELDS + [
+        "classified_at",
+        "raw_inputs",
+        "prediction.classification",
+        "prediction.abnormal_probability"
+    ],
+    "normal_regression_auto_predictions": _SENSOR_FIELDS + [
+        "predicted_at",
+        "raw_inputs",
+        "prediction.recommended_dose_ppm",
+        "prediction.predicted_settled_turbidity",
+        "prediction.confidence_interval"
+    ]
+}
+
+FIELD_PROFILES = ("summary", "full")
+
+_FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+
+
+# =========================
+# PROJECTION BUILDER
+# =========================
+
+def field_paths(collection_name: str, fields: Optional[str] = None) -> Optional[list]:
+    """
+    Field paths selected by a ?fields= value, in request order;
+    None for the whole document ("full").
+    """
+    profile = (fields or "full").strip()
+
+    if profile == "full":
+        return None
+
+    if profile == "summary":
+        return list(SUMMARY_FIELDS[collection_name])
+
+    paths = [p.strip() for p in profile.split(",") if p.strip()]
+
+    invalid = [p for p in paths if not _FIELD_PATH.match(p)]
+    if invalid or not paths:
+        raise ValueError(
+            f"fields must be one of {', '.join(FIELD_PROFILES)} "
+            "or a comma-separated list of field names"
+        )
+
+    return paths
+
+
+def build_projection(
+    collection_name: str,
+    fields: Optional[str] = None,
+    required: Iterable[str] = (),
+    exclude_id: bool = False
+) -> Optional[dict]:
+    """
+    Mongo projection for a ?fields= value:
+      None / "full"      → whole document (None, or {"_id": 0})
+      "summary"          → SUMMARY_FIELDS for the collection
+      "a,b.c,..."        → only those field paths
+
+    required fields (e.g. the pagination sort key) are always included.
+    """
+    paths = field_paths(collection_name, fields)
+
+    if paths is None:
+        return {"_id": 0} if exclude_id else None
+
+    paths += [p for p in required if p not in paths]
+
+    # "a" already covers "a.b"; Mongo rejects overlapping paths
+    projection = {
+        path: 1 for path in paths
+        if not any(path.startswith(other + ".") for other in paths)
+    }
+
+    if exclude_id:
+        projection["_id"] = 0
+
+    return projection
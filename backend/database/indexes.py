@@ -0,0 +1,245 @@
+import argparse
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database.mongo import get_database
+import config
+
+# Database keys used in the registry
+MAIN_DB = "main"
+SENSOR_DB = "sensor"
+
+_AUTO_PREDICTION_COLLECTIONS = [
+    "pre_lime_auto_predictions",
+    "post_lime_auto_predictions",
+    "classification_auto_predictions",
+    "normal_regression_auto_predictions"
+]
+
+_EXPLAINED_AUTO_COLLECTIONS = [
+    "pre_lime_auto_predictions",
+    "post_lime_auto_predictions",
+    "normal_regression_auto_predictions"
+]
+
+_MANUAL_PREDICTION_COLLECTIONS = [
+    "pre_lime_predictions",
+    "post_lime_predictions",
+    "classification_predictions",
+    "advance_regression_predictions",
+    "normal_regression_predictions"
+]
+
+
+# =========================
+# INDEX REGISTRY
+# =========================
+# (database key, collection) -> indexes. Names are left to Mongo's
+# default ("field_1_other_-1") so re-applying is a no-op.
+
+def index_registry() -> dict:
+    registry = {}
+
+    # ---- Manual predictions: created_at range + sort (history, export) ----
+    for name in _MANUAL_PREDICTION_COLLECTIONS:
+        registry[(MAIN_DB, name)] = [IndexModel([("created_at", DESCENDING)])]
+
+    # ---- Users: login lookup ----
+    registry[(MAIN_DB, "users")] = [IndexModel([("email", ASCENDING)], unique=True)]
+
+    # ---- Raw sensor readings: latest window + (createdAt, _id) watermark scan ----
+    registry[(SENSOR_DB, config.SENSOR_COLLECTION_NAME)] = [
+        IndexModel([("createdAt", ASCENDING), ("_id", ASCENDING)])
+    ]
+
+    registry[(SENSOR_DB, config.SENSOR_PREDICTION_COLLECTION)] = [
+        IndexModel([("sensor_record_id", ASCENDING)], unique=True)
+    ]
+
+    # ---- Auto predictions ----
+    for name in _AUTO_PREDICTION_COLLECTIONS:
+        registry[(SENSOR_DB, name)] = [
+            # dedup + "already predicted" $in lookups
+            IndexModel([("sensor_record_id", ASCENDING)], unique=True),
+            # keyset pagination / export order
+            IndexModel([("sensor_created_at", DESCENDING), ("_id", DESCENDING)])
+        ]
+
+    for name in _EXPLAINED_AUTO_COLLECTIONS:
+        # explanation worker queue; only pending documents are indexed
+        registry[(SENSOR_DB, name)].append(IndexModel(
+            [("explanation_status", ASCENDING), ("_id", ASCENDING)],
+            partialFilterExpression={"explanation_status": "pending"}
+        ))
+
+    # ---- Catch-up jobs: at most one running ----
+    registry[(SENSOR_DB, config.SENSOR_CATCH_UP_JOB_COLLECTION)] = [
+        IndexModel(
+            [("status", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"status": "running"}
+        )
+    ]
+
+    # ---- Rollups: one bucket per (model, bucket start) ----
+    for name in config.SENSOR_ROLLUP_COLLECTIONS.values():
+        registry[(SENSOR_DB, name)] = [
+            IndexModel([("model", ASCENDING), ("bucket", ASCENDING)], unique=True)
+        ]
+
+    return registry
+
+
+def _get_db(db_key: str):
+    if db_key == SENSOR_DB:
+        return get_database(config.SENSOR_DATABASE_NAME)
+    return get_database()
+
+
+def ensure_indexes() -> dict:
+    """
+    Create every registered index. Existing identical indexes are left
+    alone; conflicts (e.g. duplicate keys for a unique index) are
+    reported instead of aborting startup.
+    """
+    created = 0
+    failed = []
+
+    for (db_key, collection_name), indexes in index_registry().items():
+        collection = _get_db(db_key)[collection_name]
+
+        for index in indexes:
+            try:
+                collection.create_indexes([index])
+                created += 1
+            except OperationFailure as e:
+                failed.append({
+                    "collection": collection_name,
+                    "index": index.document["name"],
+                    "error": str(e)
+                })
+                print(f"❌ Index {collection_name}.{index.document['name']} failed → {e}")
+
+    print(f"✅ Indexes ensured ({created} ok, {len(failed)} failed)")
+    return {"ensured": created, "failed": failed}
+
+
+# =========================
+# QUERY PLAN REPORT
+# =========================
+
+def query_shapes() -> list:
+    """
+    Representative (label, database key, collection, filter, sort) for
+    every history / pipeline query in database/ and services/.
+    """
+    now = datetime.utcnow()
+    window = {"$gte": now - timedelta(days=30), "$lte": now}
+
+    shapes = [
+        (f"{name} history", MAIN_DB, name, {"created_at": window}, [("created_at", -1)])
+        for name in _MANUAL_PREDICTION_COLLECTIONS
+    ]
+
+    shapes += [
+        ("latest sensor window", SENSOR_DB, config.SENSOR_COLLECTION_NAME, {}, [("createdAt", -1)]),
+        (
+            "sensor records after watermark", SENSOR_DB, config.SENSOR_COLLECTION_NAME,
+            {"createdAt": {"$gt": now - timedelta(days=1)}},
+            [("createdAt", 1), ("_id", 1)]
+        )
+    ]
+
+    for name in _AUTO_PREDICTION_COLLECTIONS:
+        shapes.append((
+            f"{name} history", SENSOR_DB, name,
+            {"sensor_created_at": window},
+            [("sensor_created_at", -1), ("_id", -1)]
+        ))
+
+    for name in _EXPLAINED_AUTO_COLLECTIONS:
+        shapes.append((
+            f"{name} pending explanations", SENSOR_DB, name,
+            {"explanation_status": "pending"},
+            [("_id", 1)]
+        ))
+
+    for granularity, name in config.SENSOR_ROLLUP_COLLECTIONS.items():
+        shapes.append((
+            f"{granularity} rollups", SENSOR_DB, name,
+            {"model": "pre_lime", "bucket": window},
+            [("bucket", 1)]
+        ))
+
+    return shapes
+
+
+def _plan_stages(plan) -> list:
+    stages = []
+
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += _plan_stages(value)
+
+    elif isinstance(plan, list):
+        for item in plan:
+            stages += _plan_stages(item)
+
+    return stages
+
+
+def query_plan_report() -> list:
+    """
+    Winning plan of every query shape; flags COLLSCAN and in-memory SORT.
+    """
+    report = []
+
+    for label, db_key, collection_name, query, sort in query_shapes():
+        collection = _get_db(db_key)[collection_name]
+
+        try:
+            explain = collection.find(query).sort(sort).limit(1).explain()
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        except OperationFailure as e:
+            report.append({"query": label, "collection": collection_name, "error": str(e)})
+            continue
+
+        report.append({
+            "query": label,
+            "collection": collection_name,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages
+        })
+
+    return report
+
+
+def print_query_plan_report(report: list):
+    for entry in report:
+        if "error" in entry:
+            print(f"❌ {entry['query']}: {entry['error']}")
+        elif entry["collscan"] or entry["in_memory_sort"]:
+            print(f"⚠️ {entry['query']}: {' → '.join(entry['stages'])}")
+        else:
+            print(f"✅ {entry['query']}: {' → '.join(entry['stages'])}")
+
+
+# =========================
+# CLI
+# =========================
+# python -m database.indexes [--report-only]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ensure MongoDB indexes")
+    parser.add_argument("--report-only", action="store_true")
+    args = parser.parse_args()
+
+    if not args.report_only:
+        ensure_indexes()
+
+    print_query_plan_report(query_plan_report())
@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+# =========================
+# CURSOR ENCODING
+# =========================
+
+def encode_cursor(sort_value, doc_id) -> str:
+    """
+    Opaque cursor for the (sort_value, _id) position of the last
+    document on a page.
+    """
+    payload = {
+        "t": sort_value.isoformat() if isinstance(sort_value, datetime) else None,
+        "id": str(doc_id)
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    (sort_value, ObjectId) from a cursor created by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+        sort_value = payload["t"]
+        if sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+
+        return sort_value, ObjectId(payload["id"])
+
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+# =========================
+# PAGED QUERY
+# =========================
+
+def _before_position_query(sort_field: str, sort_value, doc_id) -> dict:
+    # Newest first: next page = strictly "older" than the last (sort_value, _id)
+    if sort_value is None:
+        return {sort_field: None, "_id": {"$lt": doc_id}}
+
+    return {
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "_id": {"$lt": doc_id}},
+            {sort_field: None}
+        ]
+    }
+
+
+def _page_query(query: dict, sort_field: str, cursor: str = None) -> dict:
+    if not cursor:
+        return query
+
+    sort_value, doc_id = decode_cursor(cursor)
+    return {"$and": [query, _before_position_query(sort_field, sort_value, doc_id)]}
+
+
+def _split_page(documents: list, sort_field: str, page_size: int):
+    if len(documents) <= page_size:
+        return documents, None
+
+    documents = documents[:page_size]
+    last = documents[-1]
+    return documents, encode_cursor(last.get(sort_field), last["_id"])
+
+
+def find_page(collection, query: dict, sort_field: str, page_size: int, cursor: str = None, projection=None):
+    """
+    One page of documents sorted by (sort_field, _id) descending.
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+
+    Uses keyset pagination (no skip), so every page costs the same
+    regardless of depth when (sort_field, _id) is indexed.
+    """
+    documents = list(
+        collection
+        .find(_page_query(query, sort_field, cursor), projection)
+        .sort([(sort_field, -1), ("_id", -1)])
+        .limit(page_size + 1)
+    )
+
+    return _split_page(documents, sort_field, page_size)
+
+
+async def find_page_async(collection, query: dict, sort_field: str, page_size: int, cursor: str = None, projection=None):
+    """
+    find_page for an async (Motor) collection.
+    """
+    documents = await (
+        collection
+        .find(_page_query(query, sort_field, cursor), projection)
+        .sort([(sort_field, -1), ("_id", -1)])
+        .limit(page_size + 1)
+        .to_list(length=page_size + 1)
+    )
+
+    return _split_page(documents, sort_field, page_size)
@@ -1,41 +1,137 @@
+import threading
+import time
+
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
+from database.pool_monitor import POOL_STATS, HISTORY_POOL_STATS
 import config
 
 _client = None
+_history_client = None
+_client_lock = threading.Lock()
 _db_cache = {}
 
 
+def _client_options() -> dict:
+    options = {
+        "serverSelectionTimeoutMS": config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "maxPoolSize": config.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGODB_MIN_POOL_SIZE,
+        "readPreference": config.MONGODB_READ_PREFERENCE,
+        "event_listeners": [POOL_STATS]
+    }
+
+    if config.MONGODB_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = config.MONGODB_MAX_IDLE_TIME_MS
+
+    if config.MONGODB_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = config.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+
+    if config.MONGODB_COMPRESSORS:
+        options["compressors"] = config.MONGODB_COMPRESSORS
+
+    return options
+
+
+def _history_client_options() -> dict:
+    options = _client_options()
+    options["maxPoolSize"] = config.MONGODB_HISTORY_MAX_POOL_SIZE
+    options["minPoolSize"] = 0
+    options["readPreference"] = config.MONGODB_HISTORY_READ_PREFERENCE
+    options["event_listeners"] = [HISTORY_POOL_STATS]
+    options.pop("compressors", None)
+
+    if config.MONGODB_HISTORY_COMPRESSORS:
+        options["compressors"] = config.MONGODB_HISTORY_COMPRESSORS
+
+    return options
+
+
+def _connect(options: dict, label: str):
+    try:
+        client = MongoClient(config.MONGODB_URI, **options)
+        client.admin.command("ping")
+        print(f"✅ MongoDB connection established ({label})")
+        return client
+    except ConnectionFailure as e:
+        print(f"❌ MongoDB connection failed ({label})")
+        raise e
+
+
 def get_mongo_client():
     global _client
 
-    if _client is None:
-        try:
-            _client = MongoClient(
-                config.MONGODB_URI,
-                serverSelectionTimeoutMS=5000
-            )
-            _client.admin.command("ping")
-            print("✅ MongoDB connection established")
-        except ConnectionFailure as e:
-            print("❌ MongoDB connection failed")
-            raise e
+    if _client is not None:
+        return _client
+
+    # Request threads and the scheduler may race here on startup
+    with _client_lock:
+        if _client is None:
+            _client = _connect(_client_options(), "primary")
 
     return _client
 
 
-def get_database(db_name=None):
+def get_history_client():
+    """
+    Separate client for history / export reads: own pool,
+    MONGODB_HISTORY_READ_PREFERENCE and wire compression.
+    """
+    global _history_client
+
+    if _history_client is not None:
+        return _history_client
+
+    with _client_lock:
+        if _history_client is None:
+            _history_client = _connect(_history_client_options(), "history reads")
+
+    return _history_client
+
+
+def get_database(db_name=None, history=False):
     """
     Returns requested database.
     Default = water_quality_db
+
+    history=True returns a read handle on the history client; use it
+    only for reads that tolerate replication lag (dashboards, exports).
     """
 
-    client = get_mongo_client()
+    client = get_history_client() if history else get_mongo_client()
 
     if db_name is None:
         db_name = config.MONGODB_DATABASE_NAME
 
-    if db_name not in _db_cache:
-        _db_cache[db_name] = client[db_name]
+    key = (db_name, history)
+    if key not in _db_cache:
+        _db_cache[key] = client[db_name]
+
+    return _db_cache[key]
+
 
-    return _db_cache[db_name]
\ No newline at end of file
+def close_mongo_clients():
+    """
+    Close both clients and forget cached handles; the next
+    get_database() reconnects. MongoClient is not fork-safe, so a
+    process that forks workers calls this before forking.
+    """
+    global _client, _history_client
+
+    with _client_lock:
+        for client in (_client, _history_client):
+            if client is not None:
+                client.close()
+
+        _client = None
+        _history_client = None
+        _db_cache.clear()
+
+
+def ping_latency_ms() -> float:
+    """
+    Round-trip time of a ping through the shared pool.
+    """
+    started = time.perf_counter()
+    get_mongo_client().admin.command("ping")
+    return round((time.perf_counter() - started) * 1000, 3)
@@ -1,11 +1,17 @@
 from database.mongo import get_database
+from database.keyset_pagination import find_page
+from database.field_profiles import build_projection
 import config
 
 COLLECTION_NAME = "normal_regression_auto_predictions"
 
 
-def fetch_normal_regression_auto_history(start_date=None, end_date=None):
-    db = get_database(config.SENSOR_DATABASE_NAME)
+def fetch_normal_regression_auto_history(start_date=None, end_date=None, limit=None, cursor=None, fields=None):
+    """
+    One page, newest sensor reading first.
+    Returns (records, next_cursor).
+    """
+    db = get_database(config.SENSOR_DATABASE_NAME, history=True)
     collection = db[COLLECTION_NAME]
 
     query = {}
@@ -16,13 +22,20 @@ def fetch_normal_regression_auto_history(start_date=None, end_date=None):
             "$lte": end_date
         }
 
-    data = list(
-        collection.find(query)
-        .sort("sensor_created_at", -1)
+    data, next_cursor = find_page(
+        collection,
+        query,
+        "sensor_created_at",
+        limit or config.SENSOR_HISTORY_PAGE_SIZE,
+        cursor,
+        projection=build_projection(
+            COLLECTION_NAME, fields, required=["sensor_created_at"]
+        )
     )
 
     for d in data:
         d["_id"] = str(d["_id"])
-        d["sensor_record_id"] = str(d["sensor_record_id"])
+        if "sensor_record_id" in d:
+            d["sensor_record_id"] = str(d["sensor_record_id"])
 
-    return data
\ No newline at end of file
+    return data, next_cursor
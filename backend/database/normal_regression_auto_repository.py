@@ -1,4 +1,6 @@
 from database.mongo import get_database
+from database.bulk_writes import insert_many_unordered
+from database.prediction_lookup import find_predicted_sensor_ids
 import config
 
 COLLECTION_NAME = "normal_regression_auto_predictions"
@@ -14,8 +16,18 @@ def save_normal_regression_auto_prediction(data: dict):
     return collection.insert_one(data).inserted_id
 
 
-def is_normal_regression_predicted(sensor_record_id):
+def save_normal_regression_auto_predictions(docs: list) -> dict:
+    """
+    Bulk save; already-predicted sensor records are counted as duplicates.
+    """
+    collection = get_collection()
+    return insert_many_unordered(collection, docs)
+
+
+def get_normal_regression_predicted_ids(sensor_record_ids) -> set:
     collection = get_collection()
-    return collection.find_one(
-        {"sensor_record_id": sensor_record_id}
-    ) is not None
\ No newline at end of file
+    return find_predicted_sensor_ids(collection, sensor_record_ids)
+
+
+def is_normal_regression_predicted(sensor_record_id):
+    return sensor_record_id in get_normal_regression_predicted_ids([sensor_record_id])
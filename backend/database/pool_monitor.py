@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+from pymongo import monitoring
+
+import config
+
+
+class _ServerPoolStats:
+    def __init__(self, window: int):
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.pool_clears = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.recent_waits_ms = deque(maxlen=window)
+
+    def as_dict(self) -> dict:
+        waits = sorted(self.recent_waits_ms)
+
+        def percentile(p):
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3)
+
+        return {
+            "open_connections": self.open_connections,
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "checkouts": self.checkouts,
+            "checkout_failures": dict(self.checkout_failures),
+            "pool_clears": self.pool_clears,
+            "wait_ms": {
+                "mean": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(self.max_wait_ms, 3)
+            }
+        }
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    CMAP listener that keeps per-server pool counters and checkout wait
+    times. Checkout start/finish happen on the requesting thread, so the
+    start time is kept in a thread-local.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._window = window
+        self._servers = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _server(self, address) -> _ServerPoolStats:
+        key = f"{address[0]}:{address[1]}"
+        stats = self._servers.get(key)
+        if stats is None:
+            stats = self._servers[key] = _ServerPoolStats(self._window)
+        return stats
+
+    # ---- Pool ----
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event.address).pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    # ---- Connections ----
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address).open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._server(event.address).open_connections -= 1
+
+    # ---- Checkout ----
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            failures = self._server(event.address).checkout_failures
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        wait_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+
+        with self._lock:
+            stats = self._server(event.address)
+            stats.checked_out += 1
+            stats.max_checked_out = max(stats.max_checked_out, stats.checked_out)
+            stats.checkouts += 1
+            stats.total_wait_ms += wait_ms
+            stats.max_wait_ms = max(stats.max_wait_ms, wait_ms)
+            stats.recent_waits_ms.append(wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._server(event.address).checked_out -= 1
+
+    # ---- Read ----
+    def stats(self) -> dict:
+        with self._lock:
+            return {key: s.as_dict() for key, s in self._servers.items()}
+
+
+POOL_STATS = PoolStatsListener(window=config.MONGODB_POOL_STATS_WINDOW)
+HISTORY_POOL_STATS = PoolStatsListener(window=config.MONGODB_POOL_STATS_WINDOW)
+
+
+def pool_settings() -> dict:
+    return {
+        "max_pool_size": config.MONGODB_MAX_POOL_SIZE,
+        "min_pool_size": config.MONGODB_MIN_POOL_SIZE,
+        "max_idle_time_ms": config.MONGODB_MAX_IDLE_TIME_MS or None,
+        "wait_queue_timeout_ms": config.MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+        "compressors": config.MONGODB_COMPRESSORS or None,
+        "read_preference": config.MONGODB_READ_PREFERENCE,
+        "history": {
+            "max_pool_size": config.MONGODB_HISTORY_MAX_POOL_SIZE,
+            "compressors": config.MONGODB_HISTORY_COMPRESSORS or None,
+            "read_preference": config.MONGODB_HISTORY_READ_PREFERENCE
+        }
+    }
@@ -0,0 +1,23 @@
+# Max ids per $in query, keeps each query document well under 16MB
+LOOKUP_CHUNK_SIZE = 10000
+
+
+def find_predicted_sensor_ids(collection, sensor_record_ids) -> set:
+    """
+    Set-based "already predicted" check: one $in query (per chunk)
+    instead of a find_one per sensor record. Covered by the unique
+    sensor_record_id index.
+    """
+    sensor_record_ids = list(sensor_record_ids)
+    predicted = set()
+
+    for i in range(0, len(sensor_record_ids), LOOKUP_CHUNK_SIZE):
+        chunk = sensor_record_ids[i:i + LOOKUP_CHUNK_SIZE]
+
+        cursor = collection.find(
+            {"sensor_record_id": {"$in": chunk}},
+            {"sensor_record_id": 1, "_id": 0}
+        )
+        predicted.update(doc["sensor_record_id"] for doc in cursor)
+
+    return predicted
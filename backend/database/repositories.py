@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from database.mongo import get_database
+from database.field_profiles import build_projection
 
 
 # =========================
@@ -14,6 +15,15 @@ CLASSIFICATION_COLLECTION = "classification_predictions"
 ADVANCE_REGRESSION_COLLECTION = "advance_regression_predictions"
 NORMAL_REGRESSION_COLLECTION = "normal_regression_predictions"
 
+# URL name -> collection, for the history export endpoint
+HISTORY_COLLECTIONS = {
+    "pre-lime": PRE_LIME_COLLECTION,
+    "post-lime": POST_LIME_COLLECTION,
+    "classification": CLASSIFICATION_COLLECTION,
+    "advance-regression": ADVANCE_REGRESSION_COLLECTION,
+    "normal-regression": NORMAL_REGRESSION_COLLECTION
+}
+
 
 # =========================
 # GENERIC SAVE HELPER
@@ -29,6 +39,21 @@ def _save_record(collection_name: str, record: dict) -> str:
     return str(result.inserted_id)
 
 
+def _save_records(collection_name: str, records: List[dict]) -> List[str]:
+    if not records:
+        return []
+
+    db = get_database()
+    collection = db[collection_name]
+
+    created_at = datetime.utcnow()
+    for record in records:
+        record["created_at"] = created_at
+
+    result = collection.insert_many(records)
+    return [str(_id) for _id in result.inserted_ids]
+
+
 # =========================
 # SAVE FUNCTIONS
 # =========================
@@ -45,6 +70,10 @@ def save_classification_prediction(record: dict) -> str:
     return _save_record(CLASSIFICATION_COLLECTION, record)
 
 
+def save_classification_predictions(records: List[dict]) -> List[str]:
+    return _save_records(CLASSIFICATION_COLLECTION, records)
+
+
 def save_advance_regression_prediction(record: dict) -> str:
     return _save_record(ADVANCE_REGRESSION_COLLECTION, record)
 
@@ -61,9 +90,10 @@ def _fetch_history(
     collection_name: str,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
-    db = get_database()
+    db = get_database(history=True)
     collection = db[collection_name]
 
     query = {}
@@ -76,7 +106,7 @@ def _fetch_history(
 
     records = (
         collection
-        .find(query, {"_id": 0})
+        .find(query, build_projection(collection_name, fields, exclude_id=True))
         .sort("created_at", -1)
         .limit(limit)
     )
@@ -84,6 +114,40 @@ def _fetch_history(
     return list(records)
 
 
+def iter_history(
+    collection_name: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = 1000,
+    fields: Optional[str] = None
+):
+    """
+    Unbounded, oldest-first cursor for exports. Documents are fetched
+    from the server batch_size at a time as the cursor is consumed.
+    """
+    db = get_database(history=True)
+    collection = db[collection_name]
+
+    query = {}
+
+    if start_date and end_date:
+        query["created_at"] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    return (
+        collection
+        .find(
+            query,
+            build_projection(collection_name, fields, exclude_id=True),
+            allow_disk_use=True
+        )
+        .sort("created_at", 1)
+        .batch_size(batch_size)
+    )
+
+
 # =========================
 # FETCH HISTORY FUNCTIONS
 # =========================
@@ -91,48 +155,53 @@ def _fetch_history(
 def fetch_pre_lime_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
     return _fetch_history(
-        PRE_LIME_COLLECTION, start_date, end_date, limit
+        PRE_LIME_COLLECTION, start_date, end_date, limit, fields
     )
 
 
 def fetch_post_lime_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
     return _fetch_history(
-        POST_LIME_COLLECTION, start_date, end_date, limit
+        POST_LIME_COLLECTION, start_date, end_date, limit, fields
     )
 
 
 def fetch_classification_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
     return _fetch_history(
-        CLASSIFICATION_COLLECTION, start_date, end_date, limit
+        CLASSIFICATION_COLLECTION, start_date, end_date, limit, fields
     )
 
 
 def fetch_advance_regression_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
     return _fetch_history(
-        ADVANCE_REGRESSION_COLLECTION, start_date, end_date, limit
+        ADVANCE_REGRESSION_COLLECTION, start_date, end_date, limit, fields
     )
 
 
 def fetch_normal_regression_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = None
 ):
     return _fetch_history(
-        NORMAL_REGRESSION_COLLECTION, start_date, end_date, limit
+        NORMAL_REGRESSION_COLLECTION, start_date, end_date, limit, fields
     )
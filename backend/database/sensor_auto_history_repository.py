@@ -1,7 +1,21 @@
 from database.mongo import get_database
+from database.keyset_pagination import find_page
+from database.field_profiles import build_projection
 import config
 
 
+# URL name -> (collection, date filter field), for the export endpoint.
+# Every source filters on the sensor reading time, the same field the
+# pages are keyset-sorted on, so one (sensor_created_at, _id) index
+# serves both.
+AUTO_HISTORY_SOURCES = {
+    "pre-lime": ("pre_lime_auto_predictions", "sensor_created_at"),
+    "post-lime": ("post_lime_auto_predictions", "sensor_created_at"),
+    "classification": ("classification_auto_predictions", "sensor_created_at"),
+    "normal-regression": ("normal_regression_auto_predictions", "sensor_created_at")
+}
+
+
 def serialize_mongo_document(doc):
     """
     Convert MongoDB ObjectId and datetime to JSON serializable format
@@ -23,50 +37,99 @@ def serialize_mongo_document(doc):
 # ======================================
 # PRE-LIME HISTORY
 # ======================================
-def fetch_pre_lime_auto_history(start_date=None, end_date=None, limit=500):
+def fetch_pre_lime_auto_history(start_date=None, end_date=None, limit=None, cursor=None, fields=None):
+    """
+    One page, newest sensor reading first.
+    Returns (records, next_cursor).
+    """
 
-    db = get_database(config.SENSOR_DATABASE_NAME)
+    db = get_database(config.SENSOR_DATABASE_NAME, history=True)
     collection = db["pre_lime_auto_predictions"]
 
     query = {}
 
     if start_date and end_date:
-        query["predicted_at"] = {
+        query["sensor_created_at"] = {
             "$gte": start_date,
             "$lte": end_date
         }
 
-    records = (
-        collection
-        .find(query)
-        .sort("predicted_at", -1)
-        .limit(limit)
+    records, next_cursor = find_page(
+        collection,
+        query,
+        "sensor_created_at",
+        limit or config.SENSOR_HISTORY_PAGE_SIZE,
+        cursor,
+        projection=build_projection(
+            collection.name, fields, required=["sensor_created_at"]
+        )
     )
 
-    return [serialize_mongo_document(r) for r in records]
+    return [serialize_mongo_document(r) for r in records], next_cursor
 
 
 # ======================================
 # POST-LIME HISTORY
 # ======================================
-def fetch_post_lime_auto_history(start_date=None, end_date=None, limit=500):
+def fetch_post_lime_auto_history(start_date=None, end_date=None, limit=None, cursor=None, fields=None):
+    """
+    One page, newest sensor reading first.
+    Returns (records, next_cursor).
+    """
 
-    db = get_database(config.SENSOR_DATABASE_NAME)
+    db = get_database(config.SENSOR_DATABASE_NAME, history=True)
     collection = db["post_lime_auto_predictions"]
 
     query = {}
 
     if start_date and end_date:
-        query["predicted_at"] = {
+        query["sensor_created_at"] = {
             "$gte": start_date,
             "$lte": end_date
         }
 
-    records = (
-        collection
-        .find(query)
-        .sort("predicted_at", -1)
-        .limit(limit)
+    records, next_cursor = find_page(
+        collection,
+        query,
+        "sensor_created_at",
+        limit or config.SENSOR_HISTORY_PAGE_SIZE,
+        cursor,
+        projection=build_projection(
+            collection.name, fields, required=["sensor_created_at"]
+        )
     )
 
-    return [serialize_mongo_document(r) for r in records]
\ No newline at end of file
+    return [serialize_mongo_document(r) for r in records], next_cursor
+
+
+# ======================================
+# EXPORT (STREAMED)
+# ======================================
+def iter_auto_history(source: str, start_date=None, end_date=None, batch_size=1000, fields=None):
+    """
+    Unbounded, oldest-first cursor over one auto-prediction collection.
+    Documents are fetched batch_size at a time as the cursor is consumed.
+    """
+    collection_name, date_field = AUTO_HISTORY_SOURCES[source]
+
+    db = get_database(config.SENSOR_DATABASE_NAME, history=True)
+    collection = db[collection_name]
+
+    query = {}
+
+    if start_date and end_date:
+        query[date_field] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    return (
+        collection
+        .find(
+            query,
+            build_projection(collection_name, fields),
+            allow_disk_use=True
+        )
+        .sort([("sensor_created_at", 1), ("_id", 1)])
+        .batch_size(batch_size)
+    )
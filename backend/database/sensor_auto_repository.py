@@ -1,5 +1,6 @@
 from datetime import datetime
 from database.mongo import get_database
+from database.prediction_lookup import find_predicted_sensor_ids
 import config
 
 
@@ -21,19 +22,15 @@ def get_recent_unpredicted_sensor_records(limit_window=8000, batch_size=200):
         .limit(limit_window)
     )
 
-    unpredicted = []
-
-    for doc in recent_records:
-        exists = prediction_collection.find_one(
-            {"sensor_record_id": doc["_id"]},
-            {"_id": 1}
-        )
-
-        if not exists:
-            unpredicted.append(doc)
+    predicted_ids = find_predicted_sensor_ids(
+        prediction_collection,
+        [doc["_id"] for doc in recent_records]
+    )
 
-        if len(unpredicted) >= batch_size:
-            break
+    unpredicted = [
+        doc for doc in recent_records
+        if doc["_id"] not in predicted_ids
+    ][:batch_size]
 
     return unpredicted
 
@@ -0,0 +1,103 @@
+import threading
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+
+from database.mongo import get_database
+import config
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def get_collection():
+    db = get_database(config.SENSOR_DATABASE_NAME)
+    return db[config.SENSOR_CATCH_UP_JOB_COLLECTION]
+
+
+def _ensure_running_index(collection):
+    """
+    At most one job document may have status "running", across every
+    worker process sharing the database.
+    """
+    global _index_ready
+
+    with _index_lock:
+        if not _index_ready:
+            collection.create_index(
+                "status",
+                unique=True,
+                partialFilterExpression={"status": "running"}
+            )
+            _index_ready = True
+
+
+def _expire_stale_job(collection) -> bool:
+    """
+    Mark a running job without progress for SENSOR_CATCH_UP_STALE_MINUTES
+    as failed. Returns True if one was expired.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(minutes=config.SENSOR_CATCH_UP_STALE_MINUTES)
+
+    result = collection.update_one(
+        {"status": "running", "heartbeat_at": {"$lt": cutoff}},
+        {"$set": {
+            "status": "failed",
+            "error": "abandoned (no progress)",
+            "finished_at": now
+        }}
+    )
+    return result.modified_count > 0
+
+
+def create_catch_up_job(start_date, end_date) -> str:
+    """
+    Insert a running job. Raises RuntimeError while another job is
+    running (enforced by a unique partial index, not a local lock).
+    """
+    collection = get_collection()
+    _ensure_running_index(collection)
+
+    for _ in range(2):
+        now = datetime.utcnow()
+        try:
+            result = collection.insert_one({
+                "status": "running",
+                "start_date": start_date,
+                "end_date": end_date,
+                "processed": 0,
+                "created_at": now,
+                "heartbeat_at": now,
+                "finished_at": None,
+                "error": None
+            })
+            return str(result.inserted_id)
+
+        except DuplicateKeyError:
+            if not _expire_stale_job(collection):
+                break
+
+    raise RuntimeError("A catch-up job is already running")
+
+
+def update_catch_up_job(job_id: str, **fields):
+    fields["heartbeat_at"] = datetime.utcnow()
+    get_collection().update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+
+
+def get_catch_up_job(job_id: str):
+    """
+    Job document with string id, or None if unknown.
+    """
+    try:
+        doc = get_collection().find_one({"_id": ObjectId(job_id)})
+    except InvalidId:
+        return None
+
+    if doc is not None:
+        doc["_id"] = str(doc["_id"])
+
+    return doc
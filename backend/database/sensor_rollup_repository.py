@@ -0,0 +1,89 @@
+from pymongo import ASCENDING, UpdateOne
+
+from database.mongo import get_database
+import config
+
+
+def get_collection(granularity: str, history: bool = False):
+    db = get_database(config.SENSOR_DATABASE_NAME, history=history)
+    return db[config.SENSOR_ROLLUP_COLLECTIONS[granularity]]
+
+
+def apply_rollup_increments(granularity: str, buckets: dict) -> int:
+    """
+    Merge partial bucket summaries into the stored buckets with one
+    bulk_write of upserts ($inc for counts/sums, $min / $max).
+    buckets: {(model, bucket_start): summary}
+    """
+    if not buckets:
+        return 0
+
+    operations = []
+
+    for (model, bucket), summary in buckets.items():
+        inc = {"count": summary["count"]}
+        mins = {}
+        maxs = {}
+
+        for name, stats in summary["metrics"].items():
+            inc[f"metrics.{name}.count"] = stats["count"]
+            inc[f"metrics.{name}.sum"] = stats["sum"]
+            mins[f"metrics.{name}.min"] = stats["min"]
+            maxs[f"metrics.{name}.max"] = stats["max"]
+
+        for dose, n in summary["doses"].items():
+            inc[f"doses.{dose}"] = n
+
+        for label, n in summary["classes"].items():
+            inc[f"classes.{label}"] = n
+
+        update = {"$inc": inc}
+        if mins:
+            update["$min"] = mins
+            update["$max"] = maxs
+
+        operations.append(UpdateOne(
+            {"model": model, "bucket": bucket},
+            update,
+            upsert=True
+        ))
+
+    get_collection(granularity).bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def replace_rollups(granularity: str, model: str, start, end, docs: list) -> int:
+    """
+    Drop a model's buckets in [start, end) and insert recomputed ones.
+    """
+    collection = get_collection(granularity)
+
+    collection.delete_many({
+        "model": model,
+        "bucket": {"$gte": start, "$lt": end}
+    })
+
+    if docs:
+        collection.insert_many(docs, ordered=False)
+
+    return len(docs)
+
+
+def fetch_rollups(granularity: str, model: str, start_date=None, end_date=None, limit=None):
+    """
+    Buckets of one model, oldest first.
+    """
+    query = {"model": model}
+
+    if start_date and end_date:
+        query["bucket"] = {
+            "$gte": start_date,
+            "$lte": end_date
+        }
+
+    return list(
+        get_collection(granularity, history=True)
+        .find(query, {"_id": 0})
+        .sort("bucket", ASCENDING)
+        .limit(limit or config.SENSOR_ROLLUP_MAX_BUCKETS)
+    )
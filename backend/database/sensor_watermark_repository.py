@@ -0,0 +1,57 @@
+from datetime import datetime
+from database.mongo import get_database
+import config
+
+
+def get_collection():
+    db = get_database(config.SENSOR_DATABASE_NAME)
+    return db[config.SENSOR_WATERMARK_COLLECTION]
+
+
+def get_watermark(model_name: str):
+    """
+    Last processed sensor reading for a model, or None if never run.
+    Returns {"last_created_at": datetime, "last_sensor_record_id": ObjectId}.
+    """
+    return get_collection().find_one({"_id": model_name})
+
+
+def get_watermarks(model_names: list) -> dict:
+    docs = get_collection().find({"_id": {"$in": list(model_names)}})
+    return {doc["_id"]: doc for doc in docs}
+
+
+def save_watermark(model_name: str, last_created_at, last_sensor_record_id):
+    """
+    Advance the watermark. Never moves it backwards.
+    """
+    collection = get_collection()
+
+    collection.update_one(
+        {
+            "_id": model_name,
+            "$or": [
+                {"last_created_at": {"$lt": last_created_at}},
+                {
+                    "last_created_at": last_created_at,
+                    "last_sensor_record_id": {"$lt": last_sensor_record_id}
+                }
+            ]
+        },
+        {"$set": {
+            "last_created_at": last_created_at,
+            "last_sensor_record_id": last_sensor_record_id,
+            "updated_at": datetime.utcnow()
+        }}
+    )
+
+    # First run for this model: create the document
+    collection.update_one(
+        {"_id": model_name},
+        {"$setOnInsert": {
+            "last_created_at": last_created_at,
+            "last_sensor_record_id": last_sensor_record_id,
+            "updated_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
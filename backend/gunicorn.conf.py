@@ -0,0 +1,39 @@
+import gc
+
+import config
+
+# =========================
+# PRODUCTION SERVER
+# =========================
+#   cd backend && gunicorn wsgi:app
+#
+# preload_app: wsgi.py runs create_app(prefork=True) once in the master,
+# which unpickles every model and builds the SHAP explainers, then the
+# workers are forked and share those pages copy-on-write.
+
+bind = config.GUNICORN_BIND
+workers = config.GUNICORN_WORKERS
+threads = config.GUNICORN_THREADS
+worker_class = "gthread"
+timeout = config.GUNICORN_TIMEOUT
+max_requests = config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = config.GUNICORN_MAX_REQUESTS // 10
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the GC's generations: the
+    # collector would otherwise write to the object headers in every
+    # worker and un-share the pages.
+    gc.collect()
+    gc.freeze()
+    server.log.info("Models preloaded; forking %s workers", workers)
+
+
+def post_worker_init(worker):
+    # Scheduler / change stream and explanation workers run in one
+    # worker only, chosen by a file lock.
+    from app import start_background_tasks
+    from services.background_leader import start_background_leader
+
+    start_background_leader(start_background_tasks)
@@ -3,10 +3,12 @@ from typing import Dict
 from services.model_loader import advance_regression_assets
 
 
-def predict_alum_dosage(features: Dict) -> Dict:
+def predict_alum_dosage(features: Dict, explain: bool = True) -> Dict:
+    """
+    explain=False skips SHAP (shap_explanation is None).
+    """
 
     model = advance_regression_assets["model"]
-    explainer = advance_regression_assets["explainer"]
     conformal = advance_regression_assets["conformal"]
 
     # ---- Validate & build DataFrame in correct order ----
@@ -26,7 +28,16 @@ def predict_alum_dosage(features: Dict) -> Dict:
     prediction = float(model.predict(X)[0])
 
     # ---- SHAP explanation ----
-    shap_values = explainer.shap_values(X)
+    shap_explanation = None
+
+    if explain:
+        explainer = advance_regression_assets["explainer"]
+        shap_values = explainer.shap_values(X)
+        shap_explanation = {
+            "features": list(X.columns),
+            "values": X.iloc[0].tolist(),
+            "shap_values": shap_values[0].tolist()
+        }
 
     # ---- Confidence interval ----
     interval = {
@@ -41,9 +52,5 @@ def predict_alum_dosage(features: Dict) -> Dict:
             "max": round(interval["upper"], 2)
         },
         "inputs": X.to_dict(orient="records")[0],
-        "shap_explanation": {
-            "features": list(X.columns),
-            "values": X.iloc[0].tolist(),
-            "shap_values": shap_values[0].tolist()
-        }
+        "shap_explanation": shap_explanation
     }
@@ -1,5 +1,29 @@
 import numpy as np
+from typing import Dict, List
+from services import model_loader
 from services.model_loader import classification_assets
+from utils.prediction_cache import cached_reading_batch
+
+# Column order of the arrays accepted by classify_water_safety_batch
+INPUT_FEATURES = [
+    "Raw_Water_PH",
+    "Raw_Water_Turbidity",
+    "Raw_Water_Conductivity"
+]
+
+# Permutation mapping INPUT_FEATURES onto the pickled feature order,
+# rebuilt only when the model assets are reloaded
+_feature_index = {"version": None, "index": None}
+
+
+def _get_feature_index():
+    if _feature_index["version"] != model_loader.MODEL_VERSION:
+        _feature_index["index"] = [
+            INPUT_FEATURES.index(f) for f in classification_assets["feature_order"]
+        ]
+        _feature_index["version"] = model_loader.MODEL_VERSION
+
+    return _feature_index["index"]
 
 
 def classify_water_safety(ph, turbidity, conductivity):
@@ -9,32 +33,57 @@ def classify_water_safety(ph, turbidity, conductivity):
     turbidity = float(turbidity)
     conductivity = float(conductivity)
 
+    return classify_water_safety_batch([ph], [turbidity], [conductivity])[0]
+
+
+def classify_water_safety_batch(ph, turbidity, conductivity, quantize: bool = False) -> List[Dict]:
+    """
+    Vectorized classify_water_safety for N readings.
+    One predict_proba call for the whole batch, threshold applied on arrays.
+    Cached readings are served without calling the model; quantize=True
+    (sensor pipeline) rounds readings to sensor precision first.
+    """
+
+    return cached_reading_batch(
+        "classification",
+        model_loader.MODEL_VERSION,
+        ph,
+        turbidity,
+        conductivity,
+        _compute_classification_batch,
+        quantize=quantize
+    )
+
+
+def _compute_classification_batch(ph, turbidity, conductivity) -> List[Dict]:
+
+    X_in = np.column_stack([
+        np.asarray(ph, dtype=float).ravel(),
+        np.asarray(turbidity, dtype=float).ravel(),
+        np.asarray(conductivity, dtype=float).ravel()
+    ])
+
+    if len(X_in) == 0:
+        return []
+
     model = classification_assets["model"]
     threshold = float(classification_assets["threshold"])
-    feature_order = classification_assets["feature_order"]
-
-    FEATURE_MAP = {
-        "Raw_Water_PH": ph,
-        "Raw_Water_Turbidity": turbidity,
-        "Raw_Water_Conductivity": conductivity
-    }
 
     # ---- Use feature order from pickle ----
-    X = np.array(
-        [FEATURE_MAP[f] for f in feature_order],
-        dtype=float
-    ).reshape(1, -1)
-
-    probability = float(model.predict_proba(X)[0][1])
-
-    status = "ABNORMAL" if probability >= threshold else "NORMAL"
-
-    return {
-        "classification": status,
-        "abnormal_probability": probability,
-        "threshold": threshold,
-        "next_action": (
-            "ADVANCE_REGRESSION" if status == "ABNORMAL"
-            else "NORMAL_REGRESSION"
-        )
-    }
+    X = X_in[:, _get_feature_index()]
+
+    probabilities = model.predict_proba(X)[:, 1]
+    abnormal = probabilities >= threshold
+
+    return [
+        {
+            "classification": "ABNORMAL" if is_abnormal else "NORMAL",
+            "abnormal_probability": float(probability),
+            "threshold": threshold,
+            "next_action": (
+                "ADVANCE_REGRESSION" if is_abnormal
+                else "NORMAL_REGRESSION"
+            )
+        }
+        for probability, is_abnormal in zip(probabilities, abnormal)
+    ]
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+import config
+
+# Axis order of every table: (dose, ph, turbidity, conductivity)
+GRID_AXES = ["ph", "turbidity", "conductivity"]
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+# =========================
+# GRID
+# =========================
+
+def grid_axis(name: str) -> np.ndarray:
+    lower, upper, step = config.DOSE_LOOKUP_GRID[name]
+    n_points = int(round((upper - lower) / step)) + 1
+    return lower + step * np.arange(n_points)
+
+
+def table_paths(model_name: str):
+    base = os.path.join(config.DOSE_LOOKUP_DIR, model_name)
+    return base + ".npy", base + ".json"
+
+
+# =========================
+# TABLE
+# =========================
+
+class DoseLookupTable:
+    """
+    Dense (dose x pH x turbidity x conductivity) grid of model outputs,
+    evaluated with trilinear interpolation. values is usually a
+    read-only memory map of the .npy file.
+    """
+
+    def __init__(self, values, meta: dict):
+        self.values = values
+        self.meta = meta
+        self.doses = list(meta["doses"])
+
+        self._lower = np.array([meta["grid"][a][0] for a in GRID_AXES])
+        self._step = np.array([meta["grid"][a][2] for a in GRID_AXES])
+        self._size = np.array(values.shape[1:])
+        self._upper = self._lower + self._step * (self._size - 1)
+
+    def covers(self, ph, turbidity, conductivity) -> np.ndarray:
+        """
+        Boolean mask of readings inside the grid.
+        """
+        points = np.column_stack([ph, turbidity, conductivity])
+        return np.all((points >= self._lower) & (points <= self._upper), axis=1)
+
+    def lookup(self, ph, turbidity, conductivity) -> np.ndarray:
+        """
+        Interpolated model output for every reading and dose, shape
+        (N, doses). Readings must lie inside the grid (see covers).
+        """
+        points = np.column_stack([ph, turbidity, conductivity])
+
+        position = (points - self._lower) / self._step
+        index = np.clip(np.floor(position).astype(int), 0, self._size - 2)
+        frac = np.clip(position - index, 0.0, 1.0)
+
+        i, j, k = index[:, 0], index[:, 1], index[:, 2]
+        fi, fj, fk = frac[:, 0], frac[:, 1], frac[:, 2]
+
+        v = self.values
+        result = np.zeros((len(points), len(self.doses)))
+
+        for di, wi in ((0, 1 - fi), (1, fi)):
+            for dj, wj in ((0, 1 - fj), (1, fj)):
+                for dk, wk in ((0, 1 - fk), (1, fk)):
+                    corner = v[:, i + di, j + dj, k + dk].T
+                    result += corner * (wi * wj * wk)[:, None]
+
+        return result
+
+
+# =========================
+# LOAD / SAVE
+# =========================
+
+def save_lookup_table(model_name: str, values: np.ndarray, meta: dict):
+    os.makedirs(config.DOSE_LOOKUP_DIR, exist_ok=True)
+    values_path, meta_path = table_paths(model_name)
+
+    np.save(values_path, values.astype(np.float32))
+
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    with _tables_lock:
+        _tables.pop(model_name, None)
+
+
+def get_lookup_table(model_name: str, doses, model_version: str):
+    """
+    The usable table for a model, or None. A table is only used when
+    lookups are enabled, it is current (see is_table_stale) and its
+    measured error is within DOSE_LOOKUP_MAX_ERROR.
+    """
+    if not config.DOSE_LOOKUP_ENABLED:
+        return None
+
+    table = load_lookup_table(model_name)
+
+    if is_table_stale(table, doses, model_version):
+        return None
+
+    if table.meta["max_abs_error"] > config.DOSE_LOOKUP_MAX_ERROR[model_name]:
+        return None
+
+    return table
+
+
+def load_lookup_table(model_name: str):
+    """
+    The table saved for a model (cached after the first load), or None.
+    """
+    with _tables_lock:
+        if model_name not in _tables:
+            _tables[model_name] = _load_table(model_name)
+        return _tables[model_name]
+
+
+def is_table_stale(table, doses, model_version: str) -> bool:
+    """
+    True when there is no table or it was built for another model
+    version, candidate doses or grid, i.e. rebuilding would change it.
+    """
+    if table is None:
+        return True
+
+    if table.meta["model_version"] != model_version:
+        return True
+
+    if [float(d) for d in table.doses] != [float(d) for d in doses]:
+        return True
+
+    for axis in GRID_AXES:
+        if list(table.meta["grid"][axis]) != list(config.DOSE_LOOKUP_GRID[axis]):
+            return True
+
+    return False
+
+
+def _load_table(model_name: str):
+    values_path, meta_path = table_paths(model_name)
+
+    if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    values = np.load(values_path, mmap_mode="r")
+
+    print(f"✅ Dose lookup table loaded for {model_name} (max error {meta['max_abs_error']:.4f})")
+    return DoseLookupTable(values, meta)
+
+
+def clear_lookup_tables():
+    with _tables_lock:
+        _tables.clear()
+
+
+def lookup_or_predict(table, ph, turbidity, conductivity, predict_fn) -> np.ndarray:
+    """
+    (N, doses) model outputs: interpolated from the table where the
+    reading is inside the grid, predict_fn(index_array) for the rest.
+    """
+    if table is None:
+        return predict_fn(np.arange(len(ph)))
+
+    inside = table.covers(ph, turbidity, conductivity)
+    outputs = np.empty((len(ph), len(table.doses)))
+
+    if inside.any():
+        outputs[inside] = table.lookup(ph[inside], turbidity[inside], conductivity[inside])
+
+    if not inside.all():
+        outputs[~inside] = predict_fn(np.flatnonzero(~inside))
+
+    return outputs
@@ -1,9 +1,30 @@
-from typing import Dict
+from typing import Dict, List
 import numpy as np
+from services import model_loader
 from services.model_loader import normal_regression_assets
+from utils.prediction_cache import cached_reading_batch
+from ml_logic.lookup_tables import get_lookup_table, lookup_or_predict
+
+# Alum doses simulated for every reading
+CANDIDATE_ALUM_DOSES = [9, 10]
 
 
 def build_features(raw_turb, raw_ph, raw_cond, dose, feature_names):
+    return build_feature_matrix(
+        [raw_turb], [raw_ph], [raw_cond], dose, feature_names
+    )
+
+
+def build_feature_matrix(raw_turb, raw_ph, raw_cond, dose, feature_names):
+    """
+    Column-wise version of build_features: one row per reading.
+    dose is a scalar (same dose for all readings) or one dose per reading.
+    """
+    raw_turb = np.asarray(raw_turb, dtype=float)
+    raw_ph = np.asarray(raw_ph, dtype=float)
+    raw_cond = np.asarray(raw_cond, dtype=float)
+    dose = np.full(raw_turb.shape, dose, dtype=float)
+
     features = {
         "Raw_Water_Turbidity": raw_turb,
         "Turb_roll37": raw_turb,
@@ -14,7 +35,7 @@ def build_features(raw_turb, raw_ph, raw_cond, dose, feature_names):
         "Alum_Dosage_ppm": dose,
         "Dose_Turb": dose * raw_turb
     }
-    return np.array([[features[col] for col in feature_names]], dtype=float)
+    return np.column_stack([features[col] for col in feature_names])
 
 
 def select_optimal_dose(pred_9, pred_10):
@@ -24,15 +45,20 @@ def select_optimal_dose(pred_9, pred_10):
         return 10, pred_10
 
 
-def predict_turbidity(features: Dict) -> Dict:
+def _get_q_hat(conformal):
+    if "q_hat_pre" in conformal:
+        return conformal["q_hat_pre"]      # 95% interval
+    elif "q_hat_narrow" in conformal:
+        return conformal["q_hat_narrow"]   # 80% interval
+    else:
+        raise KeyError(f"No q_hat found. Keys = {list(conformal.keys())}")
 
-    model = normal_regression_assets["model"]
-    explainer = normal_regression_assets["explainer"]
-    conformal = normal_regression_assets["conformal"]
 
-    # FIX HERE
-    feature_info = normal_regression_assets["feature_names"]
-    feature_names = feature_info["feature_names"]
+def predict_turbidity(features: Dict, explain: bool = True) -> Dict:
+    """
+    Single-reading turbidity prediction. explain=False skips SHAP
+    (shap_explanation is None).
+    """
 
     try:
         raw_turb = float(features["turbidity"])
@@ -41,50 +67,185 @@ def predict_turbidity(features: Dict) -> Dict:
     except Exception:
         raise ValueError("Inputs must contain numeric turbidity, ph, conductivity")
 
-    print(f"INPUT: Turbidity={raw_turb} NTU, pH={raw_ph}, Conductivity={raw_cond}")
+    return predict_turbidity_batch(
+        [raw_turb], [raw_ph], [raw_cond], explain=explain
+    )[0]
 
-    X9 = build_features(raw_turb, raw_ph, raw_cond, 9, feature_names)
-    pred_9 = float(model.predict(X9)[0])
 
-    X10 = build_features(raw_turb, raw_ph, raw_cond, 10, feature_names)
-    pred_10 = float(model.predict(X10)[0])
+def predict_turbidity_batch(turb, ph, cond, explain: bool = True, quantize: bool = False) -> List[Dict]:
+    """
+    Vectorized predict_turbidity for N readings.
 
-    dose, turb = select_optimal_dose(pred_9, pred_10)
+    Builds the 9 ppm and 10 ppm feature rows for every reading in one
+    (2N x features) matrix, predicts it with a single model.predict call,
+    and reuses the chosen dose's rows for one batched SHAP call
+    (skipped when explain=False). Cached readings are served without touching the model;
+    quantize=True (sensor pipeline) rounds readings to sensor precision first.
+    """
 
-    if "q_hat_pre" in conformal:
-        q_hat = conformal["q_hat_pre"]      # 95% interval
-    elif "q_hat_narrow" in conformal:
-        q_hat = conformal["q_hat_narrow"]   # 80% interval
+    try:
+        raw_turb = np.asarray(turb, dtype=float).ravel()
+        raw_ph = np.asarray(ph, dtype=float).ravel()
+        raw_cond = np.asarray(cond, dtype=float).ravel()
+    except Exception:
+        raise ValueError("Inputs must contain numeric turbidity, ph, conductivity")
+
+    return cached_reading_batch(
+        "normal_regression",
+        model_loader.MODEL_VERSION,
+        raw_ph,
+        raw_turb,
+        raw_cond,
+        lambda p, t, c: _compute_turbidity_batch(t, p, c, explain),
+        variant="explain" if explain else "dose",
+        quantize=quantize
+    )
+
+
+def _dose_feature_matrix(raw_turb, raw_ph, raw_cond, feature_names):
+    # Rows [0, N) are dose 9, rows [N, 2N) are dose 10
+    return np.vstack([
+        build_feature_matrix(raw_turb, raw_ph, raw_cond, dose, feature_names)
+        for dose in CANDIDATE_ALUM_DOSES
+    ])
+
+
+def predict_dose_turbidity(raw_turb, raw_ph, raw_cond) -> np.ndarray:
+    """
+    Model settled turbidity for every reading x CANDIDATE_ALUM_DOSES,
+    shape (N, doses). Also used to build the lookup table.
+    """
+    model = normal_regression_assets["model"]
+    feature_names = normal_regression_assets["feature_names"]["feature_names"]
+
+    raw_turb = np.asarray(raw_turb, dtype=float).ravel()
+
+    X_all = _dose_feature_matrix(
+        raw_turb,
+        np.asarray(raw_ph, dtype=float).ravel(),
+        np.asarray(raw_cond, dtype=float).ravel(),
+        feature_names
+    )
+    return np.asarray(model.predict(X_all), dtype=float).reshape(
+        len(CANDIDATE_ALUM_DOSES), len(raw_turb)
+    ).T
+
+
+def _compute_turbidity_batch(raw_turb, raw_ph, raw_cond, explain=True) -> List[Dict]:
+
+    conformal = normal_regression_assets["conformal"]
+
+    feature_info = normal_regression_assets["feature_names"]
+    feature_names = feature_info["feature_names"]
+
+    raw_turb = np.asarray(raw_turb, dtype=float).ravel()
+    raw_ph = np.asarray(raw_ph, dtype=float).ravel()
+    raw_cond = np.asarray(raw_cond, dtype=float).ravel()
+
+    if not (len(raw_turb) == len(raw_ph) == len(raw_cond)):
+        raise ValueError("turbidity, ph and conductivity must have the same length")
+
+    n_readings = len(raw_turb)
+    if n_readings == 0:
+        return []
+
+    q_hat = _get_q_hat(conformal)
+
+    if explain:
+        X_all = _dose_feature_matrix(raw_turb, raw_ph, raw_cond, feature_names)
+        preds = np.asarray(
+            normal_regression_assets["model"].predict(X_all), dtype=float
+        ).reshape(len(CANDIDATE_ALUM_DOSES), n_readings)
     else:
-        raise KeyError(f"No q_hat found. Keys = {list(conformal.keys())}")
+        # Dose-only: use the precomputed lookup table where it is valid
+        table = get_lookup_table(
+            "normal_regression",
+            CANDIDATE_ALUM_DOSES,
+            model_loader.lookup_table_version("normal_regression")
+        )
+        preds = lookup_or_predict(
+            table,
+            raw_ph,
+            raw_turb,
+            raw_cond,
+            lambda idx: predict_dose_turbidity(
+                raw_turb[idx], raw_ph[idx], raw_cond[idx]
+            )
+        ).T
+    pred_9 = preds[0]
+    pred_10 = preds[1]
+
+    # Same rule as select_optimal_dose: 9 ppm wins ties
+    use_10 = pred_9 > pred_10
+    doses = np.where(use_10, 10, 9)
+    turbs = np.where(use_10, pred_10, pred_9)
+
+    shap_values = None
+    if explain:
+        best_rows = np.arange(n_readings) + use_10 * n_readings
+        X_best = X_all[best_rows]
+        explainer = normal_regression_assets["explainer"]
+        shap_values = np.asarray(explainer.shap_values(X_best))
+
+    results = []
+
+    for i in range(n_readings):
+        turb_i = float(turbs[i])
+
+        results.append({
+            "inputs": {
+                "turbidity": float(raw_turb[i]),
+                "ph": float(raw_ph[i]),
+                "conductivity": float(raw_cond[i])
+            },
+            "predictions": {
+                "dose_9_turbidity": round(float(pred_9[i]), 3),
+                "dose_10_turbidity": round(float(pred_10[i]), 3)
+            },
+            "recommended_dose_ppm": int(doses[i]),
+            "predicted_settled_turbidity": round(turb_i, 3),
+            "confidence_interval": {
+                "lower": round(turb_i - q_hat, 3),
+                "upper": round(turb_i + q_hat, 3)
+            },
+            "shap_explanation": {
+                "features": feature_names,
+                "values": X_best[i].tolist(),
+                "shap_values": shap_values[i].tolist()
+            } if explain else None
+        })
+
+    return results
+
+
+def explain_turbidity_rows(turb, ph, cond, doses) -> List[Dict]:
+    """
+    SHAP explanations for N (reading, chosen dose) rows with one
+    TreeExplainer.shap_values call. Same layout as the
+    shap_explanation returned by predict_turbidity.
+    """
+
+    feature_names = normal_regression_assets["feature_names"]["feature_names"]
+
+    X = build_feature_matrix(
+        np.asarray(turb, dtype=float).ravel(),
+        np.asarray(ph, dtype=float).ravel(),
+        np.asarray(cond, dtype=float).ravel(),
+        np.asarray(doses, dtype=float).ravel(),
+        feature_names
+    )
+
+    if len(X) == 0:
+        return []
 
-    interval = {
-        "lower": turb - q_hat,
-        "upper": turb + q_hat
-    }
+    explainer = normal_regression_assets["explainer"]
+    shap_values = np.asarray(explainer.shap_values(X))
 
-    X_best = build_features(raw_turb, raw_ph, raw_cond, dose, feature_names)
-    shap_values = explainer.shap_values(X_best)
-
-    return {
-        "inputs": {
-            "turbidity": raw_turb,
-            "ph": raw_ph,
-            "conductivity": raw_cond
-        },
-        "predictions": {
-            "dose_9_turbidity": round(pred_9, 3),
-            "dose_10_turbidity": round(pred_10, 3)
-        },
-        "recommended_dose_ppm": dose,
-        "predicted_settled_turbidity": round(turb, 3),
-        "confidence_interval": {
-            "lower": round(interval["lower"], 3),
-            "upper": round(interval["upper"], 3)
-        },
-        "shap_explanation": {
+    return [
+        {
             "features": feature_names,
-            "values": X_best[0].tolist(),
-            "shap_values": shap_values[0].tolist()
+            "values": X[i].tolist(),
+            "shap_values": shap_values[i].tolist()
         }
-    }
+        for i in range(len(X))
+    ]
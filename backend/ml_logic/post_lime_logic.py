@@ -1,7 +1,10 @@
 import numpy as np
-from typing import Dict
+from typing import Dict, List, Tuple
 import pandas as pd
+from services import model_loader
 from services.model_loader import post_lime_assets
+from utils.prediction_cache import cached_reading_batch
+from ml_logic.lookup_tables import get_lookup_table, lookup_or_predict
 
 # =========================
 # CONSTANTS
@@ -14,6 +17,15 @@ SAFE_PH_UPPER = 7.2
 CANDIDATE_POST_LIME_DOSES = [4.0, 5.0]
 
 
+# Column order the scaler / model were trained with
+POST_LIME_FEATURE_COLUMNS = [
+    "Raw_Water_PH",
+    "Raw_Water_Turbidity",
+    "Raw_Water_Conductivity",
+    "Post_Lime_Dosage_SPH02_ppm"
+]
+
+
 # =========================
 # CORE FUNCTION
 # =========================
@@ -21,139 +33,366 @@ CANDIDATE_POST_LIME_DOSES = [4.0, 5.0]
 def get_optimal_post_lime_dose_with_shap(
     raw_ph: float,
     raw_turbidity: float,
-    raw_conductivity: float
+    raw_conductivity: float,
+    explain: bool = True
 ) -> Dict:
     """
     Simulate post-lime doses, predict ΔpH_post, compute final treated pH,
     select optimal dose, compute SHAP explanation and conformal interval.
 
+    With explain=False the SHAP step is skipped and shap_explanation /
+    ambatale_explanation_post are None (dose-only fast path).
+
     Returns a structured Python dict.
     """
 
-    model = post_lime_assets["model"]
-    scaler = post_lime_assets["scaler"]
-    explainer = post_lime_assets["explainer"]
+    return get_optimal_post_lime_dose_records(
+        [raw_ph],
+        [raw_turbidity],
+        [raw_conductivity],
+        explain=explain
+    )[0]
+
+
+# =========================
+# BATCH FUNCTION
+# =========================
+
+def get_optimal_post_lime_dose_batch(
+    raw_ph,
+    raw_turbidity=None,
+    raw_conductivity=None,
+    explain: bool = True
+) -> Dict:
+    """
+    Vectorized post-lime dose selection for N readings.
+
+    Accepts three equal-length arrays, or a single DataFrame passed as
+    raw_ph with raw_ph / raw_turbidity / raw_conductivity columns.
+    Builds one (N x doses) design matrix, runs one scaler.transform,
+    one model.predict and (if explain) one SHAP call for the N winning rows.
+
+    Returns a columnar dict of NumPy arrays (one entry per reading);
+    use post_lime_batch_to_records to expand it into API responses.
+    shap_values / base_value are None when explain=False.
+    """
+
+    if isinstance(raw_ph, pd.DataFrame):
+        raw_turbidity = raw_ph["raw_turbidity"]
+        raw_conductivity = raw_ph["raw_conductivity"]
+        raw_ph = raw_ph["raw_ph"]
+
+    raw_ph = np.asarray(raw_ph, dtype=float).ravel()
+    raw_turbidity = np.asarray(raw_turbidity, dtype=float).ravel()
+    raw_conductivity = np.asarray(raw_conductivity, dtype=float).ravel()
+
+    if not (len(raw_ph) == len(raw_turbidity) == len(raw_conductivity)):
+        raise ValueError("raw_ph, raw_turbidity and raw_conductivity must have the same length")
+
     conformal_data = post_lime_assets["conformal"]
     q_hat = conformal_data["q_hat"]
 
-
-    predictions = []
+    # Sorted ascending so argmin tie-breaks towards the lower dose
+    doses = np.sort(np.asarray(CANDIDATE_POST_LIME_DOSES, dtype=float))
+    n_doses = len(doses)
+    n_readings = len(raw_ph)
+    n_features = len(POST_LIME_FEATURE_COLUMNS)
+
+    if n_readings == 0:
+        return {
+            "raw_ph": raw_ph,
+            "raw_turbidity": raw_turbidity,
+            "raw_conductivity": raw_conductivity,
+            "recommended_post_lime_dose_ppm": np.empty(0),
+            "predicted_delta_pH": np.empty(0),
+            "predicted_final_pH_sph2": np.empty(0),
+            "conformal_lower_pH": np.empty(0),
+            "conformal_upper_pH": np.empty(0),
+            "shap_values": np.empty((0, n_features)) if explain else None,
+            "base_value": None
+        }
 
     # -------------------------------------------------
-    # 1. Dose simulation & prediction
+    # 1. Dose simulation & prediction (N x doses rows)
     # -------------------------------------------------
-    for dose in CANDIDATE_POST_LIME_DOSES:
-        input_df = pd.DataFrame([{
-    "Raw_Water_PH": raw_ph,
-    "Raw_Water_Turbidity": raw_turbidity,
-    "Raw_Water_Conductivity": raw_conductivity,
-    "Post_Lime_Dosage_SPH02_ppm": dose
-        }])
-
-        scaled_features = scaler.transform(input_df)
-
-        delta_ph = float(model.predict(scaled_features)[0])
-        final_ph = raw_ph + delta_ph
-
-        predictions.append({
-            "dose": dose,
-            "delta_ph": delta_ph,
-            "final_ph": final_ph
-        })
+    if explain:
+        scaled_features, delta_ph = _simulate_doses(
+            raw_ph, raw_turbidity, raw_conductivity, doses
+        )
+    else:
+        # Dose-only: use the precomputed lookup table where it is valid
+        table = get_lookup_table(
+            "post_lime",
+            doses,
+            model_loader.lookup_table_version("post_lime")
+        )
+        delta_ph = lookup_or_predict(
+            table,
+            raw_ph,
+            raw_turbidity,
+            raw_conductivity,
+            lambda idx: predict_delta_ph(
+                raw_ph[idx], raw_turbidity[idx], raw_conductivity[idx]
+            )
+        )
+    final_ph = raw_ph[:, None] + delta_ph
 
     # -------------------------------------------------
     # 2. Select best dose based on safe band
     # -------------------------------------------------
-    inside_band = [
-        p for p in predictions
-        if SAFE_PH_LOWER <= p["final_ph"] <= SAFE_PH_UPPER
-    ]
-
-    if inside_band:
-        # Prefer lowest dose inside band
-        best_result = min(inside_band, key=lambda x: x["dose"])
-    else:
-        # Choose closest to safe band, prefer lower dose on tie
-        best_result = min(
-            predictions,
-            key=lambda x: (
-                min(
-                    abs(x["final_ph"] - SAFE_PH_LOWER),
-                    abs(x["final_ph"] - SAFE_PH_UPPER)
-                ),
-                x["dose"]
-            )
-        )
+    # Lowest dose inside the band wins; otherwise the dose closest to
+    # the band, lower dose on tie.
+    inside_band = (final_ph >= SAFE_PH_LOWER) & (final_ph <= SAFE_PH_UPPER)
+    band_distance = np.minimum(
+        np.abs(final_ph - SAFE_PH_LOWER),
+        np.abs(final_ph - SAFE_PH_UPPER)
+    )
+    best_idx = np.argmin(np.where(inside_band, -1.0, band_distance), axis=1)
 
-    best_dose = best_result["dose"]
-    best_final_ph = best_result["final_ph"]
-    best_delta_ph = best_result["delta_ph"]
+    rows = np.arange(n_readings)
+    best_final_ph = final_ph[rows, best_idx]
 
     # -------------------------------------------------
-    # 3. SHAP explanation (on ΔpH_post)
+    # 3. SHAP explanation (on ΔpH_post, reuse scaled rows)
     # -------------------------------------------------
-    shap_df = pd.DataFrame([{
-    "Raw_Water_PH": raw_ph,
-    "Raw_Water_Turbidity": raw_turbidity,
-    "Raw_Water_Conductivity": raw_conductivity,
-    "Post_Lime_Dosage_SPH02_ppm": best_dose
-}])
+    shap_values = None
+    base_value = None
 
-    shap_scaled = scaler.transform(shap_df)
-    shap_values = explainer.shap_values(shap_scaled)
-
-    shap_explanation = {
-        "feature_names": [
-            "raw_water_ph",
-            "raw_water_turbidity",
-            "raw_water_conductivity",
-            "post_lime_dose_ppm"
-        ],
-        "feature_values": [
-            raw_ph,
-            raw_turbidity,
-            raw_conductivity,
-            best_dose
-        ],
-        "shap_values": shap_values[0].tolist(),
-        "base_value": float(explainer.expected_value)
-    }
+    if explain:
+        shap_scaled = scaled_features.reshape(n_readings, n_doses, n_features)[rows, best_idx]
+        shap_values, base_value = _post_lime_shap_values(shap_scaled)
 
     # -------------------------------------------------
     # 4. Conformal prediction interval (95%) on final pH
     # -------------------------------------------------
-    conformal_interval = {
-        "lower_pH": best_final_ph - q_hat,
-        "upper_pH": best_final_ph + q_hat
+    return {
+        "raw_ph": raw_ph,
+        "raw_turbidity": raw_turbidity,
+        "raw_conductivity": raw_conductivity,
+        "recommended_post_lime_dose_ppm": doses[best_idx],
+        "predicted_delta_pH": delta_ph[rows, best_idx],
+        "predicted_final_pH_sph2": best_final_ph,
+        "conformal_lower_pH": best_final_ph - q_hat,
+        "conformal_upper_pH": best_final_ph + q_hat,
+        "shap_values": shap_values,
+        "base_value": base_value
     }
 
-    # -------------------------------------------------
-    # 5. Build human explanation
-    # -------------------------------------------------
-    explanation_text = build_postlime_explanation(
-        best_dose,
-        best_final_ph,
-        best_delta_ph,
-        shap_explanation
+
+def _simulate_doses(raw_ph, raw_turbidity, raw_conductivity, doses):
+    """
+    Scale the (N x doses) design matrix and predict it in one call.
+    Returns (scaled rows, predicted ΔpH_post of shape (N, doses)).
+    """
+    model = post_lime_assets["model"]
+    scaler = post_lime_assets["scaler"]
+
+    n_readings = len(raw_ph)
+    n_doses = len(doses)
+
+    design_df = pd.DataFrame({
+        "Raw_Water_PH": np.repeat(raw_ph, n_doses),
+        "Raw_Water_Turbidity": np.repeat(raw_turbidity, n_doses),
+        "Raw_Water_Conductivity": np.repeat(raw_conductivity, n_doses),
+        "Post_Lime_Dosage_SPH02_ppm": np.tile(doses, n_readings)
+    }, columns=POST_LIME_FEATURE_COLUMNS)
+
+    scaled_features = scaler.transform(design_df)
+
+    delta_ph = np.asarray(
+        model.predict(scaled_features), dtype=float
+    ).reshape(n_readings, n_doses)
+
+    return scaled_features, delta_ph
+
+
+def predict_delta_ph(raw_ph, raw_turbidity, raw_conductivity) -> np.ndarray:
+    """
+    Model ΔpH_post for every reading x candidate dose (ascending),
+    shape (N, doses). Also used to build the lookup table.
+    """
+    _, delta_ph = _simulate_doses(
+        np.asarray(raw_ph, dtype=float).ravel(),
+        np.asarray(raw_turbidity, dtype=float).ravel(),
+        np.asarray(raw_conductivity, dtype=float).ravel(),
+        np.sort(np.asarray(CANDIDATE_POST_LIME_DOSES, dtype=float))
     )
+    return delta_ph
+
+
+def get_optimal_post_lime_dose_records(
+    raw_ph,
+    raw_turbidity,
+    raw_conductivity,
+    explain: bool = True,
+    quantize: bool = False
+) -> List[Dict]:
+    """
+    Per-reading response dicts for N readings. Cached readings are
+    served from the prediction cache; the rest go through one
+    columnar batch. quantize=True (sensor pipeline) rounds readings to
+    sensor precision first.
+    """
+
+    return cached_reading_batch(
+        "post_lime",
+        model_loader.MODEL_VERSION,
+        raw_ph,
+        raw_turbidity,
+        raw_conductivity,
+        lambda p, t, c: post_lime_batch_to_records(
+            get_optimal_post_lime_dose_batch(p, t, c, explain=explain)
+        ),
+        variant="explain" if explain else "dose",
+        quantize=quantize
+    )
+
+
+def post_lime_batch_to_records(batch: Dict) -> List[Dict]:
+    """
+    Expand a columnar batch result into the per-reading response dicts
+    returned by get_optimal_post_lime_dose_with_shap.
+    """
+
+    records = []
+    explained = batch["shap_values"] is not None
+
+    for i in range(len(batch["raw_ph"])):
+        best_dose = float(batch["recommended_post_lime_dose_ppm"][i])
+        best_final_ph = float(batch["predicted_final_pH_sph2"][i])
+        best_delta_ph = float(batch["predicted_delta_pH"][i])
+
+        shap_explanation = None
+        explanation_text = None
+
+        if explained:
+            shap_explanation = _build_shap_explanation(
+                batch["raw_ph"][i],
+                batch["raw_turbidity"][i],
+                batch["raw_conductivity"][i],
+                best_dose,
+                batch["shap_values"][i],
+                batch["base_value"]
+            )
+
+            # -------------------------------------------------
+            # 5. Build human explanation
+            # -------------------------------------------------
+            explanation_text = build_postlime_explanation(
+                best_dose,
+                best_final_ph,
+                best_delta_ph,
+                shap_explanation
+            )
 
         # -------------------------------------------------
         # 6. Final structured response
         # -------------------------------------------------
+        records.append({
+            "recommended_post_lime_dose_ppm": best_dose,
+            "predicted_delta_pH": best_delta_ph,
+            "predicted_final_pH_sph2": best_final_ph,
+            "safe_band": {
+                "lower": SAFE_PH_LOWER,
+                "upper": SAFE_PH_UPPER
+            },
+            "conformal_interval": {
+                "lower_pH": float(batch["conformal_lower_pH"][i]),
+                "upper_pH": float(batch["conformal_upper_pH"][i])
+            },
+            "shap_explanation": shap_explanation,
+            "ambatale_explanation_post": explanation_text
+        })
+
+    return records
+
+
+# =========================
+# SHAP EXPLANATIONS
+# =========================
+
+def _post_lime_shap_values(scaled_rows):
+    explainer = post_lime_assets["explainer"]
+    shap_values = np.asarray(explainer.shap_values(scaled_rows))
+    return shap_values, float(explainer.expected_value)
+
+
+def _build_shap_explanation(raw_ph, raw_turbidity, raw_conductivity, dose, shap_row, base_value):
     return {
-        "recommended_post_lime_dose_ppm": best_dose,
-        "predicted_delta_pH": best_delta_ph,
-        "predicted_final_pH_sph2": best_final_ph,
-        "safe_band": {
-            "lower": SAFE_PH_LOWER,
-            "upper": SAFE_PH_UPPER
-        },
-        "conformal_interval": conformal_interval,
-        "shap_explanation": shap_explanation,
-        "ambatale_explanation_post": explanation_text
+        "feature_names": [
+            "raw_water_ph",
+            "raw_water_turbidity",
+            "raw_water_conductivity",
+            "post_lime_dose_ppm"
+        ],
+        "feature_values": [
+            float(raw_ph),
+            float(raw_turbidity),
+            float(raw_conductivity),
+            float(dose)
+        ],
+        "shap_values": np.asarray(shap_row).tolist(),
+        "base_value": base_value
     }
 
 
+def explain_post_lime_rows(
+    raw_ph,
+    raw_turbidity,
+    raw_conductivity,
+    doses,
+    final_ph,
+    delta_ph
+) -> List[Tuple[Dict, str]]:
+    """
+    SHAP explanation + human text for N (reading, chosen dose) rows,
+    using one scaler.transform and one TreeExplainer.shap_values call.
+
+    Returns (shap_explanation, ambatale_explanation_post) per row.
+    """
+
+    raw_ph = np.asarray(raw_ph, dtype=float).ravel()
+    raw_turbidity = np.asarray(raw_turbidity, dtype=float).ravel()
+    raw_conductivity = np.asarray(raw_conductivity, dtype=float).ravel()
+    doses = np.asarray(doses, dtype=float).ravel()
+    final_ph = np.asarray(final_ph, dtype=float).ravel()
+    delta_ph = np.asarray(delta_ph, dtype=float).ravel()
+
+    if len(raw_ph) == 0:
+        return []
+
+    scaled_rows = post_lime_assets["scaler"].transform(pd.DataFrame({
+        "Raw_Water_PH": raw_ph,
+        "Raw_Water_Turbidity": raw_turbidity,
+        "Raw_Water_Conductivity": raw_conductivity,
+        "Post_Lime_Dosage_SPH02_ppm": doses
+    }, columns=POST_LIME_FEATURE_COLUMNS))
+
+    shap_values, base_value = _post_lime_shap_values(scaled_rows)
+
+    explanations = []
+
+    for i in range(len(raw_ph)):
+        shap_explanation = _build_shap_explanation(
+            raw_ph[i],
+            raw_turbidity[i],
+            raw_conductivity[i],
+            doses[i],
+            shap_values[i],
+            base_value
+        )
+
+        explanation_text = build_postlime_explanation(
+            float(doses[i]),
+            float(final_ph[i]),
+            float(delta_ph[i]),
+            shap_explanation
+        )
+
+        explanations.append((shap_explanation, explanation_text))
+
+    return explanations
+
 
 # =========================================================
 # POST-LIME HUMAN EXPLANATION BUILDER
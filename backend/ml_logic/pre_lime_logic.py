@@ -1,7 +1,10 @@
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import pandas as pd
+from services import model_loader
 from services.model_loader import pre_lime_assets
+from utils.prediction_cache import cached_reading_batch
+from ml_logic.lookup_tables import get_lookup_table, lookup_or_predict
 
 # =========================
 # CONSTANTS
@@ -10,6 +13,17 @@ from services.model_loader import pre_lime_assets
 SAFE_PH_LOWER = 6.0
 SAFE_PH_UPPER = 6.6
 
+# Dataset contains only 0 ppm historically
+CANDIDATE_PRE_LIME_DOSES = [0.0]
+
+# Column order the scaler / model were trained with
+PRE_LIME_FEATURE_COLUMNS = [
+    "Raw_Water_PH",
+    "Raw_Water_Turbidity",
+    "Raw_Water_Conductivity",
+    "Pre_Lime_Dosage_ppm"
+]
+
 
 # =========================
 # CORE FUNCTION
@@ -18,130 +32,287 @@ SAFE_PH_UPPER = 6.6
 def get_optimal_pre_lime_dose_with_shap(
     raw_ph: float,
     raw_turbidity: float,
-    raw_conductivity: float
+    raw_conductivity: float,
+    explain: bool = True
 ) -> Dict:
     """
     Simulate pre-lime doses, predict settled pH, select optimal dose,
     compute SHAP explanation and conformal interval.
 
+    With explain=False the SHAP step is skipped and shap_explanation /
+    ambatale_explanation_pre are None (dose-only fast path).
+
     Returns a structured Python dict.
     """
 
+    return get_optimal_pre_lime_dose_batch(
+        [raw_ph],
+        [raw_turbidity],
+        [raw_conductivity],
+        explain=explain
+    )[0]
+
+
+# =========================
+# BATCH FUNCTION
+# =========================
+
+def get_optimal_pre_lime_dose_batch(
+    raw_ph,
+    raw_turbidity=None,
+    raw_conductivity=None,
+    explain: bool = True,
+    quantize: bool = False
+) -> List[Dict]:
+    """
+    Vectorized version of get_optimal_pre_lime_dose_with_shap for N readings.
+
+    Accepts three equal-length arrays, or a single DataFrame passed as
+    raw_ph with raw_ph / raw_turbidity / raw_conductivity columns.
+    Scales once, predicts every reading x candidate dose in one
+    model.predict call and explains all chosen rows in one SHAP call.
+
+    Results are served from the prediction cache when possible; only
+    uncached readings reach the model. quantize=True (sensor pipeline)
+    rounds readings to sensor precision first.
+
+    Returns one result dict per reading, in input order.
+    """
+
+    if isinstance(raw_ph, pd.DataFrame):
+        raw_turbidity = raw_ph["raw_turbidity"]
+        raw_conductivity = raw_ph["raw_conductivity"]
+        raw_ph = raw_ph["raw_ph"]
+
+    return cached_reading_batch(
+        "pre_lime",
+        model_loader.MODEL_VERSION,
+        raw_ph,
+        raw_turbidity,
+        raw_conductivity,
+        lambda p, t, c: _compute_pre_lime_batch(p, t, c, explain),
+        variant="explain" if explain else "dose",
+        quantize=quantize
+    )
+
+
+def _simulate_doses(raw_ph, raw_turbidity, raw_conductivity, doses):
+    """
+    Scale the (N x doses) design matrix and predict it in one call.
+    Returns (scaled rows, predicted settled pH of shape (N, doses)).
+    """
     model = pre_lime_assets["model"]
     scaler = pre_lime_assets["scaler"]
-    explainer = pre_lime_assets["explainer"]
-    conformal_data = pre_lime_assets["conformal"]
-    q_hat = conformal_data["q_hat"]
 
-    # -------------------------------------------------
-    # 1. Candidate dose simulation
-    # -------------------------------------------------
-    # Dataset contains only 0 ppm historically
-    candidate_doses = [0.0]
+    n_readings = len(raw_ph)
+    n_doses = len(doses)
 
-    predictions = []
+    design_df = pd.DataFrame({
+        "Raw_Water_PH": np.repeat(raw_ph, n_doses),
+        "Raw_Water_Turbidity": np.repeat(raw_turbidity, n_doses),
+        "Raw_Water_Conductivity": np.repeat(raw_conductivity, n_doses),
+        "Pre_Lime_Dosage_ppm": np.tile(doses, n_readings)
+    }, columns=PRE_LIME_FEATURE_COLUMNS)
 
-    for dose in candidate_doses:
-        input_df = pd.DataFrame([{
-        "Raw_Water_PH": raw_ph,
-        "Raw_Water_Turbidity": raw_turbidity,
-        "Raw_Water_Conductivity": raw_conductivity,
-        "Pre_Lime_Dosage_ppm": dose
-    }])
+    scaled_features = scaler.transform(design_df)
 
-        scaled_features = scaler.transform(input_df)
+    predicted_ph = np.asarray(
+        model.predict(scaled_features), dtype=float
+    ).reshape(n_readings, n_doses)
 
-        predicted_ph = float(model.predict(scaled_features)[0])
+    return scaled_features, predicted_ph
 
-        predictions.append({
-            "dose": dose,
-            "predicted_ph": predicted_ph
-        })
+
+def predict_settled_ph(raw_ph, raw_turbidity, raw_conductivity) -> np.ndarray:
+    """
+    Model settled pH for every reading x CANDIDATE_PRE_LIME_DOSES,
+    shape (N, doses). Also used to build the lookup table.
+    """
+    _, predicted_ph = _simulate_doses(
+        np.asarray(raw_ph, dtype=float).ravel(),
+        np.asarray(raw_turbidity, dtype=float).ravel(),
+        np.asarray(raw_conductivity, dtype=float).ravel(),
+        np.asarray(CANDIDATE_PRE_LIME_DOSES, dtype=float)
+    )
+    return predicted_ph
+
+
+def _compute_pre_lime_batch(raw_ph, raw_turbidity, raw_conductivity, explain=True) -> List[Dict]:
+
+    raw_ph = np.asarray(raw_ph, dtype=float).ravel()
+    raw_turbidity = np.asarray(raw_turbidity, dtype=float).ravel()
+    raw_conductivity = np.asarray(raw_conductivity, dtype=float).ravel()
+
+    if not (len(raw_ph) == len(raw_turbidity) == len(raw_conductivity)):
+        raise ValueError("raw_ph, raw_turbidity and raw_conductivity must have the same length")
+
+    n_readings = len(raw_ph)
+    if n_readings == 0:
+        return []
+
+    conformal_data = pre_lime_assets["conformal"]
+    q_hat = conformal_data["q_hat"]
+
+    doses = np.asarray(CANDIDATE_PRE_LIME_DOSES, dtype=float)
+    n_doses = len(doses)
 
     # -------------------------------------------------
-    # 2. Select best dose based on safe band
+    # 1. Candidate dose simulation (N x doses rows)
     # -------------------------------------------------
-    inside_band = [
-        p for p in predictions
-        if SAFE_PH_LOWER <= p["predicted_ph"] <= SAFE_PH_UPPER
-    ]
-
-    if inside_band:
-        best_result = inside_band[0]
+    if explain:
+        scaled_features, predicted_ph = _simulate_doses(
+            raw_ph, raw_turbidity, raw_conductivity, doses
+        )
     else:
-        best_result = min(
-            predictions,
-            key=lambda x: min(
-                abs(x["predicted_ph"] - SAFE_PH_LOWER),
-                abs(x["predicted_ph"] - SAFE_PH_UPPER)
+        # Dose-only: use the precomputed lookup table where it is valid
+        table = get_lookup_table(
+            "pre_lime",
+            CANDIDATE_PRE_LIME_DOSES,
+            model_loader.lookup_table_version("pre_lime")
+        )
+        predicted_ph = lookup_or_predict(
+            table,
+            raw_ph,
+            raw_turbidity,
+            raw_conductivity,
+            lambda idx: predict_settled_ph(
+                raw_ph[idx], raw_turbidity[idx], raw_conductivity[idx]
             )
         )
 
-    best_dose = best_result["dose"]
-    best_ph = best_result["predicted_ph"]
+    # -------------------------------------------------
+    # 2. Select best dose based on safe band
+    # -------------------------------------------------
+    # First dose inside the band wins, otherwise the one closest to it.
+    # argmin keeps the first index on ties, matching the scalar rules.
+    inside_band = (
+        (predicted_ph >= SAFE_PH_LOWER) & (predicted_ph <= SAFE_PH_UPPER)
+    )
+    band_distance = np.minimum(
+        np.abs(predicted_ph - SAFE_PH_LOWER),
+        np.abs(predicted_ph - SAFE_PH_UPPER)
+    )
+    best_idx = np.argmin(np.where(inside_band, -1.0, band_distance), axis=1)
+
+    rows = np.arange(n_readings)
+    best_doses = doses[best_idx]
+    best_phs = predicted_ph[rows, best_idx]
 
     # -------------------------------------------------
-    # 3. SHAP explanation
+    # 3. SHAP explanation (reuse already-scaled rows)
     # -------------------------------------------------
-    shap_df = pd.DataFrame([{
-    "Raw_Water_PH": raw_ph,
-    "Raw_Water_Turbidity": raw_turbidity,
-    "Raw_Water_Conductivity": raw_conductivity,
-    "Pre_Lime_Dosage_ppm": best_dose
-}])
-
-    shap_scaled = scaler.transform(shap_df)
-
-    shap_values = explainer.shap_values(shap_scaled)
-
-    shap_explanation = {
-        "feature_names": [
-            "raw_water_ph",
-            "raw_water_turbidity",
-            "raw_water_conductivity",
-            "pre_lime_dose_ppm"
-        ],
-        "feature_values": [
+    if explain:
+        explanations = explain_pre_lime_rows(
             raw_ph,
             raw_turbidity,
             raw_conductivity,
-            best_dose
-        ],
-        "shap_values": shap_values[0].tolist(),
-        "base_value": float(explainer.expected_value)
-    }
+            best_doses,
+            best_phs,
+            scaled_rows=scaled_features.reshape(n_readings, n_doses, -1)[rows, best_idx]
+        )
+    else:
+        explanations = [(None, None)] * n_readings
 
     # -------------------------------------------------
-    # 4. Conformal prediction interval (95%)
+    # 4-6. Conformal interval, explanation, response
     # -------------------------------------------------
-    conformal_interval = {
-        "lower_pH": best_ph - q_hat,
-        "upper_pH": best_ph + q_hat
-    }
-
-   # -------------------------------------------------
-# 5. Build human explanation
-# -------------------------------------------------
-    explanation_text = build_prelime_explanation(
-        best_dose,
-        best_ph,
-        shap_explanation
-    )
+    results = []
+
+    for i in range(n_readings):
+        best_dose = float(best_doses[i])
+        best_ph = float(best_phs[i])
+        shap_explanation, explanation_text = explanations[i]
+
+        conformal_interval = {
+            "lower_pH": best_ph - q_hat,
+            "upper_pH": best_ph + q_hat
+        }
+
+        results.append({
+            "recommended_dose_ppm": best_dose,
+            "predicted_settled_pH": best_ph,
+            "safe_band": {
+                "lower": SAFE_PH_LOWER,
+                "upper": SAFE_PH_UPPER
+            },
+            "conformal_interval": conformal_interval,
+            "shap_explanation": shap_explanation,
+            "ambatale_explanation_pre": explanation_text
+        })
+
+    return results
+
+
+# =========================
+# SHAP EXPLANATIONS
+# =========================
+
+def explain_pre_lime_rows(
+    raw_ph,
+    raw_turbidity,
+    raw_conductivity,
+    doses,
+    predicted_ph,
+    scaled_rows=None
+) -> List[Tuple[Dict, str]]:
+    """
+    SHAP explanation + human text for N (reading, chosen dose) rows,
+    using one TreeExplainer.shap_values call.
+
+    scaled_rows may be passed when the rows were already scaled.
+    Returns (shap_explanation, ambatale_explanation_pre) per row.
+    """
+
+    raw_ph = np.asarray(raw_ph, dtype=float).ravel()
+    raw_turbidity = np.asarray(raw_turbidity, dtype=float).ravel()
+    raw_conductivity = np.asarray(raw_conductivity, dtype=float).ravel()
+    doses = np.asarray(doses, dtype=float).ravel()
+    predicted_ph = np.asarray(predicted_ph, dtype=float).ravel()
+
+    if len(raw_ph) == 0:
+        return []
+
+    if scaled_rows is None:
+        scaled_rows = pre_lime_assets["scaler"].transform(pd.DataFrame({
+            "Raw_Water_PH": raw_ph,
+            "Raw_Water_Turbidity": raw_turbidity,
+            "Raw_Water_Conductivity": raw_conductivity,
+            "Pre_Lime_Dosage_ppm": doses
+        }, columns=PRE_LIME_FEATURE_COLUMNS))
+
+    explainer = pre_lime_assets["explainer"]
+    shap_values = np.asarray(explainer.shap_values(scaled_rows))
+    base_value = float(explainer.expected_value)
+
+    explanations = []
+
+    for i in range(len(raw_ph)):
+        shap_explanation = {
+            "feature_names": [
+                "raw_water_ph",
+                "raw_water_turbidity",
+                "raw_water_conductivity",
+                "pre_lime_dose_ppm"
+            ],
+            "feature_values": [
+                float(raw_ph[i]),
+                float(raw_turbidity[i]),
+                float(raw_conductivity[i]),
+                float(doses[i])
+            ],
+            "shap_values": shap_values[i].tolist(),
+            "base_value": base_value
+        }
+
+        explanation_text = build_prelime_explanation(
+            float(doses[i]),
+            float(predicted_ph[i]),
+            shap_explanation
+        )
+
+        explanations.append((shap_explanation, explanation_text))
 
-# -------------------------------------------------
-# 6. Final structured response
-# -------------------------------------------------
-    return {
-        "recommended_dose_ppm": best_dose,
-        "predicted_settled_pH": best_ph,
-        "safe_band": {
-            "lower": SAFE_PH_LOWER,
-            "upper": SAFE_PH_UPPER
-        },
-        "conformal_interval": conformal_interval,
-        "shap_explanation": shap_explanation,
-        "ambatale_explanation_pre": explanation_text
-    }
+    return explanations
 
 
 # =========================================================
@@ -0,0 +1,252 @@
+import threading
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Rows traversed at once by the NumPy backend (bounds the N x trees node matrix)
+NUMPY_CHUNK_ROWS = 4096
+
+_numba_kernel = None
+_numba_lock = threading.Lock()
+
+
+# =========================
+# CONVERSION
+# =========================
+
+def _estimator_trees(model):
+    """
+    (fitted sklearn trees, weight per tree, base output) for the
+    supported ensembles.
+    """
+    name = type(model).__name__
+
+    if name in ("DecisionTreeRegressor", "DecisionTreeClassifier"):
+        return [model], 1.0, 0.0
+
+    if name in (
+        "RandomForestRegressor",
+        "RandomForestClassifier",
+        "ExtraTreesRegressor",
+        "ExtraTreesClassifier"
+    ):
+        trees = list(model.estimators_)
+        return trees, 1.0 / len(trees), 0.0
+
+    if name == "GradientBoostingRegressor":
+        if isinstance(model.init_, str) and model.init_ == "zero":
+            base = 0.0
+        elif hasattr(model.init_, "constant_"):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise ValueError(f"Unsupported GradientBoosting init estimator: {type(model.init_).__name__}")
+        return list(model.estimators_[:, 0]), float(model.learning_rate), base
+
+    raise ValueError(f"Unsupported model type for tree inference: {name}")
+
+
+class FlatTreeEnsemble:
+    """
+    All trees of a fitted sklearn ensemble flattened into shared node
+    arrays (feature, threshold, left, right, value). Leaves point to
+    themselves, so a fixed number of max_depth steps lands every row
+    on its leaf. Tree weights and (for classifiers) class-probability
+    normalisation are folded into value, so the output is base plus
+    the sum of the reached leaf values.
+
+    Exposes predict / predict_proba like the wrapped model.
+    """
+
+    def __init__(self, model, backend: str = "numpy"):
+        trees, weight, base = _estimator_trees(model)
+
+        self.backend = backend
+        self.model_type = type(model).__name__
+        self.is_classifier = hasattr(model, "classes_")
+        self.n_features_in_ = int(model.n_features_in_)
+        self.feature_names_in_ = getattr(model, "feature_names_in_", None)
+        if self.is_classifier:
+            self.classes_ = model.classes_
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in trees:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Multi-output trees are not supported")
+
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            value = np.asarray(tree.value[:, 0, :], dtype=float)
+            if self.is_classifier:
+                # Same normalisation as DecisionTreeClassifier.predict_proba
+                totals = value.sum(axis=1, keepdims=True)
+                totals[totals == 0.0] = 1.0
+                value = value / totals
+            values.append(value * weight)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.int64)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.int64)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.int64)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.base = np.full(self.value.shape[1], base, dtype=np.float64)
+        self.max_depth = max_depth
+
+    # ---- Evaluation ----
+    def _prepare(self, X) -> np.ndarray:
+        if self.feature_names_in_ is not None and hasattr(X, "columns"):
+            X = X[list(self.feature_names_in_)]
+
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}"
+            )
+        return np.ascontiguousarray(X)
+
+    def raw_output(self, X) -> np.ndarray:
+        """
+        Weighted sum of leaf values plus base, shape (N, outputs).
+        """
+        X = self._prepare(X)
+
+        if self.backend == "numba" and numba is not None:
+            return _get_numba_kernel()(
+                X, self.feature, self.threshold, self.left, self.right,
+                self.value, self.roots, self.base
+            )
+
+        return self._raw_output_numpy(X)
+
+    def _raw_output_numpy(self, X) -> np.ndarray:
+        result = np.empty((len(X), self.value.shape[1]))
+
+        for start in range(0, len(X), NUMPY_CHUNK_ROWS):
+            chunk = X[start:start + NUMPY_CHUNK_ROWS]
+            rows = np.arange(len(chunk))[:, None]
+
+            nodes = np.broadcast_to(self.roots, (len(chunk), len(self.roots)))
+            for _ in range(self.max_depth):
+                go_left = chunk[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+            result[start:start + len(chunk)] = self.base + self.value[nodes].sum(axis=1)
+
+        return result
+
+    def predict(self, X) -> np.ndarray:
+        raw = self.raw_output(X)
+        if self.is_classifier:
+            return self.classes_[np.argmax(raw, axis=1)]
+        return raw[:, 0]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not self.is_classifier:
+            raise AttributeError(f"{self.model_type} has no predict_proba")
+        return self.raw_output(X)
+
+
+def _get_numba_kernel():
+    global _numba_kernel
+
+    with _numba_lock:
+        if _numba_kernel is None:
+            _numba_kernel = numba.njit(nogil=True, cache=False)(_traverse)
+        return _numba_kernel
+
+
+def _traverse(X, feature, threshold, left, right, value, roots, base):
+    # Per-row walk; compiled with numba.njit
+    n_rows = X.shape[0]
+    n_outputs = value.shape[1]
+    result = np.empty((n_rows, n_outputs))
+
+    for i in range(n_rows):
+        for o in range(n_outputs):
+            result[i, o] = base[o]
+
+        for t in range(roots.shape[0]):
+            node = roots[t]
+            while left[node] != node:
+                if X[i, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+
+            for o in range(n_outputs):
+                result[i, o] += value[node, o]
+
+    return result
+
+
+# =========================
+# BUILD + VALIDATE
+# =========================
+
+def compile_tree_model(model, backend: str) -> FlatTreeEnsemble:
+    """
+    Flatten a fitted tree ensemble for the "numpy" or "numba" backend.
+    "numba" silently uses the NumPy traversal when numba is missing.
+    """
+    if backend not in ("numpy", "numba"):
+        raise ValueError(f"Unknown tree inference backend: {backend}")
+
+    if backend == "numba" and numba is None:
+        backend = "numpy"
+
+    return FlatTreeEnsemble(model, backend=backend)
+
+
+def validation_error(flat: FlatTreeEnsemble, model, n_rows: int = 1000, seed: int = 0) -> float:
+    """
+    Max |flat - model| on random rows spread across the split
+    thresholds of every feature (probabilities for classifiers).
+    """
+    rng = np.random.default_rng(seed)
+    X = np.empty((n_rows, flat.n_features_in_))
+
+    is_split = flat.left != np.arange(len(flat.left))
+    for f in range(flat.n_features_in_):
+        cuts = flat.threshold[is_split & (flat.feature == f)]
+        if len(cuts) == 0:
+            X[:, f] = rng.normal(size=n_rows)
+            continue
+
+        lower, upper = cuts.min(), cuts.max()
+        margin = max(upper - lower, 1.0) * 0.1
+        X[:, f] = rng.uniform(lower - margin, upper + margin, n_rows)
+
+    if flat.feature_names_in_ is not None:
+        import pandas as pd
+        X = pd.DataFrame(X, columns=flat.feature_names_in_)
+
+    if flat.is_classifier:
+        expected = model.predict_proba(X)
+        actual = flat.predict_proba(X)
+    else:
+        expected = model.predict(X)
+        actual = flat.predict(X)
+
+    return float(np.max(np.abs(np.asarray(actual, dtype=float) - np.asarray(expected, dtype=float))))
@@ -1,6 +1,7 @@
 from flask import Blueprint, request
 from services.advance_regression_service import run_advance_regression
 from utils.response_builder import success_response, error_response
+from utils.validators import parse_bool
 from flask_jwt_extended import jwt_required
 
 advance_regression_bp = Blueprint("advance_regression", __name__)
@@ -11,7 +12,14 @@ advance_regression_bp = Blueprint("advance_regression", __name__)
 def predict():
     try:
         data = request.get_json(force=True)
-        result = run_advance_regression(data)
+
+        # explain=false (query or body) skips SHAP for a dose-only answer
+        explain = parse_bool(
+            request.args.get("explain", data.pop("explain", None)),
+            "explain"
+        )
+
+        result = run_advance_regression(data, explain=explain)
 
         return success_response(
             data=result,
@@ -0,0 +1,193 @@
+from quart import Blueprint, request, current_app
+from datetime import datetime
+
+import config
+from database.async_history_repository import (
+    fetch_history_async,
+    fetch_auto_history_async,
+    fetch_rollups_async
+)
+from database.repositories import HISTORY_COLLECTIONS
+from database.sensor_auto_history_repository import AUTO_HISTORY_SOURCES
+from routes.history_routes import parse_date
+from services.sensor_rollups import (
+    validate_rollup_query,
+    format_rollups,
+    parse_rollup_limit
+)
+from utils.asgi_bridge import (
+    flask_json_response,
+    jwt_error_response,
+    to_quart_response
+)
+from utils.response_builder import success_payload, error_payload
+from utils.validators import parse_page_size
+
+# Native (Motor) versions of the dashboard read endpoints for the ASGI
+# app. URLs, parameters and JSON bodies match routes/history_routes.py
+# and routes/sensor_auto_routes.py; every other route (and every other
+# method on these URLs) falls through to the Flask app.
+
+async_history_bp = Blueprint("async_history", __name__)
+
+
+def _json(payload, status_code: int = 200):
+    flask_app = current_app.extensions["flask_app"]
+    return to_quart_response(flask_json_response(flask_app, payload, status_code))
+
+
+# =========================
+# MANUAL PREDICTION HISTORY
+# =========================
+
+_HISTORY_MESSAGES = {
+    "pre-lime": "Pre-lime history fetched",
+    "post-lime": "Post-lime history fetched",
+    "advance-regression": "advance regression history fetched",
+    "normal-regression": "normal regression history fetched"
+}
+
+
+async def _history(model: str):
+    flask_app = current_app.extensions["flask_app"]
+
+    denied = jwt_error_response(flask_app, list(request.headers.items()))
+    if denied is not None:
+        return to_quart_response(denied)
+
+    try:
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+        limit = int(request.args.get("limit", 50))
+
+        start_dt = parse_date(start_date) if start_date else None
+        end_dt = parse_date(end_date) if end_date else None
+
+        records = await fetch_history_async(
+            HISTORY_COLLECTIONS[model],
+            start_date=start_dt,
+            end_date=end_dt,
+            limit=limit,
+            fields=request.args.get("fields")
+        )
+
+        return _json(success_payload(records, _HISTORY_MESSAGES[model]))
+
+    except ValueError as ve:
+        return _json(error_payload(str(ve)), 400)
+
+    except Exception as e:
+        return _json(error_payload(str(e)), 500)
+
+
+def _history_view(model: str):
+    # Quart runs plain functions in a thread; views must be coroutines
+    async def view():
+        return await _history(model)
+    return view
+
+
+for _model in _HISTORY_MESSAGES:
+    async_history_bp.add_url_rule(
+        f"/api/v1/history/{_model}",
+        f"history_{_model.replace('-', '_')}",
+        _history_view(_model),
+        methods=["GET"],
+        provide_automatic_options=False
+    )
+
+
+# =========================
+# SENSOR AUTO HISTORY (PAGED)
+# =========================
+
+def _date_range():
+    start_date_str = request.args.get("start_date")
+    end_date_str = request.args.get("end_date")
+
+    if start_date_str and end_date_str:
+        return (
+            datetime.fromisoformat(start_date_str),
+            datetime.fromisoformat(end_date_str)
+        )
+
+    return None, None
+
+
+def _page_size():
+    return parse_page_size(
+        request.args.get("limit"),
+        config.SENSOR_HISTORY_PAGE_SIZE,
+        config.SENSOR_HISTORY_MAX_PAGE_SIZE
+    )
+
+
+async def _auto_history(source: str):
+    try:
+        start_date, end_date = _date_range()
+
+        data, next_cursor = await fetch_auto_history_async(
+            source,
+            start_date,
+            end_date,
+            limit=_page_size(),
+            cursor=request.args.get("cursor"),
+            fields=request.args.get("fields")
+        )
+
+    except ValueError as ve:
+        return _json(error_payload(str(ve)), 400)
+
+    return _json({
+        "count": len(data),
+        "data": data,
+        "next_cursor": next_cursor
+    })
+
+
+def _auto_history_view(source: str):
+    async def view():
+        return await _auto_history(source)
+    return view
+
+
+for _source in AUTO_HISTORY_SOURCES:
+    async_history_bp.add_url_rule(
+        f"/api/v1/sensor/{_source}",
+        f"auto_history_{_source.replace('-', '_')}",
+        _auto_history_view(_source),
+        methods=["GET"],
+        provide_automatic_options=False
+    )
+
+
+# =========================
+# ROLLUPS
+# =========================
+
+@async_history_bp.route("/api/v1/sensor/rollups/<model>", methods=["GET"], provide_automatic_options=False)
+async def get_sensor_rollups(model):
+    try:
+        start_date, end_date = _date_range()
+
+        model = model.replace("-", "_")
+        granularity = request.args.get("granularity", "hour")
+        validate_rollup_query(model, granularity)
+        limit = parse_rollup_limit(request.args.get("limit"))
+
+        data = format_rollups(await fetch_rollups_async(
+            granularity,
+            model,
+            start_date,
+            end_date,
+            limit=limit + 1
+        ))
+
+    except ValueError as ve:
+        return _json(error_payload(str(ve)), 400)
+
+    return _json({
+        "count": min(len(data), limit),
+        "data": data[:limit],
+        "truncated": len(data) > limit
+    })
@@ -1,5 +1,9 @@
 from flask import Blueprint, request
-from services.classification_service import run_classification
+import config
+from services.classification_service import (
+    run_classification,
+    run_classification_batch
+)
 from utils.validators import validate_required_fields, validate_numeric
 from utils.response_builder import success_response, error_response
 from flask_jwt_extended import jwt_required
@@ -24,3 +28,34 @@ def predict():
     except Exception as e:
         return error_response(str(e), 400)
 
+
+@classification_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def predict_batch():
+    try:
+        data = request.get_json(force=True)
+
+        # Accept a bare list or {"readings": [...]}
+        readings = data.get("readings") if isinstance(data, dict) else data
+
+        if not isinstance(readings, list) or not readings:
+            raise ValueError("readings must be a non-empty list")
+
+        if len(readings) > config.CLASSIFY_BATCH_MAX_SIZE:
+            raise ValueError(f"readings must contain at most {config.CLASSIFY_BATCH_MAX_SIZE} items")
+
+        validated = []
+        for reading in readings:
+            validate_required_fields(reading, ["ph", "turbidity", "conductivity"])
+            validated.append({
+                "ph": validate_numeric(reading["ph"], "ph"),
+                "turbidity": validate_numeric(reading["turbidity"], "turbidity"),
+                "conductivity": validate_numeric(reading["conductivity"], "conductivity")
+            })
+
+        results = run_classification_batch(validated)
+
+        return success_response(data=results, message="Batch classification successful")
+
+    except Exception as e:
+        return error_response(str(e), 400)
@@ -1,12 +1,18 @@
 from flask import Blueprint, request
 from datetime import datetime
+import config
 from database.repositories import (
+    HISTORY_COLLECTIONS,
+    iter_history,
     fetch_pre_lime_history,
     fetch_post_lime_history,
     fetch_advance_regression_history,
     fetch_normal_regression_history
 )
 from utils.response_builder import success_response, error_response
+from utils.export_stream import export_response, parse_export_format
+from database.export_columns import export_columns
+from database.field_profiles import field_paths
 from flask_jwt_extended import jwt_required
 
 history_bp = Blueprint("history", __name__)
@@ -45,7 +51,8 @@ def get_pre_lime_history():
         records = fetch_pre_lime_history(
             start_date=start_dt,
             end_date=end_dt,
-            limit=limit
+            limit=limit,
+            fields=request.args.get("fields")
         )
 
         return success_response(records, "Pre-lime history fetched")
@@ -75,7 +82,8 @@ def get_post_lime_history():
         records = fetch_post_lime_history(
             start_date=start_dt,
             end_date=end_dt,
-            limit=limit
+            limit=limit,
+            fields=request.args.get("fields")
         )
 
         return success_response(records, "Post-lime history fetched")
@@ -100,7 +108,8 @@ def get_advance_regression_history():
         records = fetch_advance_regression_history(
             start_date=start_dt,
             end_date=end_dt,
-            limit=limit
+            limit=limit,
+            fields=request.args.get("fields")
         )
 
         return success_response(records, "advance regression history fetched")
@@ -125,7 +134,8 @@ def get_normal_regression_history():
         records = fetch_normal_regression_history(
             start_date=start_dt,
             end_date=end_dt,
-            limit=limit
+            limit=limit,
+            fields=request.args.get("fields")
         )
 
         return success_response(records, "normal regression history fetched")
@@ -134,4 +144,53 @@ def get_normal_regression_history():
         return error_response(str(ve), 400)
 
     except Exception as e:
-        return error_response(str(e), 500)
\ No newline at end of file
+        return error_response(str(e), 500)
+
+
+# =========================
+# EXPORT (STREAMED)
+# =========================
+
+@history_bp.route("/<model>/export", methods=["GET"])
+@jwt_required()
+def export_history(model):
+    """
+    ?format=ndjson|csv&start_date=&end_date=&fields= → streamed download
+    of the whole range, oldest first (no limit). CSV columns are the
+    fields= paths, or the collection's top-level fields.
+    """
+    try:
+        if model not in HISTORY_COLLECTIONS:
+            return error_response(f"Unknown history: {model}", 404)
+
+        fmt = parse_export_format(request.args.get("format"))
+
+        start_date = request.args.get("start_date")
+        end_date = request.args.get("end_date")
+
+        start_dt = parse_date(start_date) if start_date else None
+        end_dt = parse_date(end_date) if end_date else None
+
+        records = iter_history(
+            HISTORY_COLLECTIONS[model],
+            start_date=start_dt,
+            end_date=end_dt,
+            batch_size=config.EXPORT_BATCH_SIZE,
+            fields=request.args.get("fields")
+        )
+
+        return export_response(
+            records,
+            fmt,
+            f"{model}-history",
+            columns=export_columns(
+                HISTORY_COLLECTIONS[model],
+                field_paths(HISTORY_COLLECTIONS[model], request.args.get("fields"))
+            )
+        )
+
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+
+    except Exception as e:
+        return error_response(str(e), 500)
@@ -0,0 +1,47 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+
+from services import model_loader
+from database.mongo import ping_latency_ms
+from database.pool_monitor import POOL_STATS, HISTORY_POOL_STATS, pool_settings
+from utils.prediction_cache import all_cache_stats
+from utils.response_builder import success_response, error_response
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+# =========================================
+# PREDICTION CACHE STATS
+# =========================================
+@metrics_bp.route("/cache", methods=["GET"])
+@jwt_required()
+def get_cache_stats():
+    return success_response(
+        data={
+            "model_version": model_loader.MODEL_VERSION,
+            "caches": all_cache_stats()
+        },
+        message="Prediction cache stats"
+    )
+
+
+# =========================================
+# MONGODB CONNECTION POOL STATS (CMAP)
+# =========================================
+@metrics_bp.route("/mongo-pool", methods=["GET"])
+@jwt_required()
+def get_mongo_pool_stats():
+    try:
+        latency = ping_latency_ms()
+    except Exception as e:
+        return error_response(f"MongoDB ping failed: {e}", 503)
+
+    return success_response(
+        data={
+            "settings": pool_settings(),
+            "ping_ms": latency,
+            "servers": POOL_STATS.stats(),
+            "history_servers": HISTORY_POOL_STATS.stats()
+        },
+        message="MongoDB pool stats"
+    )
@@ -5,7 +5,8 @@ from services.pre_lime_service import run_pre_lime_prediction
 from utils.validators import (
     validate_required_fields,
     validate_numeric,
-    validate_ranges
+    validate_ranges,
+    parse_bool
 )
 from utils.response_builder import success_response, error_response
 
@@ -38,13 +39,20 @@ def predict_pre_lime():
         # -----------------------------
         validate_ranges(raw_ph, raw_turbidity, raw_conductivity)
 
+        # explain=false (query or body) skips SHAP for a dose-only answer
+        explain = parse_bool(
+            request.args.get("explain", data.get("explain")),
+            "explain"
+        )
+
         # -----------------------------
         # 4. Run service layer
         # -----------------------------
         result = run_pre_lime_prediction(
             raw_ph=raw_ph,
             raw_turbidity=raw_turbidity,
-            raw_conductivity=raw_conductivity
+            raw_conductivity=raw_conductivity,
+            explain=explain
         )
 
         return success_response(
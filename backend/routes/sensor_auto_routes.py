@@ -1,7 +1,21 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
 from datetime import datetime
 
+import config
+from services.sensor_auto_service import start_catch_up_job
+from database.sensor_catch_up_job_repository import get_catch_up_job
+from services.sensor_rollups import get_rollups, parse_rollup_limit
+from utils.response_builder import success_response, error_response
+from utils.validators import parse_page_size
+
+from utils.export_stream import export_response, parse_export_format
+from database.export_columns import export_columns
+from database.field_profiles import field_paths
+
 from database.sensor_auto_history_repository import (
+    AUTO_HISTORY_SOURCES,
+    iter_auto_history,
     fetch_pre_lime_auto_history,
     fetch_post_lime_auto_history
 )
@@ -18,95 +32,219 @@ sensor_auto_bp = Blueprint("sensor_auto", __name__)
 
 
 # =========================================
-# PRE-LIME AUTO HISTORY
+# PAGED HISTORY HELPER
 # =========================================
-@sensor_auto_bp.route("/pre-lime", methods=["GET"])
-def get_pre_lime_auto_history():
-
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
-
-    start_date = None
-    end_date = None
-
-    if start_date_str and end_date_str:
-        start_date = datetime.fromisoformat(start_date_str)
-        end_date = datetime.fromisoformat(end_date_str)
-
-    data = fetch_pre_lime_auto_history(start_date, end_date)
+def _page_size():
+    return parse_page_size(
+        request.args.get("limit"),
+        config.SENSOR_HISTORY_PAGE_SIZE,
+        config.SENSOR_HISTORY_MAX_PAGE_SIZE
+    )
+
+
+def _history_page(fetch_history):
+    """
+    ?start_date=&end_date=&limit=&cursor=&fields= → one page plus
+    next_cursor (pass it back as ?cursor= for the next page; null on the
+    last page). fields is "full" (default), "summary" or a field list.
+    """
+    try:
+        start_date_str = request.args.get("start_date")
+        end_date_str = request.args.get("end_date")
+
+        start_date = None
+        end_date = None
+
+        if start_date_str and end_date_str:
+            start_date = datetime.fromisoformat(start_date_str)
+            end_date = datetime.fromisoformat(end_date_str)
+
+        data, next_cursor = fetch_history(
+            start_date,
+            end_date,
+            limit=_page_size(),
+            cursor=request.args.get("cursor"),
+            fields=request.args.get("fields")
+        )
+
+    except ValueError as ve:
+        return error_response(str(ve), 400)
 
     return jsonify({
         "count": len(data),
-        "data": data
+        "data": data,
+        "next_cursor": next_cursor
     }), 200
 
 
+# =========================================
+# PRE-LIME AUTO HISTORY
+# =========================================
+@sensor_auto_bp.route("/pre-lime", methods=["GET"])
+def get_pre_lime_auto_history():
+    return _history_page(fetch_pre_lime_auto_history)
+
+
 # =========================================
 # POST-LIME AUTO HISTORY
 # =========================================
 @sensor_auto_bp.route("/post-lime", methods=["GET"])
 def get_post_lime_auto_history():
+    return _history_page(fetch_post_lime_auto_history)
 
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
 
-    start_date = None
-    end_date = None
+# =========================================
+# CLASSIFICATION AUTO HISTORY
+# =========================================
+@sensor_auto_bp.route("/classification", methods=["GET"])
+def get_classification_auto_history():
+    return _history_page(fetch_classification_auto_history)
+
+# =========================================
+# NORMAL REGRESSION AUTO HISTORY
+# =========================================
+@sensor_auto_bp.route("/normal-regression", methods=["GET"])
+def get_normal_regression_auto_history():
+    return _history_page(fetch_normal_regression_auto_history)
 
-    if start_date_str and end_date_str:
-        start_date = datetime.fromisoformat(start_date_str)
-        end_date = datetime.fromisoformat(end_date_str)
 
-    data = fetch_post_lime_auto_history(start_date, end_date)
+# =========================================
+# ROLLUPS (MINUTE / HOUR / DAY BUCKETS)
+# =========================================
+@sensor_auto_bp.route("/rollups/<model>", methods=["GET"])
+def get_sensor_rollups(model):
+    """
+    ?granularity=minute|hour|day&start_date=&end_date=&limit= → buckets
+    with mean / min / max per metric, dose histogram and class counts,
+    oldest first. truncated=true when the range holds more than limit
+    buckets (default / maximum SENSOR_ROLLUP_MAX_BUCKETS).
+    """
+    try:
+        start_date_str = request.args.get("start_date")
+        end_date_str = request.args.get("end_date")
+
+        start_date = None
+        end_date = None
+
+        if start_date_str and end_date_str:
+            start_date = datetime.fromisoformat(start_date_str)
+            end_date = datetime.fromisoformat(end_date_str)
+
+        limit = parse_rollup_limit(request.args.get("limit"))
+
+        # One extra bucket tells whether the range was cut off
+        data = get_rollups(
+            model.replace("-", "_"),
+            request.args.get("granularity", "hour"),
+            start_date,
+            end_date,
+            limit=limit + 1
+        )
+
+    except ValueError as ve:
+        return error_response(str(ve), 400)
 
     return jsonify({
-        "count": len(data),
-        "data": data
+        "count": min(len(data), limit),
+        "data": data[:limit],
+        "truncated": len(data) > limit
     }), 200
 
 
 # =========================================
-# CLASSIFICATION AUTO HISTORY
+# EXPORT (STREAMED NDJSON / CSV)
 # =========================================
-@sensor_auto_bp.route("/classification", methods=["GET"])
-def get_classification_auto_history():
+@sensor_auto_bp.route("/<model>/export", methods=["GET"])
+def export_auto_history(model):
+    """
+    ?format=ndjson|csv&start_date=&end_date=&fields= → streamed download
+    of the whole range, oldest first (no page size). CSV columns are the
+    fields= paths, or the collection's top-level fields.
+    """
+    if model not in AUTO_HISTORY_SOURCES:
+        return error_response(f"Unknown history: {model}", 404)
+
+    try:
+        fmt = parse_export_format(request.args.get("format"))
+
+        start_date_str = request.args.get("start_date")
+        end_date_str = request.args.get("end_date")
+
+        start_date = None
+        end_date = None
+
+        if start_date_str and end_date_str:
+            start_date = datetime.fromisoformat(start_date_str)
+            end_date = datetime.fromisoformat(end_date_str)
+
+        records = iter_auto_history(
+            model,
+            start_date,
+            end_date,
+            batch_size=config.EXPORT_BATCH_SIZE,
+            fields=request.args.get("fields")
+        )
+
+        collection_name = AUTO_HISTORY_SOURCES[model][0]
+
+        return export_response(
+            records,
+            fmt,
+            f"sensor-{model}",
+            columns=export_columns(
+                collection_name,
+                field_paths(collection_name, request.args.get("fields"))
+            )
+        )
+
+    except ValueError as ve:
+        return error_response(str(ve), 400)
 
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
 
-    start_date = None
-    end_date = None
+# =========================================
+# CATCH-UP (FILL GAPS BEHIND THE WATERMARK)
+# =========================================
+@sensor_auto_bp.route("/catch-up", methods=["POST"])
+@jwt_required()
+def run_sensor_catch_up():
+    """
+    Starts a background catch-up job (range capped by
+    SENSOR_CATCH_UP_MAX_DAYS) → 202 with the job id; poll
+    GET /catch-up/<job_id> for progress.
+    """
+    try:
+        data = request.get_json(force=True)
 
-    if start_date_str and end_date_str:
-        start_date = datetime.fromisoformat(start_date_str)
-        end_date = datetime.fromisoformat(end_date_str)
+        if not data.get("start_date") or not data.get("end_date"):
+            raise ValueError("start_date and end_date are required")
 
-    data = fetch_classification_auto_history(start_date, end_date)
+        start_date = datetime.fromisoformat(data["start_date"])
+        end_date = datetime.fromisoformat(data["end_date"])
 
-    return jsonify({
-        "count": len(data),
-        "data": data
-    }), 200
+        job_id = start_catch_up_job(start_date, end_date)
 
-# =========================================
-# NORMAL REGRESSION AUTO HISTORY
-# =========================================
-@sensor_auto_bp.route("/normal-regression", methods=["GET"])
-def get_normal_regression_auto_history():
+        return success_response(
+            data={"job_id": job_id, "status": "running"},
+            message="Sensor catch-up started",
+            status_code=202
+        )
 
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
+    except ValueError as ve:
+        return error_response(str(ve), 400)
 
-    start_date = None
-    end_date = None
+    except RuntimeError as re:
+        return error_response(str(re), 409)
 
-    if start_date_str and end_date_str:
-        start_date = datetime.fromisoformat(start_date_str)
-        end_date = datetime.fromisoformat(end_date_str)
+    except Exception as e:
+        return error_response(str(e), 500)
 
-    data = fetch_normal_regression_auto_history(start_date, end_date)
 
-    return jsonify({
-        "count": len(data),
-        "data": data
-    }), 200
\ No newline at end of file
+@sensor_auto_bp.route("/catch-up/<job_id>", methods=["GET"])
+@jwt_required()
+def get_sensor_catch_up_job(job_id):
+    job = get_catch_up_job(job_id)
+
+    if job is None:
+        return error_response(f"Unknown catch-up job: {job_id}", 404)
+
+    return success_response(data=job, message="Sensor catch-up job fetched")
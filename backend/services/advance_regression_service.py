@@ -3,9 +3,9 @@ from ml_logic.advance_regression_logic import predict_alum_dosage
 from database.repositories import save_advance_regression_prediction
 
 
-def run_advance_regression(features: Dict) -> Dict:
+def run_advance_regression(features: Dict, explain: bool = True) -> Dict:
 
-    result = predict_alum_dosage(features)
+    result = predict_alum_dosage(features, explain=explain)
 
     record_id = save_advance_regression_prediction({
         "inputs": features,
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work called from the event loop. At most
+    max_pending jobs are queued or running; further callers wait on the
+    loop (not in a thread) until a slot frees up.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor = None
+        self._semaphore = None
+
+    async def run(self, fn, *args, **kwargs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers,
+                thread_name_prefix=f"async-{self.name}"
+            )
+            self._semaphore = asyncio.Semaphore(self._max_pending)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._semaphore = None
+
+
+# CPU-bound ml_logic (prediction endpoints)
+ml_executor = BoundedExecutor("ml", config.ASYNC_ML_WORKERS, config.ASYNC_ML_MAX_PENDING)
+
+# Blocking pymongo / Flask views that have no async path
+io_executor = BoundedExecutor("io", config.ASYNC_IO_WORKERS, config.ASYNC_IO_MAX_PENDING)
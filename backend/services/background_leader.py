@@ -0,0 +1,52 @@
+import fcntl
+import os
+import threading
+import time
+
+import config
+
+_lock_file = None
+
+
+def _try_acquire(lock_path: str) -> bool:
+    global _lock_file
+
+    lock_file = open(lock_path, "a+")
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+
+    # Held until this process exits; the kernel releases it on death
+    _lock_file = lock_file
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return True
+
+
+def start_background_leader(start_tasks, lock_path=None, retry_seconds=None):
+    """
+    Run start_tasks() in exactly one of the processes calling this (one
+    per server worker). The first to take an exclusive lock on
+    lock_path runs the tasks; the others keep retrying, so when the
+    leader exits (restart, max_requests, crash) another worker takes over.
+    """
+    if lock_path is None:
+        lock_path = config.BACKGROUND_LOCK_PATH
+
+    if retry_seconds is None:
+        retry_seconds = config.BACKGROUND_LEADER_RETRY_SECONDS
+
+    def run():
+        while not _try_acquire(lock_path):
+            time.sleep(retry_seconds)
+
+        print(f"👑 Background tasks running in worker {os.getpid()}")
+        start_tasks()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
@@ -1,6 +1,12 @@
-from typing import Dict
-from ml_logic.classification_logic import classify_water_safety
-from database.repositories import save_classification_prediction
+from typing import Dict, List
+from ml_logic.classification_logic import (
+    classify_water_safety,
+    classify_water_safety_batch
+)
+from database.repositories import (
+    save_classification_prediction,
+    save_classification_predictions
+)
 
 
 def run_classification(
@@ -24,3 +30,29 @@ def run_classification(
 
     result["record_id"] = record_id
     return result
+
+
+def run_classification_batch(readings: List[Dict]) -> List[Dict]:
+
+    ph = [r["ph"] for r in readings]
+    turbidity = [r["turbidity"] for r in readings]
+    conductivity = [r["conductivity"] for r in readings]
+
+    results = classify_water_safety_batch(ph, turbidity, conductivity)
+
+    record_ids = save_classification_predictions([
+        {
+            "inputs": {
+                "ph": r["ph"],
+                "turbidity": r["turbidity"],
+                "conductivity": r["conductivity"]
+            },
+            "result": result
+        }
+        for r, result in zip(readings, results)
+    ])
+
+    for result, record_id in zip(results, record_ids):
+        result["record_id"] = record_id
+
+    return results
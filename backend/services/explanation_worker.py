@@ -0,0 +1,188 @@
+import threading
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+import config
+from ml_logic.pre_lime_logic import explain_pre_lime_rows
+from ml_logic.post_lime_logic import explain_post_lime_rows
+from ml_logic.normal_regression_logic import explain_turbidity_rows
+from utils.prediction_cache import model_input_columns
+
+from database import pre_lime_auto_repository
+from database import post_lime_auto_repository
+from database import normal_regression_auto_repository
+
+
+# =====================================
+# EXPLANATION BUILDERS (ONE SHAP CALL PER BATCH)
+# =====================================
+
+def _input_columns(docs, ph_key, turb_key, cond_key):
+    return model_input_columns(
+        [d["raw_inputs"][ph_key] for d in docs],
+        [d["raw_inputs"][turb_key] for d in docs],
+        [d["raw_inputs"][cond_key] for d in docs]
+    )
+
+
+def _explain_pre_lime(docs):
+    ph, turb, cond = _input_columns(docs, "raw_ph", "raw_turbidity", "raw_conductivity")
+
+    explanations = explain_pre_lime_rows(
+        ph, turb, cond,
+        [d["prediction"]["recommended_dose_ppm"] for d in docs],
+        [d["prediction"]["predicted_settled_pH"] for d in docs]
+    )
+
+    return [
+        {
+            "prediction.shap_explanation": shap_explanation,
+            "prediction.ambatale_explanation_pre": text
+        }
+        for shap_explanation, text in explanations
+    ]
+
+
+def _explain_post_lime(docs):
+    # pH column is the pre-lime predicted settled pH the model was fed
+    ph, turb, cond = model_input_columns(
+        [d["input_from_pre_lime"] for d in docs],
+        [d["raw_inputs"]["raw_turbidity"] for d in docs],
+        [d["raw_inputs"]["raw_conductivity"] for d in docs]
+    )
+
+    explanations = explain_post_lime_rows(
+        ph, turb, cond,
+        [d["prediction"]["recommended_post_lime_dose_ppm"] for d in docs],
+        [d["prediction"]["predicted_final_pH_sph2"] for d in docs],
+        [d["prediction"]["predicted_delta_pH"] for d in docs]
+    )
+
+    return [
+        {
+            "prediction.shap_explanation": shap_explanation,
+            "prediction.ambatale_explanation_post": text
+        }
+        for shap_explanation, text in explanations
+    ]
+
+
+def _explain_normal_regression(docs):
+    ph, turb, cond = _input_columns(docs, "ph", "turbidity", "conductivity")
+
+    explanations = explain_turbidity_rows(
+        turb, ph, cond,
+        [d["prediction"]["recommended_dose_ppm"] for d in docs]
+    )
+
+    return [
+        {"prediction.shap_explanation": shap_explanation}
+        for shap_explanation in explanations
+    ]
+
+
+EXPLANATION_JOBS = {
+    "pre_lime": (pre_lime_auto_repository.get_collection, _explain_pre_lime),
+    "post_lime": (post_lime_auto_repository.get_collection, _explain_post_lime),
+    "normal_regression": (
+        normal_regression_auto_repository.get_collection,
+        _explain_normal_regression
+    ),
+}
+
+
+# =====================================
+# ONE WORKER PASS
+# =====================================
+
+def explain_pending_batch(model_name, batch_size=None) -> int:
+    """
+    Explain up to batch_size pending predictions of one model and write
+    the results back with a single bulk_write. Returns the batch size.
+    """
+    if batch_size is None:
+        batch_size = config.EXPLANATION_WORKER_BATCH_SIZE
+
+    get_collection, explain_fn = EXPLANATION_JOBS[model_name]
+    collection = get_collection()
+
+    docs = list(
+        collection.find(
+            {"explanation_status": "pending"},
+            {"raw_inputs": 1, "prediction": 1}
+        )
+        .sort("_id", 1)
+        .limit(batch_size)
+    )
+
+    if not docs:
+        return 0
+
+    now = datetime.utcnow()
+
+    try:
+        updates = explain_fn(docs)
+        operations = [
+            UpdateOne(
+                {"_id": doc["_id"], "explanation_status": "pending"},
+                {"$set": {
+                    **fields,
+                    "explanation_status": "done",
+                    "explained_at": now
+                }}
+            )
+            for doc, fields in zip(docs, updates)
+        ]
+
+    except Exception as e:
+        # Do not retry a poisoned batch forever
+        print(f"❌ {model_name} explanation batch failed → {e}")
+        operations = [
+            UpdateOne(
+                {"_id": doc["_id"], "explanation_status": "pending"},
+                {"$set": {
+                    "explanation_status": "error",
+                    "explanation_error": str(e),
+                    "explained_at": now
+                }}
+            )
+            for doc in docs
+        ]
+
+    collection.bulk_write(operations, ordered=False)
+
+    print(f"🧠 {model_name}: {len(docs)} explanations written back")
+    return len(docs)
+
+
+# =====================================
+# WORKER POOL
+# =====================================
+
+def start_explanation_workers(idle_seconds=None):
+    """
+    One daemon thread per explained model. Each drains pending records in
+    batches and sleeps when its queue is empty, independently of the
+    ingestion scheduler.
+    """
+    if idle_seconds is None:
+        idle_seconds = config.EXPLANATION_WORKER_IDLE_SECONDS
+
+    def run(model_name):
+        while True:
+            try:
+                explained = explain_pending_batch(model_name)
+            except Exception as e:
+                print(f"❌ Explanation worker error ({model_name}) → {e}")
+                explained = 0
+
+            if explained < config.EXPLANATION_WORKER_BATCH_SIZE:
+                time.sleep(idle_seconds)
+
+    for model_name in EXPLANATION_JOBS:
+        thread = threading.Thread(target=run, args=(model_name,), daemon=True)
+        thread.start()
+
+    print(f"🚀 SHAP explanation workers started ({len(EXPLANATION_JOBS)} models)")
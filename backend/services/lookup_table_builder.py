@@ -0,0 +1,162 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+import config
+from services import model_loader
+from ml_logic import lookup_tables
+from ml_logic.pre_lime_logic import CANDIDATE_PRE_LIME_DOSES, predict_settled_ph
+from ml_logic.post_lime_logic import CANDIDATE_POST_LIME_DOSES, predict_delta_ph
+from ml_logic.normal_regression_logic import CANDIDATE_ALUM_DOSES, predict_dose_turbidity
+
+
+# Readings per model.predict call while filling a grid
+BUILD_CHUNK_SIZE = 100000
+
+
+# =====================================
+# TABLE DEFINITIONS
+# =====================================
+# model name -> (candidate doses in table order, fn(ph, turb, cond) -> (N, doses))
+
+LOOKUP_MODELS = {
+    "pre_lime": (
+        lambda: list(CANDIDATE_PRE_LIME_DOSES),
+        lambda ph, turb, cond: predict_settled_ph(ph, turb, cond)
+    ),
+    "post_lime": (
+        lambda: sorted(float(d) for d in CANDIDATE_POST_LIME_DOSES),
+        lambda ph, turb, cond: predict_delta_ph(ph, turb, cond)
+    ),
+    "normal_regression": (
+        lambda: list(CANDIDATE_ALUM_DOSES),
+        lambda ph, turb, cond: predict_dose_turbidity(turb, ph, cond)
+    )
+}
+
+
+# =====================================
+# BUILD
+# =====================================
+
+def build_lookup_table(model_name: str, validation_samples: int = None) -> dict:
+    """
+    Evaluate the model on every grid point, measure the interpolation
+    error on random readings inside the grid and save the table.
+    Returns the table metadata.
+    """
+    if validation_samples is None:
+        validation_samples = config.DOSE_LOOKUP_VALIDATION_SAMPLES
+
+    doses_fn, predict_fn = LOOKUP_MODELS[model_name]
+    doses = doses_fn()
+
+    started = time.perf_counter()
+    axes = [lookup_tables.grid_axis(a) for a in lookup_tables.GRID_AXES]
+    ph, turb, cond = (g.ravel() for g in np.meshgrid(*axes, indexing="ij"))
+
+    outputs = np.empty((len(ph), len(doses)), dtype=np.float32)
+    for start in range(0, len(ph), BUILD_CHUNK_SIZE):
+        end = start + BUILD_CHUNK_SIZE
+        outputs[start:end] = predict_fn(ph[start:end], turb[start:end], cond[start:end])
+
+    values = outputs.T.reshape([len(doses)] + [len(a) for a in axes])
+
+    meta = {
+        "model": model_name,
+        "model_version": model_loader.lookup_table_version(model_name),
+        "doses": [float(d) for d in doses],
+        "grid": {a: list(config.DOSE_LOOKUP_GRID[a]) for a in lookup_tables.GRID_AXES},
+        "max_abs_error": _validation_error(model_name, values, doses, predict_fn, validation_samples),
+        "validation_samples": validation_samples,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+    lookup_tables.save_lookup_table(model_name, values, meta)
+
+    print(
+        f"✅ Dose lookup table built for {model_name} "
+        f"({values.size} values, max error {meta['max_abs_error']:.4f}, "
+        f"{time.perf_counter() - started:.1f}s)"
+    )
+    return meta
+
+
+def _validation_error(model_name, values, doses, predict_fn, samples) -> float:
+    if samples <= 0:
+        return float("inf")
+
+    rng = np.random.default_rng(0)
+    ph, turb, cond = (
+        rng.uniform(lower, upper, samples)
+        for lower, upper, _ in (config.DOSE_LOOKUP_GRID[a] for a in lookup_tables.GRID_AXES)
+    )
+
+    table = lookup_tables.DoseLookupTable(values, {
+        "doses": doses,
+        "grid": config.DOSE_LOOKUP_GRID
+    })
+
+    error = np.abs(table.lookup(ph, turb, cond) - predict_fn(ph, turb, cond))
+    return float(error.max())
+
+
+def is_table_current(model_name: str) -> bool:
+    """
+    True when the saved table matches the current model version, doses
+    and grid. Whether it is used (enabled, within the error budget) is
+    decided at lookup time; rebuilding would not change either.
+    """
+    doses_fn, _ = LOOKUP_MODELS[model_name]
+    return not lookup_tables.is_table_stale(
+        lookup_tables.load_lookup_table(model_name),
+        doses_fn(),
+        model_loader.lookup_table_version(model_name)
+    )
+
+
+def ensure_lookup_tables(force: bool = False):
+    """
+    Build every table that is missing or stale (different model
+    version, doses or grid).
+    """
+    for model_name in LOOKUP_MODELS:
+        if not force and is_table_current(model_name):
+            continue
+
+        try:
+            build_lookup_table(model_name)
+        except Exception as e:
+            print(f"❌ Dose lookup table build failed ({model_name}) → {e}")
+
+
+def start_lookup_table_build():
+    thread = threading.Thread(target=ensure_lookup_tables, daemon=True)
+    thread.start()
+    print("🚀 Dose lookup table build started in background")
+
+
+# =====================================
+# CLI
+# =====================================
+# python -m services.lookup_table_builder [--model pre_lime] [--force]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build dose lookup tables")
+    parser.add_argument("--model", choices=list(LOOKUP_MODELS), action="append")
+    parser.add_argument("--samples", type=int, default=None)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    for name in args.model or list(LOOKUP_MODELS):
+        if args.force or not is_table_current(name):
+            build_lookup_table(name, validation_samples=args.samples)
+        else:
+            meta = lookup_tables.load_lookup_table(name).meta
+            over_budget = meta["max_abs_error"] > config.DOSE_LOOKUP_MAX_ERROR[name]
+            print(
+                f"✔ {name} lookup table is current (max error {meta['max_abs_error']:.4f}"
+                f"{', over DOSE_LOOKUP_MAX_ERROR, not used' if over_budget else ''})"
+            )
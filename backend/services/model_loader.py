@@ -1,10 +1,12 @@
+import hashlib
 import os
 import pickle
 import sys
+import threading
+from collections.abc import Mapping
 
 import joblib
 import config
-import shap
 # from utils.turbidity_pipeline_utils import (
 #     prepare_features,
 #     get_conformal_interval_pre,
@@ -27,95 +29,419 @@ def _load_pickle(path: str):
         return pickle.load(f)
 
 # =========================
-# PRE-LIME ASSETS
+# MODEL VERSION TAG
 # =========================
 
-pre_lime_model = _load_pickle(config.PRE_LIME_MODEL_PATH)
-pre_lime_scaler = _load_pickle(config.PRE_LIME_SCALER_PATH)
-pre_lime_conformal = _load_pickle(config.PRE_LIME_CONFORMAL_PATH)
+_MODEL_FILES = [
+    config.PRE_LIME_MODEL_PATH,
+    config.PRE_LIME_SCALER_PATH,
+    config.PRE_LIME_CONFORMAL_PATH,
+    config.POST_LIME_MODEL_PATH,
+    config.POST_LIME_SCALER_PATH,
+    config.POST_LIME_CONFORMAL_PATH,
+    config.CLASSIFICATION_MODEL_PATH,
+    config.CLASSIFICATION_THRESHOLD_PATH,
+    config.CLASSIFICATION_FEATURE_ORDER_PATH,
+    config.Advance_Regression_MODEL_PATH,
+    config.Advance_Regression_Conformal_MODEL_PATH,
+    config.NORMAL_Regression_MODEL_PATH,
+    config.NORMAL_Regression_Conformal_MODEL_PATH,
+    config.NORMAL_Regression_FEATURE_PATH,
+]
+
+
+def _compute_model_version() -> str:
+    """
+    Short tag derived from the model files on disk (path, size, mtime).
+    Changes whenever a model file is replaced.
+    """
+    digest = hashlib.sha1()
 
-# 🔴 DO NOT LOAD SHAP PICKLE — RECREATE IT
-pre_lime_explainer = shap.TreeExplainer(pre_lime_model)
+    for path in sorted(_MODEL_FILES):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
 
-pre_lime_assets = {
-    "model": pre_lime_model,
-    "scaler": pre_lime_scaler,
-    "explainer": pre_lime_explainer,
-    "conformal": pre_lime_conformal,
+    return digest.hexdigest()[:12]
+
+
+# Files each dose lookup table is built from
+_LOOKUP_MODEL_FILES = {
+    "pre_lime": [
+        config.PRE_LIME_MODEL_PATH,
+        config.PRE_LIME_SCALER_PATH,
+        config.PRE_LIME_CONFORMAL_PATH,
+    ],
+    "post_lime": [
+        config.POST_LIME_MODEL_PATH,
+        config.POST_LIME_SCALER_PATH,
+        config.POST_LIME_CONFORMAL_PATH,
+    ],
+    "normal_regression": [
+        config.NORMAL_Regression_MODEL_PATH,
+        config.NORMAL_Regression_Conformal_MODEL_PATH,
+        config.NORMAL_Regression_FEATURE_PATH,
+    ],
 }
 
-print("✅ Pre-lime model assets loaded")
+_lookup_versions = {}
+_lookup_versions_lock = threading.Lock()
+
+
+def _content_version(paths) -> str:
+    """
+    Short tag derived from the bytes of the given files, so a copied or
+    re-deployed file with the same content keeps its tag.
+    """
+    digest = hashlib.sha1()
+
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+
+    return digest.hexdigest()[:12]
+
+
+def lookup_table_version(model_name: str) -> str:
+    """
+    Version tag of one model's own files, for its dose lookup table.
+    Hashed on first use and again after reload_model_assets().
+    """
+    with _lookup_versions_lock:
+        if model_name not in _lookup_versions:
+            _lookup_versions[model_name] = _content_version(_LOOKUP_MODEL_FILES[model_name])
+        return _lookup_versions[model_name]
+
 
 # =========================
-# POST-LIME ASSETS
+# LAZY ASSET GROUPS
 # =========================
 
-post_lime_model = _load_pickle(config.POST_LIME_MODEL_PATH)
-post_lime_scaler = _load_pickle(config.POST_LIME_SCALER_PATH)
-post_lime_conformal = _load_pickle(config.POST_LIME_CONFORMAL_PATH)
+def _tree_explainer(model):
+    # 🔴 DO NOT LOAD SHAP PICKLE — RECREATE IT
+    # shap is imported here so it is only paid for when an explanation
+    # is actually requested.
+    import shap
+    return shap.TreeExplainer(model)
 
-# 🔴 RECREATE SHAP EXPLAINER
-post_lime_explainer = shap.TreeExplainer(post_lime_model)
 
-post_lime_assets = {
-    "model": post_lime_model,
-    "scaler": post_lime_scaler,
-    "explainer": post_lime_explainer,
-    "conformal": post_lime_conformal,
-}
+def _apply_inference_backend(name: str, assets: dict) -> dict:
+    """
+    Swap "model" for a flattened tree ensemble when a native backend is
+    configured for this group and it matches the original model. The
+    original stays available as "source_model" (used for SHAP).
+    """
+    backend = config.TREE_INFERENCE_BACKEND.get(name, "sklearn")
+    if backend == "sklearn":
+        return assets
+
+    from ml_logic.tree_inference import compile_tree_model, validation_error
+
+    try:
+        flat = compile_tree_model(assets["model"], backend)
+        error = validation_error(
+            flat, assets["model"], n_rows=config.TREE_INFERENCE_VALIDATION_ROWS
+        )
+    except Exception as e:
+        print(f"⚠️ {name}: {backend} tree backend unavailable → {e}; using sklearn")
+        return assets
+
+    if error > config.TREE_INFERENCE_TOLERANCE:
+        print(f"⚠️ {name}: {backend} tree backend off by {error:.2e}; using sklearn")
+        return assets
+
+    print(f"✅ {name}: {flat.backend} tree backend enabled (max error {error:.2e})")
+    return {**assets, "model": flat, "source_model": assets["model"]}
+
+
+class LazyAssetGroup(Mapping):
+    """
+    Dict-like asset group that unpickles its files on first access
+    (or during warm-up). The SHAP explainer is built separately, the
+    first time the "explainer" key is read.
+    """
+
+    def __init__(self, name: str, loader, has_explainer: bool = True):
+        self.name = name
+        self._loader = loader
+        self._has_explainer = has_explainer
+
+        self._assets = None
+        self._explainer = None
+        self._lock = threading.RLock()
+
+        self.status = "not_loaded"
+        self.explainer_status = "not_loaded" if has_explainer else "n/a"
+        self.error = None
+
+    def load(self) -> dict:
+        assets = self._assets
+        if assets is not None:
+            return assets
+
+        with self._lock:
+            if self._assets is None:
+                self.status = "loading"
+                try:
+                    self._assets = _apply_inference_backend(
+                        self.name, self._loader()
+                    )
+                except Exception as e:
+                    self.status = "error"
+                    self.error = str(e)
+                    raise
+                self.status = "ready"
+                self.error = None
+
+            return self._assets
+
+    def explainer(self):
+        if not self._has_explainer:
+            raise KeyError(f"{self.name} has no SHAP explainer")
+
+        explainer = self._explainer
+        if explainer is not None:
+            return explainer
+
+        with self._lock:
+            if self._explainer is None:
+                self.explainer_status = "loading"
+                try:
+                    assets = self.load()
+                    self._explainer = _tree_explainer(
+                        assets.get("source_model", assets["model"])
+                    )
+                except Exception as e:
+                    self.explainer_status = "error"
+                    self.error = str(e)
+                    raise
+                self.explainer_status = "ready"
+
+            return self._explainer
+
+    def reset(self):
+        """
+        Drop loaded assets; they are reloaded from disk on next use.
+        """
+        with self._lock:
+            self._assets = None
+            self._explainer = None
+            self.status = "not_loaded"
+            self.explainer_status = "not_loaded" if self._has_explainer else "n/a"
+            self.error = None
+
+    def readiness(self) -> dict:
+        info = {
+            "status": self.status,
+            "explainer": self.explainer_status
+        }
+        assets = self._assets
+        if assets is not None:
+            info["backend"] = getattr(assets["model"], "backend", "sklearn")
+        if self.error:
+            info["error"] = self.error
+        return info
+
+    # ---- Mapping interface ----
+    def __getitem__(self, key):
+        if key == "explainer" and self._has_explainer:
+            return self.explainer()
+        return self.load()[key]
+
+    def __iter__(self):
+        keys = list(self.load().keys())
+        if self._has_explainer:
+            keys.append("explainer")
+        return iter(keys)
+
+    def __len__(self):
+        return len(self.load()) + (1 if self._has_explainer else 0)
+
+
+# =========================
+# PRE-LIME ASSETS
+# =========================
+
+def _load_pre_lime_assets() -> dict:
+    pre_lime_model = _load_pickle(config.PRE_LIME_MODEL_PATH)
+    pre_lime_scaler = _load_pickle(config.PRE_LIME_SCALER_PATH)
+    pre_lime_conformal = _load_pickle(config.PRE_LIME_CONFORMAL_PATH)
+
+    print("✅ Pre-lime model assets loaded")
 
-print("✅ Post-lime model assets loaded")
+    return {
+        "model": pre_lime_model,
+        "scaler": pre_lime_scaler,
+        "conformal": pre_lime_conformal,
+    }
+
+# =========================
+# POST-LIME ASSETS
+# =========================
+
+def _load_post_lime_assets() -> dict:
+    post_lime_model = _load_pickle(config.POST_LIME_MODEL_PATH)
+    post_lime_scaler = _load_pickle(config.POST_LIME_SCALER_PATH)
+    post_lime_conformal = _load_pickle(config.POST_LIME_CONFORMAL_PATH)
+
+    print("✅ Post-lime model assets loaded")
+
+    return {
+        "model": post_lime_model,
+        "scaler": post_lime_scaler,
+        "conformal": post_lime_conformal,
+    }
 
 # =========================
 # CLASSIFICATION ASSETS
 # =========================
-classification_model = joblib.load(config.CLASSIFICATION_MODEL_PATH)
-classification_threshold = joblib.load(config.CLASSIFICATION_THRESHOLD_PATH)
-classification_feature_order = joblib.load(config.CLASSIFICATION_FEATURE_ORDER_PATH)
 
-print("CLASSIFICATION MODEL TYPE:", type(classification_model))
-print("CLASSIFICATION FEATURE ORDER:", classification_feature_order)
-print("CLASSIFICATION THRESHOLD:", classification_threshold)
+def _load_classification_assets() -> dict:
+    classification_model = joblib.load(config.CLASSIFICATION_MODEL_PATH)
+    classification_threshold = joblib.load(config.CLASSIFICATION_THRESHOLD_PATH)
+    classification_feature_order = joblib.load(config.CLASSIFICATION_FEATURE_ORDER_PATH)
 
-classification_assets = {
-    "model": classification_model,
-    "threshold": classification_threshold,
-    "feature_order": classification_feature_order,
-}
+    print("CLASSIFICATION MODEL TYPE:", type(classification_model))
+    print("CLASSIFICATION FEATURE ORDER:", classification_feature_order)
+    print("CLASSIFICATION THRESHOLD:", classification_threshold)
+
+    print("✅ Classification model assets loaded")
 
-print("✅ Classification model assets loaded")
+    return {
+        "model": classification_model,
+        "threshold": classification_threshold,
+        "feature_order": classification_feature_order,
+    }
 
 # =========================
 # ADVANCED REGRESSION ASSETS
 # =========================
 
-advance_regression_model = _load_pickle(config.Advance_Regression_MODEL_PATH)
-advance_regression_conformal = _load_pickle(config.Advance_Regression_Conformal_MODEL_PATH)
+def _load_advance_regression_assets() -> dict:
+    advance_regression_model = _load_pickle(config.Advance_Regression_MODEL_PATH)
+    advance_regression_conformal = _load_pickle(config.Advance_Regression_Conformal_MODEL_PATH)
 
-# 🔴 RECREATE SHAP EXPLAINER
-advance_regression_explainer = shap.TreeExplainer(advance_regression_model)
-
-advance_regression_assets = {
-    "model": advance_regression_model,
-    "explainer": advance_regression_explainer,
-    "conformal": advance_regression_conformal,
-}
+    print("✅ Advance Regression model assets loaded")
 
-print("✅ Advance Regression model assets loaded")
+    return {
+        "model": advance_regression_model,
+        "conformal": advance_regression_conformal,
+    }
 
 # =========================
 # NORMAL REGRESSION ASSETS
 # =========================
 
-normal_regression_model = _load_pickle(config.NORMAL_Regression_MODEL_PATH)
-normal_regression_conformal = _load_pickle(config.NORMAL_Regression_Conformal_MODEL_PATH)
-normal_regression_features = _load_pickle(config.NORMAL_Regression_FEATURE_PATH)
-normal_regression_explainer = shap.TreeExplainer(normal_regression_model)
-normal_regression_assets = {
-    "model": normal_regression_model,
-    "explainer": normal_regression_explainer,
-    "conformal": normal_regression_conformal,
-    "feature_names": normal_regression_features,
+def _load_normal_regression_assets() -> dict:
+    normal_regression_model = _load_pickle(config.NORMAL_Regression_MODEL_PATH)
+    normal_regression_conformal = _load_pickle(config.NORMAL_Regression_Conformal_MODEL_PATH)
+    normal_regression_features = _load_pickle(config.NORMAL_Regression_FEATURE_PATH)
+
+    print("✅ Regression model assets loaded")
+
+    return {
+        "model": normal_regression_model,
+        "conformal": normal_regression_conformal,
+        "feature_names": normal_regression_features,
+    }
+
+# =========================
+# ASSET REGISTRY
+# =========================
+
+pre_lime_assets = LazyAssetGroup("pre_lime", _load_pre_lime_assets)
+post_lime_assets = LazyAssetGroup("post_lime", _load_post_lime_assets)
+classification_assets = LazyAssetGroup(
+    "classification", _load_classification_assets, has_explainer=False
+)
+advance_regression_assets = LazyAssetGroup(
+    "advance_regression", _load_advance_regression_assets
+)
+normal_regression_assets = LazyAssetGroup(
+    "normal_regression", _load_normal_regression_assets
+)
+
+ASSET_GROUPS = {
+    group.name: group
+    for group in (
+        pre_lime_assets,
+        post_lime_assets,
+        classification_assets,
+        advance_regression_assets,
+        normal_regression_assets,
+    )
 }
 
-print("✅ Regression model assets loaded")
+MODEL_VERSION = _compute_model_version()
+
+
+def asset_readiness() -> dict:
+    return {name: group.readiness() for name, group in ASSET_GROUPS.items()}
+
+
+def load_all_assets(include_explainers: bool = True):
+    """
+    Load every asset group now (fail fast on missing files).
+    """
+    for group in ASSET_GROUPS.values():
+        group.load()
+        if include_explainers and group.explainer_status != "n/a":
+            group.explainer()
+
+
+# =========================
+# BACKGROUND WARM-UP
+# =========================
+
+def start_model_warmup(include_explainers: bool = True):
+    """
+    Load asset groups in a background thread so the app can serve
+    requests immediately. Requests that arrive first simply load the
+    group they need themselves (the group lock prevents double loads).
+    """
+
+    def run():
+        for group in ASSET_GROUPS.values():
+            try:
+                group.load()
+                if include_explainers and group.explainer_status != "n/a":
+                    group.explainer()
+            except Exception as e:
+                print(f"❌ Warm-up failed for {group.name} → {e}")
+
+        print("🔥 Model warm-up finished")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    print("🚀 Model warm-up started in background")
+
+
+# =========================
+# RELOAD
+# =========================
+
+def reload_model_assets():
+    """
+    Drop every loaded asset group so it is reloaded from disk on next
+    use, and invalidate all prediction caches.
+    """
+    global MODEL_VERSION
+
+    for group in ASSET_GROUPS.values():
+        group.reset()
+
+    MODEL_VERSION = _compute_model_version()
+
+    with _lookup_versions_lock:
+        _lookup_versions.clear()
+
+    from utils.prediction_cache import clear_all_caches
+    from ml_logic.lookup_tables import clear_lookup_tables
+    clear_all_caches()
+    clear_lookup_tables()
+
+    print(f"🔄 Model assets reset (version {MODEL_VERSION})")
@@ -3,9 +3,9 @@ from ml_logic.normal_regression_logic import predict_turbidity
 from database.repositories import save_normal_regression_prediction
 
 
-def run_normal_regression(features: Dict) -> Dict:
+def run_normal_regression(features: Dict, explain: bool = True) -> Dict:
 
-    result = predict_turbidity(features)
+    result = predict_turbidity(features, explain=explain)
 
     record_id = save_normal_regression_prediction({
         "inputs": features,
@@ -7,11 +7,12 @@ from database.repositories import save_pre_lime_prediction
 def run_pre_lime_prediction(
     raw_ph: float,
     raw_turbidity: float,
-    raw_conductivity: float
+    raw_conductivity: float,
+    explain: bool = True
 ) -> Dict:
     """
     Service layer for pre-lime prediction.
-    - Calls ML logic
+    - Calls ML logic (explain=False skips SHAP)
     - Saves prediction to MongoDB
     - Returns final result
     """
@@ -23,7 +24,8 @@ def run_pre_lime_prediction(
         result = get_optimal_pre_lime_dose_with_shap(
             raw_ph=raw_ph,
             raw_turbidity=raw_turbidity,
-            raw_conductivity=raw_conductivity
+            raw_conductivity=raw_conductivity,
+            explain=explain
         )
 
         # -----------------------------
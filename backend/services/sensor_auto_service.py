@@ -1,35 +1,53 @@
-from datetime import datetime
+import argparse
+import threading
+from datetime import datetime, timedelta
+
 import config
 
-from ml_logic.pre_lime_logic import get_optimal_pre_lime_dose_with_shap
-from ml_logic.post_lime_logic import get_optimal_post_lime_dose_with_shap
+from services.sensor_pipeline import run_sensor_pipeline
+from services.sensor_process_pool import run_sensor_pipeline_parallel
+from services.sensor_rollups import update_rollups
 
 from database.pre_lime_auto_repository import (
-    save_pre_lime_auto_prediction,
-    is_pre_lime_predicted
+    save_pre_lime_auto_predictions,
+    get_pre_lime_predicted_ids
 )
 
 from database.post_lime_auto_repository import (
-    save_post_lime_auto_prediction,
-    is_post_lime_predicted
+    save_post_lime_auto_predictions,
+    get_post_lime_predicted_ids
 )
 
-from ml_logic.classification_logic import classify_water_safety
-
 from database.classification_auto_repository import (
-    save_classification_auto_prediction,
-    is_classification_predicted
+    save_classification_auto_predictions,
+    get_classification_predicted_ids
 )
 
-from ml_logic.normal_regression_logic import predict_turbidity
-
 from database.normal_regression_auto_repository import (
-    save_normal_regression_auto_prediction,
-    is_normal_regression_predicted
+    save_normal_regression_auto_predictions,
+    get_normal_regression_predicted_ids
+)
+
+from database.sensor_watermark_repository import (
+    get_watermarks,
+    save_watermark
+)
+
+from database.sensor_catch_up_job_repository import (
+    create_catch_up_job,
+    update_catch_up_job
 )
 
 from database.mongo import get_database
 
+# Models written by the sensor pipeline, each with its own watermark
+PIPELINE_MODELS = [
+    "classification",
+    "normal_regression",
+    "pre_lime",
+    "post_lime"
+]
+
 
 # =====================================
 # FETCH SENSOR RECORDS
@@ -49,156 +67,366 @@ def fetch_latest_sensor_records(limit=8000):
     return records
 
 
+def _after_position_query(created_at, record_id):
+    """
+    Readings strictly after (createdAt, _id) in ascending order.
+    """
+    return {"$or": [
+        {"createdAt": {"$gt": created_at}},
+        {"createdAt": created_at, "_id": {"$gt": record_id}}
+    ]}
+
+
+def fetch_sensor_records_after(watermark, limit=None, start_date=None, end_date=None):
+    """
+    Readings newer than the watermark, oldest first, optionally
+    bounded to a createdAt range.
+    """
+    db = get_database(config.SENSOR_DATABASE_NAME)
+    collection = db[config.SENSOR_COLLECTION_NAME]
+
+    if limit is None:
+        limit = config.SENSOR_BATCH_SIZE
+
+    conditions = []
+
+    if watermark:
+        conditions.append(_after_position_query(
+            watermark["last_created_at"],
+            watermark["last_sensor_record_id"]
+        ))
+
+    if start_date:
+        conditions.append({"createdAt": {"$gte": start_date}})
+
+    if end_date:
+        conditions.append({"createdAt": {"$lte": end_date}})
+
+    query = {"$and": conditions} if conditions else {}
+
+    return list(
+        collection.find(query)
+        .sort([("createdAt", 1), ("_id", 1)])
+        .limit(limit)
+    )
+
+
 # =====================================
 # BACKFILL PROCESS
 # =====================================
 
+# Auto-prediction collections that carry a SHAP explanation
+EXPLAINED_MODELS = ["normal_regression", "pre_lime", "post_lime"]
+
+
+def _mark_pending_explanations(results):
+    """
+    Background explain mode: results are saved without SHAP and picked
+    up later by services.explanation_worker.
+    """
+    if config.SENSOR_EXPLAIN_MODE != "background":
+        return
+
+    for model_name in EXPLAINED_MODELS:
+        for doc in results[model_name]:
+            doc["explanation_status"] = "pending"
+
+
+def _run_pipeline(records):
+    """
+    Run the four-model pipeline in-process, or across the process pool
+    for large batches when SENSOR_PIPELINE_WORKERS > 0.
+    """
+    explain = config.SENSOR_EXPLAIN_MODE == "inline"
+
+    if (
+        config.SENSOR_PIPELINE_WORKERS > 0
+        and len(records) >= config.SENSOR_PIPELINE_PARALLEL_MIN_RECORDS
+    ):
+        results = run_sensor_pipeline_parallel(records, explain=explain)
+    else:
+        results = run_sensor_pipeline(records, explain=explain)
+
+    _mark_pending_explanations(results)
+    return results
+
+
+def _save_predictions(docs, save_many_fn, label):
+    counts = save_many_fn(docs)
+
+    print(
+        f"✅ {label}: {counts['inserted']} saved, "
+        f"{counts['duplicates']} duplicates skipped"
+    )
+
+    if counts["failed"]:
+        print(f"❌ {label}: {counts['failed']} writes failed")
+
+    return counts
+
+
+def _update_rollups(model_name, inserted_docs):
+    # Rollups are derived data: a failure is logged, not raised, and
+    # can be repaired with python -m services.sensor_rollups
+    try:
+        update_rollups(model_name, inserted_docs)
+    except Exception as e:
+        print(f"❌ {model_name} rollup update failed → {e}")
+
+
+def _persist_pipeline_results(results):
+    """
+    Bulk-save the four result lists (one round-trip per collection).
+    Returns the models whose batch was persisted without
+    non-duplicate failures.
+    """
+    savers = {
+        "classification": (save_classification_auto_predictions, "Classification"),
+        "normal_regression": (save_normal_regression_auto_predictions, "Normal regression"),
+        "pre_lime": (save_pre_lime_auto_predictions, "Pre-lime"),
+        "post_lime": (save_post_lime_auto_predictions, "Post-lime")
+    }
+
+    persisted = []
+
+    for model_name in PIPELINE_MODELS:
+        save_many_fn, label = savers[model_name]
+        docs = results[model_name]
+        counts = _save_predictions(docs, save_many_fn, label)
+
+        if not counts["failed"]:
+            persisted.append(model_name)
+
+        not_inserted = set(counts["error_indexes"])
+        _update_rollups(
+            model_name,
+            [doc for i, doc in enumerate(docs) if i not in not_inserted]
+        )
+
+    return persisted
+
+
+def process_sensor_records(records, watermark_record=None):
+    """
+    Predict, persist and advance watermarks for one batch of readings
+    (oldest first). Watermarks move to watermark_record when given
+    (e.g. the last fetched reading, including already-predicted ones),
+    else to the last reading of the batch.
+    Returns True when every model persisted its batch.
+    """
+
+    # ==============================
+    # VECTORIZED MODEL PASSES
+    # ==============================
+    results = _run_pipeline(records)
+
+    # ==============================
+    # PERSIST RESULTS
+    # ==============================
+    persisted = _persist_pipeline_results(results)
+
+    # ==============================
+    # ADVANCE WATERMARKS
+    # ==============================
+    last = watermark_record or (records[-1] if records else None)
+
+    if last is not None:
+        for model_name in persisted:
+            save_watermark(model_name, last["createdAt"], last["_id"])
+
+    return len(persisted) == len(PIPELINE_MODELS)
+
+
+def drop_fully_predicted(records):
+    """
+    Remove readings every pipeline model has already predicted, using
+    one set-based lookup per prediction collection.
+    """
+    if not records:
+        return records
+
+    ids = [r["_id"] for r in records]
+
+    done = (
+        get_classification_predicted_ids(ids)
+        & get_normal_regression_predicted_ids(ids)
+        & get_pre_lime_predicted_ids(ids)
+        & get_post_lime_predicted_ids(ids)
+    )
+
+    return [r for r in records if r["_id"] not in done]
+
+
+def _oldest_watermark(watermarks):
+    return min(
+        watermarks.values(),
+        key=lambda w: (w["last_created_at"], w["last_sensor_record_id"])
+    )
+
+
 def process_sensor_backfill():
+    """
+    Incremental ingestion: only readings newer than the per-model
+    watermarks are fetched and predicted. Before any watermark exists
+    the most recent SENSOR_BOOTSTRAP_WINDOW readings are used.
+    Returns the number of readings fetched this tick.
+    """
 
     print("⏱ Scheduler check started...")
 
-    records = fetch_latest_sensor_records(limit=8000)
+    processed = 0
 
-    if not records:
-        print("⚠ No sensor data found.")
-        return
+    for _ in range(config.SENSOR_MAX_BATCHES_PER_TICK):
 
-    new_predictions = 0
+        watermarks = get_watermarks(PIPELINE_MODELS)
 
-    for record in records:
+        if len(watermarks) < len(PIPELINE_MODELS):
+            records = fetch_latest_sensor_records(
+                limit=config.SENSOR_BOOTSTRAP_WINDOW
+            )[::-1]
+        else:
+            records = fetch_sensor_records_after(_oldest_watermark(watermarks))
 
-        sensor_id = record["_id"]
-        print(f"⚙ Processing sensor record: {sensor_id}")
+        if not records:
+            if not processed:
+                print("⚠ No new sensor data found.")
+            break
 
-        try:
+        all_persisted = process_sensor_records(
+            drop_fully_predicted(records),
+            watermark_record=records[-1]
+        )
+
+        processed += len(records)
+
+        if not all_persisted:
+            break
+
+        if len(records) < config.SENSOR_BATCH_SIZE:
+            break
+
+    print(f"🚀 {processed} sensor records processed.")
+    return processed
+
+
+# =====================================
+# CATCH-UP MODE
+# =====================================
+
+def validate_catch_up_range(start_date, end_date):
+    if start_date > end_date:
+        raise ValueError("start_date must be before end_date")
+
+    if end_date - start_date > timedelta(days=config.SENSOR_CATCH_UP_MAX_DAYS):
+        raise ValueError(f"catch-up range must be at most {config.SENSOR_CATCH_UP_MAX_DAYS} days")
+
+
+def process_sensor_catch_up(start_date, end_date, on_progress=None):
+    """
+    Re-scan readings between start_date and end_date regardless of the
+    watermarks, e.g. to fill a gap after an outage or a failed batch.
+    Readings already predicted by every model are skipped up front;
+    the watermarks are left untouched. on_progress(processed) is called
+    after every batch.
+    """
+
+    print(f"⏱ Catch-up started for {start_date} → {end_date}")
+
+    processed = 0
+    position = None
+
+    while True:
+        records = fetch_sensor_records_after(
+            position,
+            start_date=start_date,
+            end_date=end_date
+        )
 
-            # ==============================
-            # CLASSIFICATION
-            # ==============================
-            try:
-                classification_result = classify_water_safety(
-                    ph=record["ph"],
-                    turbidity=record["turbidity"],
-                    conductivity=record["conductivity"]
-                )
-
-                save_classification_auto_prediction({
-                    "sensor_record_id": sensor_id,
-                    "sensor_created_at": record["createdAt"],
-                    "raw_inputs": {
-                        "ph": record["ph"],
-                        "turbidity": record["turbidity"],
-                        "conductivity": record["conductivity"]
-                    },
-                    "prediction": classification_result,
-                    "classified_at": datetime.utcnow()
-                })
-
-                print("✅ Classification saved")
-
-            except Exception as e:
-                if "E11000" in str(e):
-                    print(f"⚠ Classification duplicate skipped for {sensor_id}")
-                else:
-                    raise e
-
-            # ==============================
-            # NORMAL REGRESSION
-            # ==============================
-            try:
-                normal_result = predict_turbidity({
-                    "turbidity": record["turbidity"],
-                    "ph": record["ph"],
-                    "conductivity": record["conductivity"]
-                })
-
-                save_normal_regression_auto_prediction({
-                    "sensor_record_id": sensor_id,
-                    "sensor_created_at": record["createdAt"],
-                    "raw_inputs": {
-                        "turbidity": record["turbidity"],
-                        "ph": record["ph"],
-                        "conductivity": record["conductivity"]
-                    },
-                    "prediction": normal_result,
-                    "predicted_at": datetime.utcnow()
-                })
-
-                print("✅ Normal regression saved")
-
-            except Exception as e:
-                if "E11000" in str(e):
-                    print(f"⚠ Normal regression duplicate skipped for {sensor_id}")
-                else:
-                    raise e
-
-            # ==============================
-            # PRE-LIME
-            # ==============================
-            try:
-                pre_result = get_optimal_pre_lime_dose_with_shap(
-                    raw_ph=record["ph"],
-                    raw_turbidity=record["turbidity"],
-                    raw_conductivity=record["conductivity"]
-                )
-
-                save_pre_lime_auto_prediction({
-                    "sensor_record_id": sensor_id,
-                    "sensor_created_at": record["createdAt"],
-                    "raw_inputs": {
-                        "raw_ph": record["ph"],
-                        "raw_turbidity": record["turbidity"],
-                        "raw_conductivity": record["conductivity"]
-                    },
-                    "prediction": pre_result,
-                    "predicted_at": datetime.utcnow()
-                })
-
-                print("✅ Pre-lime prediction saved")
-
-            except Exception as e:
-                if "E11000" in str(e):
-                    print(f"⚠ Pre-lime duplicate skipped for {sensor_id}")
-                else:
-                    raise e
-
-            # ==============================
-            # POST-LIME
-            # ==============================
-            try:
-                # Ensure pre_result exists if needed
-                if "pre_result" not in locals():
-                    pre_result = get_optimal_pre_lime_dose_with_shap(
-                        raw_ph=record["ph"],
-                        raw_turbidity=record["turbidity"],
-                        raw_conductivity=record["conductivity"]
-                    )
-
-                post_result = get_optimal_post_lime_dose_with_shap(
-                    raw_ph=pre_result["predicted_settled_pH"],
-                    raw_turbidity=record["turbidity"],
-                    raw_conductivity=record["conductivity"]
-                )
-
-                save_post_lime_auto_prediction({
-                    "sensor_record_id": sensor_id,
-                    "sensor_created_at": record["createdAt"],
-                    "input_from_pre_lime": pre_result["predicted_settled_pH"],
-                    "prediction": post_result,
-                    "predicted_at": datetime.utcnow()
-                })
-
-                print("✅ Post-lime prediction saved")
-
-            except Exception as e:
-                if "E11000" in str(e):
-                    print(f"⚠ Post-lime duplicate skipped for {sensor_id}")
-                else:
-                    raise e
-
-            new_predictions += 1
+        if not records:
+            break
 
+        pending = drop_fully_predicted(records)
+        _persist_pipeline_results(_run_pipeline(pending))
+
+        processed += len(pending)
+
+        if on_progress is not None:
+            on_progress(processed)
+
+        last = records[-1]
+        position = {
+            "last_created_at": last["createdAt"],
+            "last_sensor_record_id": last["_id"]
+        }
+
+        if len(records) < config.SENSOR_BATCH_SIZE:
+            break
+
+    print(f"🚀 Catch-up finished: {processed} sensor records processed.")
+    return processed
+
+
+# =====================================
+# CATCH-UP JOBS
+# =====================================
+
+def start_catch_up_job(start_date, end_date) -> str:
+    """
+    Run process_sensor_catch_up in a background thread; progress and
+    outcome are kept in SENSOR_CATCH_UP_JOB_COLLECTION. Returns the job
+    id. Raises RuntimeError while another catch-up is running in any
+    worker (see create_catch_up_job).
+    """
+    validate_catch_up_range(start_date, end_date)
+
+    job_id = create_catch_up_job(start_date, end_date)
+
+    def run():
+        try:
+            processed = process_sensor_catch_up(
+                start_date,
+                end_date,
+                on_progress=lambda n: update_catch_up_job(job_id, processed=n)
+            )
+            update_catch_up_job(
+                job_id,
+                status="completed",
+                processed=processed,
+                finished_at=datetime.utcnow()
+            )
         except Exception as e:
-            print(f"❌ Unexpected error for {sensor_id} → {e}")
+            print(f"❌ Catch-up job {job_id} failed → {e}")
+            update_catch_up_job(
+                job_id,
+                status="failed",
+                error=str(e),
+                finished_at=datetime.utcnow()
+            )
+
+    threading.Thread(target=run, daemon=True).start()
+
+    return job_id
+
+
+# =====================================
+# CLI
+# =====================================
+# python -m services.sensor_auto_service --catch-up 2024-01-01 2024-01-03
+# (no range cap: runs in the foreground, outside any request)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensor prediction ingestion")
+    parser.add_argument(
+        "--catch-up",
+        nargs=2,
+        metavar=("START", "END"),
+        type=datetime.fromisoformat,
+        required=True
+    )
+    args = parser.parse_args()
+
+    start, end = args.catch_up
+    if start > end:
+        parser.error("START must be before END")
 
-    print(f"🚀 {new_predictions} sensor records processed.")
\ No newline at end of file
+    process_sensor_catch_up(start, end)
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+import config
+from database.mongo import get_database
+from services.sensor_auto_service import process_sensor_backfill
+from services.sensor_scheduler import start_sensor_scheduler
+
+# Server error codes meaning change streams are unavailable
+# (standalone server / no replica set)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+
+
+def _collect_micro_batch(stream, window_seconds, max_batch_size):
+    """
+    Block until one insert arrives, then keep collecting inserts for
+    up to window_seconds (or max_batch_size documents).
+    """
+    # next() blocks with one awaitData getMore per
+    # SENSOR_CHANGE_STREAM_AWAIT_MS while idle
+    batch = [stream.next()["documentKey"]]
+
+    deadline = time.monotonic() + window_seconds
+
+    while len(batch) < max_batch_size and time.monotonic() < deadline:
+        change = stream.try_next()
+        if change is not None:
+            batch.append(change["documentKey"])
+
+    return batch
+
+
+def _drain_backfill():
+    """
+    Run watermark-based backfill ticks until one comes back short:
+    caught up, or stopped on a failed persist (retried on the next
+    trigger since that model's watermark did not move).
+    """
+    full_tick = config.SENSOR_MAX_BATCHES_PER_TICK * config.SENSOR_BATCH_SIZE
+
+    while process_sensor_backfill() >= full_tick:
+        pass
+
+
+def _watch_sensor_inserts(window_seconds, max_batch_size, fallback_interval_seconds):
+    db = get_database(config.SENSOR_DATABASE_NAME)
+    collection = db[config.SENSOR_COLLECTION_NAME]
+
+    # Events only wake the backfill; the readings themselves are not needed
+    pipeline = [
+        {"$match": {"operationType": "insert"}},
+        {"$project": {"documentKey": 1}}
+    ]
+
+    while True:
+        try:
+            # Open the stream first so inserts arriving during the
+            # catch-up backfill are buffered rather than missed.
+            with collection.watch(
+                pipeline,
+                max_await_time_ms=config.SENSOR_CHANGE_STREAM_AWAIT_MS
+            ) as stream:
+
+                _drain_backfill()
+                print("👀 Watching automatic_readings for new inserts")
+
+                while stream.alive:
+                    batch = _collect_micro_batch(
+                        stream, window_seconds, max_batch_size
+                    )
+
+                    # The stream only triggers ingestion; readings are
+                    # read back from the watermarks so an unprocessed
+                    # backlog or failed range is never skipped over.
+                    print(f"📥 {len(batch)} sensor inserts received")
+                    _drain_backfill()
+
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                print(f"⚠ Change streams unavailable ({e}); falling back to polling")
+                start_sensor_scheduler(interval_seconds=fallback_interval_seconds)
+                return
+
+            print(f"❌ Change stream error → {e}")
+
+        except PyMongoError as e:
+            print(f"❌ Change stream error → {e}")
+
+        except Exception as e:
+            print(f"❌ Change stream runtime error → {e}")
+
+        # Reconnect; the backfill on re-open covers anything missed
+        time.sleep(config.SENSOR_CHANGE_STREAM_RETRY_SECONDS)
+
+
+def start_sensor_change_stream(
+    window_seconds=None,
+    max_batch_size=None,
+    fallback_interval_seconds=10
+):
+    """
+    Event-driven alternative to start_sensor_scheduler: new readings are
+    micro-batched from a change stream on automatic_readings and each
+    micro-batch triggers a watermark-based backfill. Falls back to the polling
+    scheduler when the deployment does not support change streams.
+    """
+
+    if window_seconds is None:
+        window_seconds = config.SENSOR_MICRO_BATCH_WINDOW_MS / 1000.0
+
+    if max_batch_size is None:
+        max_batch_size = config.SENSOR_BATCH_SIZE
+
+    thread = threading.Thread(
+        target=_watch_sensor_inserts,
+        args=(window_seconds, max_batch_size, fallback_interval_seconds),
+        daemon=True
+    )
+    thread.start()
+
+    print(f"🚀 Sensor change-stream predictor started (window {window_seconds}s)")
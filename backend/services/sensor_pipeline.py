@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from ml_logic.classification_logic import classify_water_safety_batch
+from ml_logic.normal_regression_logic import predict_turbidity_batch
+from ml_logic.pre_lime_logic import get_optimal_pre_lime_dose_batch
+from ml_logic.post_lime_logic import get_optimal_post_lime_dose_records
+
+
+# =====================================
+# RECORDS -> COLUMNS
+# =====================================
+
+def records_to_columns(records: List[dict]) -> Dict:
+    """
+    Turn fetched sensor documents into NumPy columns.
+    Records with missing or non-numeric readings are dropped (and
+    reported) so one bad document cannot fail the whole batch.
+    """
+
+    valid = []
+    ph, turbidity, conductivity = [], [], []
+
+    for record in records:
+        try:
+            values = (
+                float(record["ph"]),
+                float(record["turbidity"]),
+                float(record["conductivity"])
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠ Skipping sensor record {record.get('_id')} → {e}")
+            continue
+
+        valid.append(record)
+        ph.append(values[0])
+        turbidity.append(values[1])
+        conductivity.append(values[2])
+
+    return {
+        "records": valid,
+        "ph": np.asarray(ph, dtype=float),
+        "turbidity": np.asarray(turbidity, dtype=float),
+        "conductivity": np.asarray(conductivity, dtype=float)
+    }
+
+
+# =====================================
+# PIPELINE STAGE
+# =====================================
+
+def run_sensor_pipeline(records: List[dict], explain: bool = True) -> Dict[str, List[dict]]:
+    """
+    Run classification, turbidity regression, pre-lime and post-lime
+    as four vectorized passes over a batch of sensor records.
+
+    Post-lime consumes the pre-lime predicted settled pH column directly.
+    explain=False skips every SHAP call (dose/class only).
+    Returns the documents to persist, keyed by model.
+    """
+
+    columns = records_to_columns(records)
+    valid = columns["records"]
+
+    if not valid:
+        return {
+            "classification": [],
+            "normal_regression": [],
+            "pre_lime": [],
+            "post_lime": []
+        }
+
+    ph = columns["ph"]
+    turbidity = columns["turbidity"]
+    conductivity = columns["conductivity"]
+
+    # ==============================
+    # FOUR VECTORIZED MODEL PASSES
+    # ==============================
+    # Readings are rounded to sensor precision so repeats hit the cache
+    classification_results = classify_water_safety_batch(
+        ph, turbidity, conductivity, quantize=True
+    )
+    normal_results = predict_turbidity_batch(
+        turbidity, ph, conductivity, explain=explain, quantize=True
+    )
+    pre_results = get_optimal_pre_lime_dose_batch(
+        ph, turbidity, conductivity, explain=explain, quantize=True
+    )
+
+    settled_ph = np.asarray(
+        [r["predicted_settled_pH"] for r in pre_results], dtype=float
+    )
+    post_results = get_optimal_post_lime_dose_records(
+        settled_ph, turbidity, conductivity, explain=explain, quantize=True
+    )
+
+    # ==============================
+    # DOCUMENTS FOR PERSISTENCE
+    # ==============================
+    now = datetime.utcnow()
+
+    classification_docs = []
+    normal_docs = []
+    pre_docs = []
+    post_docs = []
+
+    for i, record in enumerate(valid):
+        sensor_id = record["_id"]
+        created_at = record.get("createdAt")
+
+        classification_docs.append({
+            "sensor_record_id": sensor_id,
+            "sensor_created_at": created_at,
+            "raw_inputs": {
+                "ph": record["ph"],
+                "turbidity": record["turbidity"],
+                "conductivity": record["conductivity"]
+            },
+            "prediction": classification_results[i],
+            "classified_at": now
+        })
+
+        normal_docs.append({
+            "sensor_record_id": sensor_id,
+            "sensor_created_at": created_at,
+            "raw_inputs": {
+                "turbidity": record["turbidity"],
+                "ph": record["ph"],
+                "conductivity": record["conductivity"]
+            },
+            "prediction": normal_results[i],
+            "predicted_at": now
+        })
+
+        pre_docs.append({
+            "sensor_record_id": sensor_id,
+            "sensor_created_at": created_at,
+            "raw_inputs": {
+                "raw_ph": record["ph"],
+                "raw_turbidity": record["turbidity"],
+                "raw_conductivity": record["conductivity"]
+            },
+            "prediction": pre_results[i],
+            "predicted_at": now
+        })
+
+        post_docs.append({
+            "sensor_record_id": sensor_id,
+            "sensor_created_at": created_at,
+            "input_from_pre_lime": float(settled_ph[i]),
+            # The model's pH input is input_from_pre_lime, not a reading
+            "raw_inputs": {
+                "raw_turbidity": record["turbidity"],
+                "raw_conductivity": record["conductivity"]
+            },
+            "prediction": post_results[i],
+            "predicted_at": now
+        })
+
+    return {
+        "classification": classification_docs,
+        "normal_regression": normal_docs,
+        "pre_lime": pre_docs,
+        "post_lime": post_docs
+    }
@@ -0,0 +1,96 @@
+import atexit
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from services.sensor_pipeline import run_sensor_pipeline
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# =====================================
+# WORKER SIDE
+# =====================================
+
+def _init_worker(include_explainers):
+    """
+    Runs once per worker process: load every model asset up front so
+    chunks never pay for unpickling.
+    """
+    from services import model_loader
+    model_loader.load_all_assets(include_explainers=include_explainers)
+
+
+def _run_chunk(args):
+    records, explain = args
+    return run_sensor_pipeline(records, explain=explain)
+
+
+# =====================================
+# PARENT SIDE
+# =====================================
+
+def get_pipeline_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(config.SENSOR_PIPELINE_START_METHOD)
+
+            _pool = ProcessPoolExecutor(
+                max_workers=config.SENSOR_PIPELINE_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(config.SENSOR_EXPLAIN_MODE == "inline",)
+            )
+
+            # Join the workers on interpreter exit instead of leaving them
+            # to the executor's own teardown
+            atexit.register(shutdown_pipeline_pool)
+
+            print(f"🚀 Pipeline process pool started ({config.SENSOR_PIPELINE_WORKERS} workers)")
+
+        return _pool
+
+
+def shutdown_pipeline_pool():
+    """
+    Stop the worker processes; registered with atexit when the pool
+    is created. A later get_pipeline_pool() starts a fresh pool.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def run_sensor_pipeline_parallel(records, explain: bool = True):
+    """
+    Split records into one chunk per worker, run the pipeline in the
+    process pool and merge the four result lists back in input order.
+    """
+    workers = config.SENSOR_PIPELINE_WORKERS
+    chunk_size = max(1, math.ceil(len(records) / workers))
+
+    chunks = [
+        (records[i:i + chunk_size], explain)
+        for i in range(0, len(records), chunk_size)
+    ]
+
+    merged = {
+        "classification": [],
+        "normal_regression": [],
+        "pre_lime": [],
+        "post_lime": []
+    }
+
+    for result in get_pipeline_pool().map(_run_chunk, chunks):
+        for model_name, docs in result.items():
+            merged[model_name].extend(docs)
+
+    return merged
@@ -0,0 +1,253 @@
+import argparse
+from datetime import datetime, timedelta
+
+import config
+from utils.validators import parse_page_size
+from database.mongo import get_database
+from database.sensor_rollup_repository import (
+    apply_rollup_increments,
+    replace_rollups,
+    fetch_rollups
+)
+
+
+# =====================================
+# WHAT EACH MODEL ROLLS UP
+# =====================================
+# metrics: rollup name -> document path (mean / min / max per bucket)
+# dose:    document path counted into a dose histogram
+# classes: document path counted per label (e.g. ABNORMAL)
+
+ROLLUP_MODELS = {
+    "classification": {
+        "collection": "classification_auto_predictions",
+        "metrics": {
+            "abnormal_probability": "prediction.abnormal_probability",
+            "raw_ph": "raw_inputs.ph",
+            "raw_turbidity": "raw_inputs.turbidity",
+            "raw_conductivity": "raw_inputs.conductivity"
+        },
+        "dose": None,
+        "classes": "prediction.classification"
+    },
+    "normal_regression": {
+        "collection": "normal_regression_auto_predictions",
+        "metrics": {"turbidity": "prediction.predicted_settled_turbidity"},
+        "dose": "prediction.recommended_dose_ppm",
+        "classes": None
+    },
+    "pre_lime": {
+        "collection": "pre_lime_auto_predictions",
+        "metrics": {"ph": "prediction.predicted_settled_pH"},
+        "dose": "prediction.recommended_dose_ppm",
+        "classes": None
+    },
+    "post_lime": {
+        "collection": "post_lime_auto_predictions",
+        "metrics": {"ph": "prediction.predicted_final_pH_sph2"},
+        "dose": "prediction.recommended_post_lime_dose_ppm",
+        "classes": None
+    }
+}
+
+GRANULARITY_STEPS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+
+# =====================================
+# BUCKET SUMMARIES
+# =====================================
+
+def truncate(timestamp: datetime, granularity: str) -> datetime:
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        timestamp = timestamp.replace(minute=0)
+    if granularity == "day":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def _get_path(doc: dict, path: str):
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def _dose_key(dose) -> str:
+    # Mongo field names cannot contain "."
+    return f"{float(dose):g}".replace(".", "_")
+
+
+def summarize(model: str, docs, granularity: str) -> dict:
+    """
+    {(model, bucket_start): {"count", "metrics", "doses", "classes"}}
+    for prediction documents, bucketed by sensor_created_at.
+    """
+    spec = ROLLUP_MODELS[model]
+    buckets = {}
+
+    for doc in docs:
+        created_at = doc.get("sensor_created_at")
+        if not isinstance(created_at, datetime):
+            continue
+
+        key = (model, truncate(created_at, granularity))
+        summary = buckets.get(key)
+        if summary is None:
+            summary = buckets[key] = {"count": 0, "metrics": {}, "doses": {}, "classes": {}}
+
+        summary["count"] += 1
+
+        for name, path in spec["metrics"].items():
+            value = _get_path(doc, path)
+            if value is None:
+                continue
+
+            value = float(value)
+            stats = summary["metrics"].get(name)
+            if stats is None:
+                summary["metrics"][name] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                stats["count"] += 1
+                stats["sum"] += value
+                stats["min"] = min(stats["min"], value)
+                stats["max"] = max(stats["max"], value)
+
+        if spec["dose"]:
+            dose = _get_path(doc, spec["dose"])
+            if dose is not None:
+                dose = _dose_key(dose)
+                summary["doses"][dose] = summary["doses"].get(dose, 0) + 1
+
+        if spec["classes"]:
+            label = _get_path(doc, spec["classes"])
+            if label is not None:
+                summary["classes"][label] = summary["classes"].get(label, 0) + 1
+
+    return buckets
+
+
+# =====================================
+# INCREMENTAL UPDATE (FROM THE BACKFILL)
+# =====================================
+
+def update_rollups(model: str, docs) -> int:
+    """
+    Fold newly inserted prediction documents into every granularity.
+    Only pass documents that were actually inserted, so re-processed
+    duplicates are not counted twice.
+    """
+    if not config.SENSOR_ROLLUPS_ENABLED or not docs:
+        return 0
+
+    updated = 0
+    for granularity in config.SENSOR_ROLLUP_COLLECTIONS:
+        updated += apply_rollup_increments(granularity, summarize(model, docs, granularity))
+
+    return updated
+
+
+# =====================================
+# REBUILD (FROM STORED PREDICTIONS)
+# =====================================
+
+def rebuild_rollups(model: str, start: datetime, end: datetime) -> int:
+    """
+    Recompute a model's buckets for [start, end) from the prediction
+    collection, e.g. after a failed incremental update.
+    """
+    spec = ROLLUP_MODELS[model]
+    db = get_database(config.SENSOR_DATABASE_NAME)
+
+    projection = {"sensor_created_at": 1, "_id": 0}
+    for path in list(spec["metrics"].values()) + [spec["dose"], spec["classes"]]:
+        if path:
+            projection[path] = 1
+
+    rebuilt = 0
+
+    for granularity in config.SENSOR_ROLLUP_COLLECTIONS:
+        # Widen to whole buckets so partial edge buckets are not lost
+        bucket_start = truncate(start, granularity)
+        bucket_end = truncate(end, granularity)
+        if bucket_end < end:
+            bucket_end += GRANULARITY_STEPS[granularity]
+
+        docs = (
+            db[spec["collection"]]
+            .find({"sensor_created_at": {"$gte": bucket_start, "$lt": bucket_end}}, projection)
+            .batch_size(config.EXPORT_BATCH_SIZE)
+        )
+
+        rollup_docs = [
+            dict(summary, model=model, bucket=bucket)
+            for (_, bucket), summary in summarize(model, docs, granularity).items()
+        ]
+
+        rebuilt += replace_rollups(granularity, model, bucket_start, bucket_end, rollup_docs)
+
+    print(f"🔄 {model} rollups rebuilt ({rebuilt} buckets)")
+    return rebuilt
+
+
+# =====================================
+# READ
+# =====================================
+
+def validate_rollup_query(model: str, granularity: str):
+    if model not in ROLLUP_MODELS:
+        raise ValueError(f"model must be one of: {', '.join(ROLLUP_MODELS)}")
+
+    if granularity not in config.SENSOR_ROLLUP_COLLECTIONS:
+        raise ValueError(f"granularity must be one of: {', '.join(config.SENSOR_ROLLUP_COLLECTIONS)}")
+
+
+def parse_rollup_limit(value) -> int:
+    """
+    ?limit= for rollup queries; defaults to SENSOR_ROLLUP_MAX_BUCKETS.
+    """
+    return parse_page_size(
+        value,
+        config.SENSOR_ROLLUP_MAX_BUCKETS,
+        config.SENSOR_ROLLUP_MAX_BUCKETS
+    )
+
+
+def get_rollups(model: str, granularity: str, start_date=None, end_date=None, limit=None) -> list:
+    """
+    Buckets with mean / min / max per metric, oldest first.
+    """
+    validate_rollup_query(model, granularity)
+
+    return format_rollups(fetch_rollups(granularity, model, start_date, end_date, limit))
+
+
+def format_rollups(buckets: list) -> list:
+    for bucket in buckets:
+        bucket["bucket"] = bucket["bucket"].isoformat()
+
+        for stats in bucket.get("metrics", {}).values():
+            stats["mean"] = stats["sum"] / stats["count"] if stats["count"] else None
+
+    return buckets
+
+
+# =====================================
+# CLI
+# =====================================
+# python -m services.sensor_rollups --start 2024-01-01 --end 2024-02-01 [--model pre_lime]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild sensor rollups")
+    parser.add_argument("--model", choices=list(ROLLUP_MODELS), action="append")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    for name in args.model or list(ROLLUP_MODELS):
+        rebuild_rollups(name, args.start, args.end)
@@ -0,0 +1,349 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Batch inference vs the original one-reading-at-a-time logic, on the
+# model pickles in models/:
+#   cd backend && python test_batch_equivalence.py
+
+N_READINGS = 200
+TOLERANCE = 1e-9
+
+
+def random_readings(seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(6.0, 8.5, N_READINGS),      # pH
+        rng.uniform(1.0, 150.0, N_READINGS),    # turbidity
+        rng.uniform(50.0, 600.0, N_READINGS)    # conductivity
+    )
+
+
+def report(name, failures):
+    if failures:
+        print(f"❌ {name}: {len(failures)} mismatches")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+    else:
+        print(f"✅ {name}")
+    return len(failures)
+
+
+def with_assets(module, name, assets, fn):
+    """
+    Run fn() with module.<name> (an asset group) replaced by assets.
+    """
+    original = getattr(module, name)
+    setattr(module, name, assets)
+    try:
+        return fn()
+    finally:
+        setattr(module, name, original)
+
+
+# =========================
+# PRE-LIME
+# =========================
+
+def reference_pre_lime(assets, raw_ph, raw_turbidity, raw_conductivity):
+    """
+    Original per-row pre-lime logic: one DataFrame, one predict and one
+    SHAP call per reading. Returns (dose, settled pH, shap values).
+    """
+    from ml_logic.pre_lime_logic import SAFE_PH_LOWER, SAFE_PH_UPPER
+
+    predictions = []
+
+    for dose in [0.0]:
+        input_df = pd.DataFrame([{
+            "Raw_Water_PH": raw_ph,
+            "Raw_Water_Turbidity": raw_turbidity,
+            "Raw_Water_Conductivity": raw_conductivity,
+            "Pre_Lime_Dosage_ppm": dose
+        }])
+        scaled = assets["scaler"].transform(input_df)
+        predictions.append({
+            "dose": dose,
+            "predicted_ph": float(assets["model"].predict(scaled)[0])
+        })
+
+    inside_band = [
+        p for p in predictions
+        if SAFE_PH_LOWER <= p["predicted_ph"] <= SAFE_PH_UPPER
+    ]
+
+    if inside_band:
+        best = inside_band[0]
+    else:
+        best = min(
+            predictions,
+            key=lambda x: min(
+                abs(x["predicted_ph"] - SAFE_PH_LOWER),
+                abs(x["predicted_ph"] - SAFE_PH_UPPER)
+            )
+        )
+
+    shap_df = pd.DataFrame([{
+        "Raw_Water_PH": raw_ph,
+        "Raw_Water_Turbidity": raw_turbidity,
+        "Raw_Water_Conductivity": raw_conductivity,
+        "Pre_Lime_Dosage_ppm": best["dose"]
+    }])
+    shap_values = assets["explainer"].shap_values(assets["scaler"].transform(shap_df))
+
+    return best["dose"], best["predicted_ph"], np.asarray(shap_values[0])
+
+
+def check_pre_lime():
+    from services.model_loader import pre_lime_assets
+    from ml_logic.pre_lime_logic import get_optimal_pre_lime_dose_batch
+
+    ph, turb, cond = random_readings()
+    batch = get_optimal_pre_lime_dose_batch(ph, turb, cond)
+
+    failures = []
+    for i, result in enumerate(batch):
+        dose, settled_ph, shap_values = reference_pre_lime(
+            pre_lime_assets, ph[i], turb[i], cond[i]
+        )
+
+        if result["recommended_dose_ppm"] != dose:
+            failures.append(f"row {i}: dose {result['recommended_dose_ppm']} != {dose}")
+        if abs(result["predicted_settled_pH"] - settled_ph) > TOLERANCE:
+            failures.append(f"row {i}: pH {result['predicted_settled_pH']} != {settled_ph}")
+        if not np.allclose(result["shap_explanation"]["shap_values"], shap_values, atol=TOLERANCE):
+            failures.append(f"row {i}: SHAP values differ")
+
+    # Only one candidate dose (0 ppm), so there is no tie to break
+    return report("Pre-lime batch matches per-row logic", failures)
+
+
+# =========================
+# POST-LIME
+# =========================
+
+def reference_post_lime(assets, raw_ph, raw_turbidity, raw_conductivity):
+    """
+    Original per-row post-lime logic. Returns (dose, final pH, shap values).
+    """
+    from ml_logic.post_lime_logic import (
+        SAFE_PH_LOWER,
+        SAFE_PH_UPPER,
+        CANDIDATE_POST_LIME_DOSES
+    )
+
+    predictions = []
+
+    for dose in CANDIDATE_POST_LIME_DOSES:
+        input_df = pd.DataFrame([{
+            "Raw_Water_PH": raw_ph,
+            "Raw_Water_Turbidity": raw_turbidity,
+            "Raw_Water_Conductivity": raw_conductivity,
+            "Post_Lime_Dosage_SPH02_ppm": dose
+        }])
+        scaled = assets["scaler"].transform(input_df)
+        delta_ph = float(assets["model"].predict(scaled)[0])
+        predictions.append({"dose": dose, "final_ph": raw_ph + delta_ph})
+
+    inside_band = [
+        p for p in predictions
+        if SAFE_PH_LOWER <= p["final_ph"] <= SAFE_PH_UPPER
+    ]
+
+    if inside_band:
+        best = min(inside_band, key=lambda x: x["dose"])
+    else:
+        best = min(
+            predictions,
+            key=lambda x: (
+                min(
+                    abs(x["final_ph"] - SAFE_PH_LOWER),
+                    abs(x["final_ph"] - SAFE_PH_UPPER)
+                ),
+                x["dose"]
+            )
+        )
+
+    shap_df = pd.DataFrame([{
+        "Raw_Water_PH": raw_ph,
+        "Raw_Water_Turbidity": raw_turbidity,
+        "Raw_Water_Conductivity": raw_conductivity,
+        "Post_Lime_Dosage_SPH02_ppm": best["dose"]
+    }])
+    shap_values = assets["explainer"].shap_values(assets["scaler"].transform(shap_df))
+
+    return best["dose"], best["final_ph"], np.asarray(shap_values[0])
+
+
+class DeltaByDose:
+    """
+    Stand-in post-lime model: ΔpH looked up by the (unscaled) dose, so
+    both candidate doses can be made to tie exactly.
+    """
+
+    def __init__(self, scaler, deltas):
+        self.scaler = scaler
+        self.deltas = deltas
+
+    def predict(self, scaled):
+        doses = self.scaler.inverse_transform(np.asarray(scaled))[:, 3]
+        return np.array([self.deltas[round(float(d), 6)] for d in doses])
+
+
+def check_post_lime():
+    from services.model_loader import post_lime_assets
+    from ml_logic.post_lime_logic import get_optimal_post_lime_dose_batch
+
+    ph, turb, cond = random_readings(seed=1)
+    batch = get_optimal_post_lime_dose_batch(ph, turb, cond)
+
+    failures = []
+    for i in range(N_READINGS):
+        dose, final_ph, shap_values = reference_post_lime(
+            post_lime_assets, ph[i], turb[i], cond[i]
+        )
+        batch_dose = float(batch["recommended_post_lime_dose_ppm"][i])
+        batch_ph = float(batch["predicted_final_pH_sph2"][i])
+
+        if batch_dose != dose:
+            failures.append(f"row {i}: dose {batch_dose} != {dose}")
+        if abs(batch_ph - final_ph) > TOLERANCE:
+            failures.append(f"row {i}: pH {batch_ph} != {final_ph}")
+        if not np.allclose(batch["shap_values"][i], shap_values, atol=TOLERANCE):
+            failures.append(f"row {i}: SHAP values differ")
+
+    return report("Post-lime batch matches per-row logic", failures)
+
+
+def check_post_lime_ties():
+    from services.model_loader import post_lime_assets
+    from ml_logic import post_lime_logic
+
+    # Safe band 6.8-7.2, raw pH 7.0; ΔpH per dose (4 ppm, 5 ppm)
+    cases = [
+        ("both out of band, same pH → lower dose", {4.0: 0.5, 5.0: 0.5}, 4.0),
+        ("both in band, same pH → lower dose", {4.0: 0.0, 5.0: 0.0}, 4.0),
+        ("only higher dose in band → higher dose", {4.0: 0.5, 5.0: 0.0}, 5.0),
+        ("only lower dose in band → lower dose", {4.0: 0.0, 5.0: 0.5}, 4.0),
+        ("on the band bound vs out of band → bound", {4.0: 0.6, 5.0: 0.2}, 5.0)
+    ]
+
+    failures = []
+    for name, deltas, expected in cases:
+        assets = dict(post_lime_assets)
+        assets["model"] = DeltaByDose(assets["scaler"], deltas)
+
+        batch = with_assets(
+            post_lime_logic, "post_lime_assets", assets,
+            lambda: post_lime_logic.get_optimal_post_lime_dose_batch([7.0], [10.0], [200.0])
+        )
+        batch_dose = float(batch["recommended_post_lime_dose_ppm"][0])
+        reference_dose = reference_post_lime(assets, 7.0, 10.0, 200.0)[0]
+
+        if batch_dose != reference_dose:
+            failures.append(f"{name}: batch {batch_dose} != per-row {reference_dose}")
+        if batch_dose != expected:
+            failures.append(f"{name}: got {batch_dose}, expected {expected}")
+
+    return report("Post-lime tie-breaks match per-row logic", failures)
+
+
+# =========================
+# NORMAL REGRESSION (9 / 10 PPM)
+# =========================
+
+FAKE_TURBIDITY_FEATURES = [
+    "Raw_Water_Turbidity",
+    "Raw_Water_PH",
+    "Raw_Water_Conductivity",
+    "Alum_Dosage_ppm"
+]
+
+
+class TurbidityByDose:
+    """
+    Stand-in turbidity model: settled turbidity looked up by dose.
+    """
+
+    def __init__(self, by_dose):
+        self.by_dose = by_dose
+
+    def predict(self, X):
+        return np.array([self.by_dose[int(round(d))] for d in np.asarray(X)[:, 3]])
+
+
+class ZeroExplainer:
+    def shap_values(self, X):
+        return np.zeros(np.asarray(X).shape)
+
+
+def check_normal_regression_ties():
+    from ml_logic import normal_regression_logic
+    from ml_logic.normal_regression_logic import build_features, select_optimal_dose
+
+    cases = [
+        ("same turbidity → 9 ppm", {9: 2.0, 10: 2.0}, 9),
+        ("10 ppm lower → 10 ppm", {9: 2.0, 10: 1.5}, 10),
+        ("9 ppm lower → 9 ppm", {9: 1.5, 10: 2.0}, 9)
+    ]
+
+    failures = []
+    for i, (name, by_dose, expected) in enumerate(cases):
+        model = TurbidityByDose(by_dose)
+        assets = {
+            "model": model,
+            "explainer": ZeroExplainer(),
+            "conformal": {"q_hat_pre": 0.5},
+            "feature_names": {"feature_names": FAKE_TURBIDITY_FEATURES}
+        }
+
+        # A different reading per case so no cached result is reused
+        turbidity, ph, conductivity = 10.0 + i, 7.0, 200.0
+
+        result = with_assets(
+            normal_regression_logic, "normal_regression_assets", assets,
+            lambda: normal_regression_logic.predict_turbidity_batch(
+                [turbidity], [ph], [conductivity]
+            )[0]
+        )
+
+        reference_dose, _ = select_optimal_dose(*(
+            float(model.predict(
+                build_features(turbidity, ph, conductivity, dose, FAKE_TURBIDITY_FEATURES)
+            )[0])
+            for dose in (9, 10)
+        ))
+
+        if result["recommended_dose_ppm"] != reference_dose:
+            failures.append(f"{name}: batch {result['recommended_dose_ppm']} != per-row {reference_dose}")
+        if result["recommended_dose_ppm"] != expected:
+            failures.append(f"{name}: got {result['recommended_dose_ppm']}, expected {expected}")
+
+    return report("Turbidity 9 / 10 ppm tie-breaks match per-row logic", failures)
+
+
+CHECKS = [
+    check_pre_lime,
+    check_post_lime,
+    check_post_lime_ties,
+    check_normal_regression_ties
+]
+
+
+if __name__ == "__main__":
+    print("🔍 Checking batch inference against the per-row logic...")
+
+    try:
+        failed = sum(check() for check in CHECKS)
+
+    except FileNotFoundError as e:
+        print("❌ File not found error")
+        print(e)
+        sys.exit(1)
+
+    if failed:
+        print(f"\n❌ {failed} mismatches")
+        sys.exit(1)
+
+    print("\n🎉 Batch inference matches the per-row logic")
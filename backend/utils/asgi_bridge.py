@@ -0,0 +1,101 @@
+from quart import Response
+
+# Glue between the Quart (ASGI) front and the existing Flask app: Flask
+# views run unchanged in an executor thread and their responses are
+# handed back to Quart as-is, so status codes, headers and JSON bodies
+# are identical in both serving modes.
+
+
+# =========================
+# FLASK DISPATCH
+# =========================
+
+def dispatch_to_flask(flask_app, method, path, query_string, headers, body, base_url, remote_addr):
+    """
+    Run one request through the Flask app (blocking; call it in an
+    executor). Same steps as Flask.wsgi_app: full dispatch, then
+    handle_exception for anything the view did not handle.
+    """
+    with flask_app.test_request_context(
+        path,
+        method=method,
+        query_string=query_string,
+        headers=headers,
+        data=body,
+        base_url=base_url,
+        environ_base={"REMOTE_ADDR": remote_addr or ""}
+    ):
+        try:
+            return flask_app.full_dispatch_request()
+        except Exception as e:
+            return flask_app.handle_exception(e)
+
+
+def jwt_error_response(flask_app, headers):
+    """
+    @jwt_required() for native routes: None if the Authorization header
+    holds a valid token, otherwise the Flask response flask_jwt_extended
+    would have sent (401 / 422).
+    """
+    from flask_jwt_extended import verify_jwt_in_request
+
+    with flask_app.test_request_context(headers=headers):
+        try:
+            verify_jwt_in_request()
+            return None
+        except Exception as e:
+            return flask_app.make_response(flask_app.handle_user_exception(e))
+
+
+def flask_json_response(flask_app, payload, status_code: int = 200):
+    """
+    Render payload exactly like flask.jsonify on the Flask app.
+    """
+    with flask_app.app_context():
+        response = flask_app.json.response(payload)
+
+    response.status_code = status_code
+    return response
+
+
+# =========================
+# RESPONSE CONVERSION
+# =========================
+
+async def _stream_body(flask_response, executor):
+    # Pull each chunk in the executor: streamed Flask bodies (exports)
+    # iterate pymongo cursors.
+    chunks = flask_response.iter_encoded()
+    done = object()
+
+    try:
+        while True:
+            chunk = await executor.run(next, chunks, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        flask_response.close()
+
+
+def to_quart_response(flask_response, executor=None):
+    """
+    Quart response with the status, headers and body of a Flask response.
+    Streamed bodies stay streamed (needs executor).
+    """
+    headers = [
+        (key, value) for key, value in flask_response.headers
+        if key.lower() != "content-length"
+    ]
+
+    if flask_response.is_streamed and executor is not None:
+        return Response(
+            _stream_body(flask_response, executor),
+            status=flask_response.status_code,
+            headers=headers
+        )
+
+    body = flask_response.get_data()
+    flask_response.close()
+
+    return Response(body, status=flask_response.status_code, headers=headers)
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from flask import Response
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Serialized rows per chunk written to the socket
+EXPORT_CHUNK_ROWS = 500
+
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_cell(doc: dict, path: str):
+    """
+    Value at a dotted path; nested objects and lists are kept as JSON
+    text, missing fields are empty.
+    """
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return ""
+        value = value[key]
+
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (ObjectId, datetime)):
+        return _json_default(value)
+    return value
+
+
+# =========================
+# GENERATORS
+# =========================
+
+def iter_ndjson(documents):
+    """
+    One JSON document per line, yielded in chunks of EXPORT_CHUNK_ROWS.
+    """
+    lines = []
+    for doc in documents:
+        lines.append(json.dumps(doc, default=_json_default))
+
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_csv(documents, columns):
+    """
+    CSV with one column per field path in columns, so every row has
+    the same header whatever the documents contain.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+
+    for doc in documents:
+        writer.writerow([_csv_cell(doc, path) for path in columns])
+        rows += 1
+
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# =========================
+# RESPONSE
+# =========================
+
+def parse_export_format(value) -> str:
+    fmt = (value or "ndjson").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+def export_response(documents, fmt: str, filename: str, columns=None) -> Response:
+    """
+    Streaming download: documents (usually a Mongo cursor) are
+    serialized as they are read, never held in memory all at once.
+    CSV needs columns (see database.export_columns).
+    """
+    if fmt == "csv":
+        if not columns:
+            raise ValueError("CSV export requires a column list")
+        body = iter_csv(documents, columns)
+    else:
+        body = iter_ndjson(documents)
+
+    return Response(
+        body,
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"'
+        }
+    )
@@ -0,0 +1,203 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+
+# name -> PredictionCache
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry TTL for model results.
+    Values are deep-copied in and out, since callers attach record ids
+    and other fields to the returned dicts.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+def get_cache(name: str) -> PredictionCache:
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = PredictionCache(
+                name,
+                max_size=config.PREDICTION_CACHE_MAX_SIZE,
+                ttl_seconds=config.PREDICTION_CACHE_TTL_SECONDS
+            )
+        return _caches[name]
+
+
+def clear_all_caches():
+    with _caches_lock:
+        caches = list(_caches.values())
+
+    for cache in caches:
+        cache.clear()
+
+
+def all_cache_stats() -> list:
+    with _caches_lock:
+        caches = list(_caches.values())
+
+    return [cache.stats() for cache in caches]
+
+
+# =========================
+# BATCH FRONT-END
+# =========================
+
+def _as_columns(ph, turbidity, conductivity):
+    return (
+        np.asarray(ph, dtype=float).ravel(),
+        np.asarray(turbidity, dtype=float).ravel(),
+        np.asarray(conductivity, dtype=float).ravel()
+    )
+
+
+def quantize_columns(ph, turbidity, conductivity):
+    """
+    Round reading columns to sensor precision (PREDICTION_CACHE_PRECISION).
+    Quantized callers evaluate the models on the rounded values, so a
+    cached result is exactly what a fresh call would return for the key.
+    """
+    precision = config.PREDICTION_CACHE_PRECISION
+    ph, turbidity, conductivity = _as_columns(ph, turbidity, conductivity)
+
+    return (
+        np.round(ph, precision["ph"]),
+        np.round(turbidity, precision["turbidity"]),
+        np.round(conductivity, precision["conductivity"])
+    )
+
+
+def model_input_columns(ph, turbidity, conductivity):
+    """
+    The reading columns the sensor pipeline's models actually see:
+    quantized when the cache is enabled, raw otherwise. Used to
+    recompute explanations for stored sensor predictions consistently.
+    """
+    if config.PREDICTION_CACHE_ENABLED:
+        return quantize_columns(ph, turbidity, conductivity)
+
+    return _as_columns(ph, turbidity, conductivity)
+
+
+def cached_reading_batch(
+    model_name,
+    model_version,
+    ph,
+    turbidity,
+    conductivity,
+    compute_fn,
+    variant=None,
+    quantize=False
+):
+    """
+    Serve per-reading results from the model's cache and run
+    compute_fn(ph, turbidity, conductivity) only on the misses, as one
+    batch. Keys are the reading plus the model version tag and an
+    optional variant (e.g. with / without SHAP explanation).
+
+    quantize=True (sensor pipeline) rounds readings to sensor precision
+    first, for both the key and the model. Otherwise the exact inputs
+    are used for both, so callers get predictions for what they sent.
+    """
+    if not config.PREDICTION_CACHE_ENABLED:
+        return compute_fn(ph, turbidity, conductivity)
+
+    if quantize:
+        ph, turbidity, conductivity = quantize_columns(ph, turbidity, conductivity)
+    else:
+        ph, turbidity, conductivity = _as_columns(ph, turbidity, conductivity)
+
+    if not (len(ph) == len(turbidity) == len(conductivity)):
+        raise ValueError("ph, turbidity and conductivity must have the same length")
+
+    cache = get_cache(model_name)
+
+    keys = [
+        (model_version, variant, p, t, c)
+        for p, t, c in zip(ph.tolist(), turbidity.tolist(), conductivity.tolist())
+    ]
+
+    results = [None] * len(keys)
+    misses = []
+
+    for i, key in enumerate(keys):
+        hit = cache.get(key)
+        if hit is None:
+            misses.append(i)
+        else:
+            results[i] = hit
+
+    if misses:
+        idx = np.asarray(misses)
+        computed = compute_fn(ph[idx], turbidity[idx], conductivity[idx])
+
+        for i, result in zip(misses, computed):
+            cache.put(keys[i], result)
+            results[i] = result
+
+    return results
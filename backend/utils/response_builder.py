@@ -2,6 +2,26 @@ from flask import jsonify
 from typing import Any, Optional
 
 
+def success_payload(data: Any, message: str = "Success") -> dict:
+    return {
+        "status": "success",
+        "message": message,
+        "data": data
+    }
+
+
+def error_payload(message: str, error_code: Optional[str] = None) -> dict:
+    response = {
+        "status": "error",
+        "message": message
+    }
+
+    if error_code:
+        response["error_code"] = error_code
+
+    return response
+
+
 def success_response(
     data: Any,
     message: str = "Success",
@@ -10,11 +30,7 @@ def success_response(
     """
     Standard success API response.
     """
-    return jsonify({
-        "status": "success",
-        "message": message,
-        "data": data
-    }), status_code
+    return jsonify(success_payload(data, message)), status_code
 
 
 def error_response(
@@ -25,12 +41,4 @@ def error_response(
     """
     Standard error API response.
     """
-    response = {
-        "status": "error",
-        "message": message
-    }
-
-    if error_code:
-        response["error_code"] = error_code
-
-    return jsonify(response), status_code
+    return jsonify(error_payload(message, error_code)), status_code
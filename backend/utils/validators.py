@@ -17,6 +17,45 @@ def validate_numeric(value, field_name: str):
         raise ValueError(f"{field_name} must be a numeric value")
 
 
+def parse_bool(value, field_name: str, default: bool = True) -> bool:
+    """
+    Parse a boolean flag from JSON or a query string ("true"/"false", 1/0).
+    """
+    if value is None:
+        return default
+
+    if isinstance(value, bool):
+        return value
+
+    text = str(value).strip().lower()
+
+    if text in ("true", "1", "yes"):
+        return True
+
+    if text in ("false", "0", "no"):
+        return False
+
+    raise ValueError(f"{field_name} must be true or false")
+
+
+def parse_page_size(value, default: int, maximum: int) -> int:
+    """
+    Parse a ?limit= page size (default when missing, 1..maximum).
+    """
+    if value is None:
+        return default
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    if not (1 <= limit <= maximum):
+        raise ValueError(f"limit must be between 1 and {maximum}")
+
+    return limit
+
+
 def validate_ranges(raw_ph: float, turbidity: float, conductivity: float):
     """
     Validate water quality parameter ranges.
@@ -0,0 +1,7 @@
+from app import create_app
+
+# Production entry point (gunicorn, preload + fork):
+#   gunicorn wsgi:app
+# Settings are read from gunicorn.conf.py in this directory.
+
+app = create_app(prefork=True)